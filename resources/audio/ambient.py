@@ -0,0 +1,157 @@
+"""Long, seamlessly looping ambient beds from a small pool of segments.
+
+An ambient loop declares how it is cut up in sounds.json:
+
+    "segments": {"count": 6, "length": 12.5, "crossfade": 2.5}
+
+Each segment is a separate take of the sound's graph (same stages, its own
+seed), `length` seconds long. A bed of any duration is a sequence of
+segments placed every `length - crossfade` seconds, each overlapping the
+next by `crossfade` seconds with an equal-power (sine/cosine) crossfade,
+which keeps the level of uncorrelated noise constant through the seam.
+The order is a seeded shuffle of the pool with no segment following itself,
+and the last segment crossfades into the first, so the bed loops without a
+fade to silence.
+
+Only the segments a bed uses are rendered, once each, and cached, so a
+ten-minute bed costs about as much as the pool (6 x 12.5 s of synthesis)
+plus a multiply-add per output sample, not ten minutes of synthesis.
+"""
+
+import json
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+import graph
+import spans
+from stream import BLOCK_SIZE
+from synth import SAMPLE_RATE, generator, seed_for
+
+# Generator paths under a sound's seed, clear of the graph's stage indices
+SEGMENT_SEEDS = 1 << 16
+SEGMENT_ORDER = SEGMENT_SEEDS + 1
+POOLS_KEPT = 4
+
+
+def segmented(sound: dict) -> bool:
+    return "segments" in sound
+
+
+def arrangement(count: int, pool: int, rng: np.random.Generator) -> list[int]:
+    """`count` pool indices drawn from shuffled bags, never the same index twice in a row.
+
+    The order wraps (the last segment crossfades into the first), so the
+    last draw also avoids the first index. Each position takes the first
+    index in the bag that is allowed there; with fewer than three segments
+    that is not always possible, and a repeat is accepted.
+    """
+    order = []
+    bag = []
+    for k in range(count):
+        if not bag:
+            bag = rng.permutation(pool).tolist()
+        banned = {order[-1]} if order else set()
+        if k == count - 1 and k > 0:
+            banned.add(order[0])
+        choice = next((i for i in bag if i not in banned), None)
+        if choice is not None:
+            bag.remove(choice)
+        else:
+            choice = next((i for i in range(pool) if i not in banned), bag[0])
+        order.append(choice)
+    return order
+
+
+class _Pool:
+    """Segments of one sound, rendered on first use."""
+
+    def __init__(self, compiler, name: str, seed: int):
+        spec = compiler.sounds[name]["segments"]
+        self.compiler = compiler
+        self.name = name
+        self.length = spec["length"]
+        self.seeds = generator(seed, SEGMENT_SEEDS).integers(2**63, size=spec["count"]).tolist()
+        self._segments = {}
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        if index not in self._segments:
+            with spans.span("segment", sound=self.name, index=index):
+                samples, _ = self.compiler.render(self.name, self.length, seed=self.seeds[index])
+            self._segments[index] = samples
+        return self._segments[index]
+
+
+_pools = OrderedDict()
+
+
+def _seed(compiler, name: str) -> int:
+    return compiler.sounds[name].get("seed", seed_for(name))
+
+
+def _pool(compiler, name: str) -> _Pool:
+    """The segment pool of a sound, shared between beds while its spec is unchanged."""
+    key = (name, json.dumps(graph.dependencies(compiler.spec, name), sort_keys=True))
+    if key not in _pools:
+        _pools[key] = _Pool(compiler, name, _seed(compiler, name))
+        while len(_pools) > POOLS_KEPT:
+            _pools.popitem(last=False)
+    _pools.move_to_end(key)
+    return _pools[key]
+
+
+def _reblock(chunks, block_size: int):
+    """Re-cut arrays of any length into a stream of block_size blocks."""
+    pending = []
+    held = 0
+    start = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        held += len(chunk)
+        while held >= block_size:
+            joined = np.concatenate(pending) if len(pending) > 1 else pending[0]
+            yield start, joined[:block_size]
+            start += block_size
+            pending = [joined[block_size:]]
+            held -= block_size
+    if held:
+        yield start, np.concatenate(pending)
+
+
+def bed(compiler, name: str, duration: float | None = None, block_size: int = BLOCK_SIZE,
+        sample_rate: int = SAMPLE_RATE):
+    """Stream a seamless bed of about `duration` seconds. Returns (stream, duration).
+
+    The duration is rounded to a whole number of segment hops.
+    """
+    sound = compiler.sounds[name]
+    spec = sound["segments"]
+    size = int(spec["length"] * sample_rate)
+    overlap = int(spec["crossfade"] * sample_rate)
+    hop = size - overlap
+    if not 0 < overlap < size:
+        raise ValueError(f"{name}: crossfade must be shorter than the segment length")
+    count = max(1, round((duration or sound["duration"]) * sample_rate / hop))
+    order = arrangement(count, spec["count"], generator(_seed(compiler, name), SEGMENT_ORDER))
+    pool = _pool(compiler, name)
+    ramp = (np.arange(overlap) + 0.5) / overlap * (math.pi / 2)
+    fade_in, fade_out = np.sin(ramp), np.cos(ramp)
+
+    def chunks():
+        # Chunk k is hop samples from segment k's start: its head crossfaded with
+        # the tail of segment k - 1 (the last segment, for k = 0), then its body
+        for k, index in enumerate(order):
+            segment = pool[index]
+            tail = pool[order[k - 1]][hop:]
+            yield segment[:overlap] * fade_in + tail * fade_out
+            yield segment[overlap:hop]
+
+    return _reblock(spans.blocks(chunks(), "crossfade", sound=name), block_size), count * hop / sample_rate
+
+
+def stream(compiler, name: str, duration: float | None = None, block_size: int = BLOCK_SIZE):
+    """Block stream of any sound: segmented ambients as beds, the rest straight from the graph."""
+    if segmented(compiler.sounds[name]):
+        return bed(compiler, name, duration, block_size)
+    return compiler.stream(name, duration, block_size)
@@ -0,0 +1,115 @@
+"""Asset manifest: what the renderer has to fetch and decode, and in which order.
+
+assets.json lists every file AudioManager loads:
+
+    {"sampleRate": 44100,
+     "assets": {"sprite": {"file": "sprite.mp3", "duration": 10.9, "bytes": 81234,
+                           "decodedBytes": 1922760, "loudness": -17.2, "peak": -1.1,
+                           "priority": 0, "streamed": false,
+                           "sounds": {"chime": {"duration": 1.2, "loudness": -16.8, "peak": -3.0}, ...}},
+                "ambient-island": {..., "priority": 1, "streamed": true}, ...}}
+
+All figures come from decoding the shipped files. `decodedBytes` is the
+float32 buffer a full Web Audio decode of the (mono) file takes;
+streamed loops play through an HTML5 audio element and never hold all of
+it. `loudness` is integrated loudness in LUFS (ITU-R BS.1770 gating, mono;
+the K-weighting is built from the dsp.py biquads and reads a 1 kHz tone
+within 0.3 dB), `peak` the sample peak in dBFS; both are null for
+silence. `priority` is the suggested load order, lowest first: the
+sprite, which every mode plays event sounds from, then the loops from the
+smallest decode up, each of which only its own scene needs.
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+
+import dsp
+import sprite
+from build_cache import write_json_atomic
+from decoder import decode
+from synth import SAMPLE_RATE
+
+MANIFEST_NAME = "assets.json"
+SILENCE = -70.0  # BS.1770 absolute gate, LUFS
+BLOCK = 0.4
+OVERLAP = 0.75
+
+
+def k_weighting(sample_rate: int = SAMPLE_RATE) -> dsp.Chain:
+    """BS.1770 pre-filter: a +4 dB high shelf (head) and a 38 Hz high-pass (RLB)."""
+    return dsp.Chain(
+        dsp.high_shelf(1681.97, 4.0, sample_rate=sample_rate),
+        dsp.highpass(38.13, q=0.5, sample_rate=sample_rate),
+    )
+
+
+def _lufs(power):
+    with np.errstate(divide="ignore"):
+        return -0.691 + 10 * np.log10(power)
+
+
+def loudness(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> float | None:
+    """Integrated loudness (LUFS) of a mono signal, None if it is silent.
+
+    Sounds shorter than one 400 ms block are measured as a single block.
+    """
+    weighted = k_weighting(sample_rate).process(samples)
+    size = int(BLOCK * sample_rate)
+    if len(weighted) <= size:
+        powers = np.array([np.mean(weighted ** 2) if len(weighted) else 0.0])
+    else:
+        hop = int(size * (1 - OVERLAP))
+        frames = np.lib.stride_tricks.sliding_window_view(weighted, size)[::hop]
+        powers = np.mean(frames ** 2, axis=1)
+    gated = powers[_lufs(powers) > SILENCE]
+    if not len(gated):
+        return None
+    gated = gated[_lufs(gated) > _lufs(np.mean(gated)) - 10]
+    return round(float(_lufs(np.mean(gated))), 1)
+
+
+def peak_db(samples: np.ndarray) -> float | None:
+    """Sample peak in dBFS, None if silent."""
+    peak = float(np.abs(samples).max()) if len(samples) else 0.0
+    return round(20 * math.log10(peak), 1) if peak > 0 else None
+
+
+def describe(path: str, sample_rate: int = SAMPLE_RATE) -> tuple[dict, np.ndarray]:
+    """(entry, decoded samples) of one encoded file."""
+    samples = decode(path, sample_rate)
+    entry = {
+        "file": os.path.basename(path),
+        "duration": round(len(samples) / sample_rate, 3),
+        "bytes": os.path.getsize(path),
+        "decodedBytes": len(samples) * 4,
+        "loudness": loudness(samples, sample_rate),
+        "peak": peak_db(samples),
+    }
+    return entry, samples
+
+
+def manifest(sprite_path: str, slots: dict, loops: dict, sample_rate: int = SAMPLE_RATE) -> dict:
+    """Manifest for the sprite (`slots` as in sprite.json, in ms) and {name: path} of the loops."""
+    packed, samples = describe(sprite_path, sample_rate)
+    sounds = {}
+    for name, (offset, length) in slots.items():
+        part = samples[int(offset * sample_rate / 1000):int((offset + length) * sample_rate / 1000)]
+        sounds[name] = {"duration": length / 1000, "loudness": loudness(part, sample_rate), "peak": peak_db(part)}
+    assets = {sprite.SPRITE_NAME: {**packed, "priority": 0, "streamed": False, "sounds": sounds}}
+    described = {name: describe(path, sample_rate)[0] for name, path in loops.items()}
+    for priority, name in enumerate(sorted(described, key=lambda n: described[n]["decodedBytes"]), 1):
+        assets[name] = {**described[name], "priority": priority, "streamed": True}
+    return {"sampleRate": sample_rate, "assets": assets}
+
+
+def write_manifest(data: dict, directory: str) -> str:
+    return write_json_atomic(os.path.join(directory, MANIFEST_NAME), data)
+
+
+def read_slots(directory: str) -> dict:
+    """The sprite's {name: [offset ms, duration ms]} from sprite.json."""
+    with open(os.path.join(directory, sprite.MANIFEST_NAME), encoding="utf-8") as f:
+        return json.load(f)["sprite"]
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Timing and peak-memory regression suite for the sound build pipeline.
+
+Times every generator and each build stage (WAV writing, MP3 encoding,
+spectrogram and waveform rendering) and measures its peak traced memory,
+then compares against a recorded baseline. Runs entirely offline; the
+encode stage is skipped when ffmpeg is not on PATH.
+
+Usage:
+    python3 bench_suite.py                 # compare with bench-baseline.json
+    python3 bench_suite.py --save          # record a new baseline
+    python3 bench_suite.py --only gen:chime write_wav
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+
+import ambient
+import graph
+import peaks
+from build_cache import write_json_atomic
+from generate_sounds import SAMPLE_RATE, SOUNDS, convert_to_mp3
+from stream import collect
+from visualize_sounds import compute_spectrogram, spectrogram_to_svg, waveform_to_svg
+from wavio import write_wav_file
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(SCRIPT_DIR, "bench-baseline.json")
+BASELINE_VERSION = 1
+
+# Sound used for the stages that take a rendered buffer
+STAGE_SOUND = "ambient-island"
+
+
+def _render_cold(spec: dict, name: str):
+    ambient._pools.clear()  # segment pools are cached across beds too
+    compiler = graph.Compiler(spec)
+    if ambient.segmented(compiler.sounds[name]):
+        return collect(ambient.bed(compiler, name)[0])
+    return compiler.render(name)
+
+
+def _stages(tmp: str) -> dict:
+    """Stage name -> zero-argument callable. Inputs are rendered up front."""
+    # A fresh compiler per run, so repeats are not served from the memo cache
+    sound_spec = graph.load_spec()
+    stages = {f"gen:{name}": partial(_render_cold, sound_spec, name) for name in SOUNDS}
+
+    samples, duration = SOUNDS[STAGE_SOUND]()
+    spec, freqs, _ = compute_spectrogram(samples, SAMPLE_RATE)
+    pyramid = peaks.build_pyramid(samples)
+    wav_path = os.path.join(tmp, "stage.wav")
+
+    def encode():
+        write_wav_file(wav_path, samples, SAMPLE_RATE)
+        convert_to_mp3(wav_path)
+
+    stages.update({
+        "write_wav": lambda: write_wav_file(wav_path, samples, SAMPLE_RATE),
+        "convert_to_mp3": encode,
+        "compute_spectrogram": lambda: compute_spectrogram(samples, SAMPLE_RATE),
+        "spectrogram_to_svg": lambda: spectrogram_to_svg(spec, freqs, duration, STAGE_SOUND),
+        "build_pyramid": lambda: peaks.build_pyramid(samples),
+        "waveform_to_svg": lambda: waveform_to_svg(pyramid, len(samples), duration, STAGE_SOUND),
+    })
+    if shutil.which("ffmpeg") is None:
+        del stages["convert_to_mp3"]
+    return stages
+
+
+def measure(fn, repeat: int = 3) -> dict:
+    """Best-of-`repeat` wall time, then peak traced memory from one extra run."""
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        seconds = min(seconds, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": seconds, "peak_bytes": peak}
+
+
+def load_baseline(path: str = BASELINE_PATH) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return baseline.get("stages", {}) if baseline.get("version") == BASELINE_VERSION else {}
+
+
+def save_baseline(results: dict, path: str = BASELINE_PATH):
+    write_json_atomic(path, {"version": BASELINE_VERSION, "stages": results}, sort_keys=True)
+
+
+def regressions(result: dict, base: dict | None, time_threshold: float, memory_threshold: float,
+                min_seconds: float) -> list[str]:
+    """Human-readable reasons a stage regressed against its baseline entry."""
+    if not base:
+        return []
+    problems = []
+    slower = result["seconds"] - base["seconds"]
+    if result["seconds"] > base["seconds"] * time_threshold and slower > min_seconds:
+        problems.append(f"time {result['seconds'] / base['seconds']:.2f}x")
+    if result["peak_bytes"] > base["peak_bytes"] * memory_threshold:
+        problems.append(f"memory {result['peak_bytes'] / max(1, base['peak_bytes']):.2f}x")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save", action="store_true", help="record the results as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH, metavar="PATH", help="baseline JSON file")
+    parser.add_argument("--only", nargs="+", metavar="STAGE", help="run only these stages")
+    parser.add_argument("--repeat", type=int, default=3, metavar="N", help="timing runs per stage (best is kept)")
+    parser.add_argument("--time-threshold", type=float, default=1.25, metavar="RATIO",
+                        help="fail when a stage is slower than baseline by this factor (default: 1.25)")
+    parser.add_argument("--memory-threshold", type=float, default=1.10, metavar="RATIO",
+                        help="fail when a stage's peak memory grows by this factor (default: 1.10)")
+    parser.add_argument("--min-seconds", type=float, default=0.005, metavar="S",
+                        help="ignore slowdowns smaller than this, to absorb timer noise (default: 0.005)")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    results = {}
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp:
+        stages = _stages(tmp)
+        unknown = set(args.only or []) - set(stages)
+        if unknown:
+            parser.error(f"unknown stage(s): {', '.join(sorted(unknown))} (choose from {', '.join(stages)})")
+
+        print(f"{'stage':<22}{'time':>10}{'baseline':>10}{'peak mem':>11}{'baseline':>11}  status")
+        for name, fn in stages.items():
+            if args.only and name not in args.only:
+                continue
+            result = measure(fn, args.repeat)
+            results[name] = result
+            base = baseline.get(name)
+            problems = regressions(result, base, args.time_threshold, args.memory_threshold, args.min_seconds)
+            if problems:
+                failed.append(name)
+            status = "REGRESSED (" + ", ".join(problems) + ")" if problems else ("ok" if base else "new")
+            base_time = f"{base['seconds'] * 1000:>8.1f}ms" if base else f"{'-':>10}"
+            base_mem = f"{base['peak_bytes'] / 2**20:>9.1f}MB" if base else f"{'-':>11}"
+            print(f"{name:<22}{result['seconds'] * 1000:>8.1f}ms{base_time}"
+                  f"{result['peak_bytes'] / 2**20:>9.1f}MB{base_mem}  {status}")
+
+    if args.save:
+        save_baseline({**baseline, **results}, args.baseline)
+        print(f"\nBaseline saved to {args.baseline}")
+    elif failed:
+        print(f"\n{len(failed)} stage(s) regressed: {', '.join(failed)}")
+        sys.exit(1)
+    elif not baseline:
+        print(f"\nNo baseline at {args.baseline}; run with --save to record one.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Benchmarks for the Cocopilot sound build scripts.
+
+Usage:
+    python3 benchmarks.py
+"""
+
+import json
+import os
+import random
+import struct
+import tempfile
+import time
+import tracemalloc
+import wave
+
+import numpy as np
+
+import ambient
+import graph
+import soundtrack
+from generate_sounds import SAMPLE_RATE, SOUNDS
+from stream import blocks
+from visualize_sounds import SPECTROGRAM_RENDERERS, compute_spectrogram, spectrogram_to_svg
+from wavio import write_wav_file
+
+
+def legacy_write_wav(path: str, samples, sample_rate: int = SAMPLE_RATE):
+    """The original writer: clamp and struct.pack one sample per writeframes call."""
+    with wave.open(path, "w") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        for s in samples:
+            s = max(-1.0, min(1.0, s))
+            wf.writeframes(struct.pack("<h", int(s * 32767)))
+    return path
+
+
+def legacy_compute_spectrogram(samples, sample_rate, window_size=1024, hop=512):
+    """The original STFT: one rfft per frame, rows converted to lists."""
+    arr = np.array(samples)
+    n = len(arr)
+    num_windows = max(1, (n - window_size) // hop)
+    freq_bins = window_size // 2
+    hann = np.hanning(window_size)
+    spectrogram = []
+    for w in range(num_windows):
+        start = w * hop
+        windowed = arr[start:start + window_size] * hann
+        fft = np.fft.rfft(windowed)
+        spectrogram.append((np.abs(fft[:freq_bins]) / window_size).tolist())
+    return spectrogram, freq_bins, sample_rate / 2
+
+
+def timed(fn, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def bench_write_wav():
+    """Compare the per-sample writer with the bulk encoder on ambient-island."""
+    samples, duration = SOUNDS["ambient-island"]()
+    print(f"write_wav: ambient-island, {len(samples)} samples ({duration:.0f}s)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.wav")
+        legacy = timed(legacy_write_wav, legacy_path, samples)
+        rows = [("legacy per-sample pcm16", legacy, os.path.getsize(legacy_path))]
+
+        for label, fmt, dither in [
+            ("bulk pcm16", "pcm16", False),
+            ("bulk pcm16 + TPDF dither", "pcm16", True),
+            ("bulk pcm24", "pcm24", False),
+            ("bulk float32", "float32", False),
+        ]:
+            path = os.path.join(tmp, f"{fmt}-{dither}.wav")
+            elapsed = timed(write_wav_file, path, samples, SAMPLE_RATE, fmt, dither)
+            rows.append((label, elapsed, os.path.getsize(path)))
+            if fmt == "pcm16" and not dither:
+                with open(legacy_path, "rb") as a, open(path, "rb") as b:
+                    identical = a.read() == b.read()
+
+    print(f"  {'writer':<28}{'time':>10}{'speed-up':>10}{'size':>12}")
+    for label, elapsed, size in rows:
+        print(f"  {label:<28}{elapsed * 1000:>8.1f}ms{legacy / elapsed:>9.0f}x{size:>12,}")
+    print(f"  bulk pcm16 output identical to legacy: {identical}")
+
+
+def bench_spectrogram():
+    """Compare the per-frame STFT with the batched one on ambient-island."""
+    samples, duration = SOUNDS["ambient-island"]()
+    print(f"compute_spectrogram: ambient-island ({duration:.0f}s, 1024/512)")
+
+    legacy = timed(legacy_compute_spectrogram, samples, SAMPLE_RATE)
+    batched = timed(compute_spectrogram, samples, SAMPLE_RATE)
+    mel = timed(compute_spectrogram, samples, SAMPLE_RATE, scale="mel", fmax=8000, db=True)
+    spec, freqs, _ = compute_spectrogram(samples, SAMPLE_RATE)
+    svg = timed(spectrogram_to_svg, spec, freqs, duration, "ambient-island")
+
+    print(f"  {'stage':<28}{'time':>10}{'speed-up':>10}")
+    for label, elapsed in [
+        ("legacy per-frame STFT", legacy),
+        ("batched STFT", batched),
+        ("batched STFT + mel + dB", mel),
+    ]:
+        print(f"  {label:<28}{elapsed * 1000:>8.1f}ms{legacy / elapsed:>9.0f}x")
+    print(f"  {'spectrogram_to_svg (array)':<28}{svg * 1000:>8.1f}ms")
+
+
+def bench_spectrogram_render():
+    """Size and render time of each spectrogram_to_svg backend for every sound."""
+    print("spectrogram_to_svg: file size / render time per backend")
+    header = "".join(f"{r:>20}" for r in SPECTROGRAM_RENDERERS)
+    print(f"  {'sound':<16}{header}")
+    totals = {r: [0, 0.0] for r in SPECTROGRAM_RENDERERS}
+    for name, generator in SOUNDS.items():
+        samples, duration = generator()
+        short = duration < 2
+        spec, freqs, _ = compute_spectrogram(
+            samples, SAMPLE_RATE, window_size=512 if short else 1024, hop=256 if short else 512)
+        cells = []
+        for render in SPECTROGRAM_RENDERERS:
+            start = time.perf_counter()
+            svg = spectrogram_to_svg(spec, freqs, duration, name, render=render)
+            elapsed = time.perf_counter() - start
+            size = len(svg.encode("utf-8"))
+            totals[render][0] += size
+            totals[render][1] += elapsed
+            cells.append(f"{size / 1024:>9.1f}KB{elapsed * 1000:>7.1f}ms")
+        print(f"  {name:<16}{''.join(f'{c:>20}' for c in cells)}")
+    cells = [f"{size / 1024:>9.1f}KB{elapsed * 1000:>7.1f}ms" for size, elapsed in totals.values()]
+    print(f"  {'total':<16}{''.join(f'{c:>20}' for c in cells)}")
+
+
+def bench_graph_memo(repeat: int = 5):
+    """Render the one-shot sound graphs with and without subgraph memoization."""
+    spec = graph.load_spec()
+    names = [name for name, sound in spec["sounds"].items() if not sound.get("loop")]
+    print(f"graph.Compiler: one-shot sounds, best of {repeat}")
+    print(f"  {'sound':<16}{'no memo':>10}{'memo':>10}{'speed-up':>10}{'hits':>6}")
+    totals = [0.0, 0.0]
+    for name in names:
+        best = [float("inf")] * 2
+        for _ in range(repeat):  # alternate, so both see the same machine load
+            for i, memoize in enumerate((False, True)):
+                compiler = graph.Compiler(spec, memoize=memoize)
+                best[i] = min(best[i], timed(lambda: compiler.render(name)))
+        totals = [total + b for total, b in zip(totals, best)]
+        print(f"  {name:<16}{best[0] * 1000:>8.1f}ms{best[1] * 1000:>8.1f}ms"
+              f"{best[0] / best[1]:>9.2f}x{compiler.hits:>6}")
+    print(f"  {'total':<16}{totals[0] * 1000:>8.1f}ms{totals[1] * 1000:>8.1f}ms{totals[0] / totals[1]:>9.2f}x")
+
+
+class _ForgetfulCompiler(graph.Compiler):
+    """A compiler that drops its memo before every render (ambient segments included)."""
+
+    def stream(self, *args, **kwargs):
+        self.reset()
+        return super().stream(*args, **kwargs)
+
+
+def bench_build_memo(repeat: int = 5):
+    """Render every sound with one shared compiler vs a compiler of its own."""
+    spec = graph.load_spec()
+
+    def build(kind: type, shared: bool):
+        ambient._pools.clear()
+        compiler = kind(spec)
+        hits = 0
+        for name, sound in spec["sounds"].items():
+            if not shared:
+                hits += compiler.hits
+                compiler = kind(spec)
+            if ambient.segmented(sound):
+                sum(len(b) for b in blocks(ambient.bed(compiler, name)[0]))
+            else:
+                compiler.render(name)
+        return hits + compiler.hits
+
+    print(f"graph.Compiler: whole build, best of {repeat}")
+    print(f"  {'compiler':<16}{'time':>10}{'hits':>8}")
+    for label, kind, shared in (("own per render", _ForgetfulCompiler, False),
+                                ("own per sound", graph.Compiler, False), ("shared", graph.Compiler, True)):
+        best = min(timed(lambda: build(kind, shared)) for _ in range(repeat))
+        print(f"  {label:<16}{best * 1000:>8.0f}ms{build(kind, shared):>8}")
+
+
+def bench_ambient_bed(minutes: float = 10):
+    """A long ambient synthesized in full vs recombined from its segment pool."""
+    compiler = graph.Compiler()
+    print(f"ambient.bed: {minutes:g}-minute ambients")
+    print(f"  {'sound':<16}{'full':>10}{'segments':>10}{'pool cached':>13}")
+    for name, sound in compiler.sounds.items():
+        if not ambient.segmented(sound):
+            continue
+        full = timed(lambda: sum(len(b) for b in blocks(compiler.stream(name, minutes * 60)[0])))
+        ambient._pools.clear()
+        cold = timed(lambda: sum(len(b) for b in blocks(ambient.bed(compiler, name, minutes * 60)[0])))
+        warm = timed(lambda: sum(len(b) for b in blocks(ambient.bed(compiler, name, minutes * 60)[0])))
+        print(f"  {name:<16}{full * 1000:>8.0f}ms{cold * 1000:>8.0f}ms{warm * 1000:>11.0f}ms")
+
+
+def synthetic_session(count: int, mean_gap: float = 0.3, seed: int = 1):
+    """events.jsonl lines of a busy session: tool calls, turns and messages."""
+    kinds = [
+        ("tool.execution_start", {"toolName": "bash"}), ("tool.execution_start", {"toolName": "edit"}),
+        ("tool.execution_complete", {"success": True}), ("tool.execution_complete", {"success": False}),
+        ("user.message", {}), ("assistant.turn_start", {}), ("assistant.turn_end", {}),
+        ("assistant.message_delta", {}),
+    ]
+    rng = random.Random(seed)
+    t = 1771146000.0
+    for i in range(count):
+        t += rng.expovariate(1 / mean_gap)
+        kind, data = rng.choice(kinds)
+        stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(t)) + f".{int(t % 1 * 1000):03d}Z"
+        yield json.dumps({"type": kind, "id": f"evt-{i}", "timestamp": stamp, "data": data})
+
+
+def _mix_session(count: int):
+    """Mix a synthetic session over the island ambient, discarding the output."""
+    mixer = soundtrack.Mixer()
+    for sound_id in soundtrack.SOUND_DEFS:
+        if not sound_id.startswith("ambient"):
+            mixer.buffer(sound_id)  # render up front, so only the mixing is measured
+    events = soundtrack.read_events(synthetic_session(count))
+    samples = sum(len(block) for block in mixer.blocks(soundtrack.cues(events)))
+    return mixer, samples
+
+
+def bench_soundtrack(count: int = 20000):
+    """Mixing speed for a long session, and peak memory at two session lengths."""
+    start = time.perf_counter()
+    mixer, samples = _mix_session(count)
+    elapsed = time.perf_counter() - start
+    audio = samples / SAMPLE_RATE
+    print(f"soundtrack: {count} events, {mixer.played} sounds, {audio / 60:.0f} min of audio")
+    print(f"  mixed in {elapsed:.2f}s ({audio / elapsed:.0f}x real time), {mixer.stolen} voices stolen")
+    for size in (count // 20, count // 4):
+        tracemalloc.start()
+        _mix_session(size)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  peak traced memory at {size} events: {peak / 2**20:.1f}MB")
+
+
+def main():
+    bench_write_wav()
+    print()
+    bench_spectrogram()
+    print()
+    bench_spectrogram_render()
+    print()
+    bench_graph_memo()
+    print()
+    bench_build_memo()
+    print()
+    bench_ambient_bed()
+    print()
+    bench_soundtrack()
+
+
+if __name__ == "__main__":
+    main()
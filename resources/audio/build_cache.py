@@ -0,0 +1,81 @@
+"""Content-hash build cache for the generated audio assets.
+
+Each asset is recorded in build-manifest.json (next to the MP3s) under a key
+hashed from everything that determines its bytes: the sound's graph in
+sounds.json and the defs it uses, the synthesis library modules, the
+parameters and the encoder settings. A build only redoes assets whose key
+changed or whose output file is missing or was modified.
+"""
+
+import hashlib
+import json
+import os
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_NAME = "build-manifest.json"
+MANIFEST_VERSION = 1
+
+# Library modules whose source affects every rendered sound
+LIBRARY_MODULES = ["synth.py", "osc.py", "stream.py", "dsp.py", "graph.py", "ambient.py", "wavio.py", "encoder.py"]
+
+
+def library_sources() -> list[str]:
+    sources = []
+    for filename in LIBRARY_MODULES:
+        with open(os.path.join(SCRIPT_DIR, filename), encoding="utf-8") as f:
+            sources.append(f.read())
+    return sources
+
+
+def content_key(*parts) -> str:
+    """Stable hash of strings, numbers, lists and dicts."""
+    blob = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path: str) -> str | None:
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_manifest(directory: str = SCRIPT_DIR) -> dict:
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        manifest = {"version": MANIFEST_VERSION}
+    return manifest
+
+
+def write_json_atomic(path: str, data, indent: int | None = 2, sort_keys: bool = False) -> str:
+    """Write JSON through a temp file and a rename, so no reader sees half a file."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent, sort_keys=sort_keys)
+        f.write("\n")
+    os.replace(tmp, path)
+    return path
+
+
+def save_manifest(manifest: dict, directory: str = SCRIPT_DIR):
+    write_json_atomic(os.path.join(directory, MANIFEST_NAME), manifest, sort_keys=True)
+
+
+def is_fresh(entry: dict | None, key: str, directory: str = SCRIPT_DIR) -> bool:
+    """Whether a manifest entry matches key and all its files are unchanged on disk."""
+    if not entry or entry.get("key") != key:
+        return False
+    return all(
+        file_sha256(os.path.join(directory, name)) == digest
+        for name, digest in entry.get("files", {}).items()
+    )
+
+
+def record(key: str, paths: list[str], directory: str = SCRIPT_DIR, **info) -> dict:
+    """Manifest entry for freshly built files, with their content hashes."""
+    files = {os.path.relpath(p, directory): file_sha256(p) for p in paths}
+    return {"key": key, "files": files, **info}
@@ -0,0 +1,55 @@
+"""Decode encoded assets (MP3, Ogg, ...) to float samples through ffmpeg.
+
+ffmpeg writes raw float32 PCM to a pipe and the blocks are wrapped with
+np.frombuffer as they arrive, so no temporary WAV is written and there is
+no per-sample Python work.
+"""
+
+import subprocess
+
+import numpy as np
+
+BLOCK_BYTES = 1 << 18
+
+
+class DecodeError(RuntimeError):
+    """ffmpeg is missing or could not decode the file."""
+
+
+def decode_blocks(path: str, sample_rate: int, block_bytes: int = BLOCK_BYTES):
+    """Yield mono float32 blocks of the decoded file, resampled to sample_rate."""
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin",
+        "-i", path, "-f", "f32le", "-ac", "1", "-ar", str(sample_rate), "pipe:1",
+    ]
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise DecodeError("ffmpeg not found on PATH") from None
+    finished = False
+    try:
+        pending = b""
+        while True:
+            chunk = proc.stdout.read(block_bytes)
+            if not chunk:
+                break
+            chunk = pending + chunk
+            usable = len(chunk) - len(chunk) % 4
+            pending = chunk[usable:]
+            yield np.frombuffer(chunk, "<f4", usable // 4)
+        finished = True
+    finally:
+        if not finished:
+            proc.kill()
+        proc.stdout.close()
+        # stderr is only read after stdout hits EOF; -loglevel error keeps it small
+        message = proc.stderr.read().decode(errors="replace").strip()
+        proc.stderr.close()
+        if proc.wait() != 0 and finished:
+            raise DecodeError(f"ffmpeg failed ({proc.returncode}) decoding {path}: {message}")
+
+
+def decode(path: str, sample_rate: int) -> np.ndarray:
+    """Decode a whole file into one mono float32 array."""
+    blocks = list(decode_blocks(path, sample_rate))
+    return np.concatenate(blocks) if blocks else np.zeros(0, np.float32)
@@ -0,0 +1,273 @@
+"""Block-based IIR and FIR filters.
+
+Every filter has a process(x) method that keeps its state between calls, so
+it can run as a stream.process stage and give the same output whatever the
+block size. Design helpers follow the RBJ Audio EQ Cookbook:
+
+    rumble = lowpass(400)            # 2nd-order Butterworth at 400 Hz
+    air = high_shelf(6000, -6.0)     # -6 dB above 6 kHz
+    stream = process(stream, Chain(rumble, air))
+
+IIR filters are evaluated in fixed-size chunks rather than one sample at a
+time: the part of each chunk's output that depends on its own input is a
+matrix product with the truncated impulse response, and only the filter
+state is carried from chunk to chunk. Chunks restart at every process()
+call, so streaming in blocks that are a multiple of CHUNK (like
+stream.BLOCK_SIZE) gives bit-identical output to filtering the whole buffer.
+
+The triangular mel filterbank at the end (band_filters) is shared by the
+spectrogram renderer and the encoder's spectral distance (profiles.py).
+"""
+
+import math
+
+import numpy as np
+
+from synth import SAMPLE_RATE
+
+CHUNK = 256
+
+
+class IIRFilter:
+    """Linear recursive filter with transfer function b(z) / a(z).
+
+    Coefficients are normalized so a[0] == 1. The filter is realized in
+    transposed direct form II as a state-space system (A, B, C, D).
+    """
+
+    def __init__(self, b, a, chunk: int = CHUNK):
+        b = np.asarray(b, dtype=np.float64)
+        a = np.asarray(a, dtype=np.float64)
+        order = max(len(a), len(b)) - 1
+        b = np.pad(b, (0, order + 1 - len(b))) / a[0]
+        a = np.pad(a, (0, order + 1 - len(a))) / a[0]
+        self.b, self.a = b, a
+        self.order = order
+        self.chunk = chunk
+
+        self._A = np.zeros((order, order))  # companion matrix: -a down the first column
+        if order:
+            self._A[:, 0] = -a[1:]
+            self._A[:-1, 1:] = np.eye(order - 1)
+        self._B = b[1:] - a[1:] * b[0]
+        self._D = b[0]
+        self._kernels = {}
+        self.reset()
+
+    def reset(self):
+        self.state = np.zeros(self.order)
+
+    def _kernel(self, length: int):
+        """Matrices for one chunk of `length` samples (cached per length)."""
+        if length not in self._kernels:
+            order = self.order
+            powers = np.empty((length + 1, order, order))  # A^0 .. A^length
+            powers[0] = np.eye(order)
+            for k in range(length):
+                powers[k + 1] = powers[k] @ self._A
+            # Impulse response h[0] = D, h[k] = C A^(k-1) B, with C = e0
+            h = np.empty(length)
+            h[0] = self._D
+            h[1:] = (powers[:length - 1] @ self._B)[:, 0]
+            idx = np.arange(length)
+            lag = idx[None, :] - idx[:, None]
+            toeplitz = np.where(lag >= 0, h[np.maximum(lag, 0)], 0.0)  # x row @ toeplitz = y
+            zero_input = powers[:length, 0, :]  # C A^n: response to the start state
+            to_state = powers[length - 1::-1] @ self._B  # A^(L-1-k) B: input k -> end state
+            self._kernels[length] = (toeplitz, zero_input, to_state, powers[length])
+        return self._kernels[length]
+
+    def _run(self, chunks: np.ndarray) -> np.ndarray:
+        toeplitz, zero_input, to_state, carry = self._kernel(chunks.shape[1])
+        y = chunks @ toeplitz
+        pushed = chunks @ to_state
+        states = np.empty((len(chunks), self.order))
+        state = self.state
+        for i in range(len(chunks)):
+            states[i] = state
+            state = carry @ state + pushed[i]
+        self.state = state
+        return y + states @ zero_input.T
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float64)
+        if self.order == 0:
+            return x * self._D
+        full = len(x) - len(x) % self.chunk
+        out = np.empty(len(x))
+        if full:
+            out[:full] = self._run(x[:full].reshape(-1, self.chunk)).ravel()
+        if full < len(x):
+            out[full:] = self._run(x[None, full:])[0]
+        return out
+
+    def response(self, freqs, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+        """Complex frequency response at the given frequencies in Hz."""
+        z = np.exp(-2j * np.pi * np.asarray(freqs, dtype=np.float64) / sample_rate)
+        powers = z[..., None] ** np.arange(self.order + 1)
+        return (powers @ self.b) / (powers @ self.a)
+
+
+class FIRFilter:
+    """Finite impulse response filter; the last len(taps) - 1 inputs carry over."""
+
+    def __init__(self, taps):
+        self.taps = np.asarray(taps, dtype=np.float64)
+        self.reset()
+
+    def reset(self):
+        self.history = np.zeros(len(self.taps) - 1)
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        ext = np.concatenate([self.history, np.asarray(x, dtype=np.float64)])
+        out = np.convolve(ext, self.taps, mode="valid")
+        self.history = ext[len(ext) - len(self.history):]
+        return out
+
+
+class Chain:
+    """Filters applied one after another."""
+
+    def __init__(self, *filters):
+        self.filters = filters
+
+    def reset(self):
+        for f in self.filters:
+            f.reset()
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        for f in self.filters:
+            x = f.process(x)
+        return x
+
+
+class Upsampler:
+    """Polyphase interpolator: `factor` output samples for every input sample.
+
+    The prototype is a Kaiser-windowed sinc at the input Nyquist with `taps`
+    taps per phase; the default (24, beta 8.6) stays flat to PASSBAND of the
+    input rate and rejects the images by about 85 dB. Each output sample is
+    one row of a (rows, taps) x (taps, factor) matrix product over the last
+    `taps` inputs, evaluated in fixed chunks like IIRFilter, so streaming in
+    blocks that are a multiple of CHUNK is bit-identical to one call. The
+    output lags the input by `delay` output samples (taps / 2 inputs).
+    """
+
+    PASSBAND = 0.375
+
+    def __init__(self, factor: int, taps: int = 24, beta: float = 8.6, chunk: int = CHUNK):
+        self.factor = factor
+        self.taps = taps
+        self.chunk = chunk
+        self.delay = taps * factor // 2
+        k = np.arange(taps * factor)
+        proto = np.sinc((k - self.delay) / factor) * np.kaiser(taps * factor + 1, beta)[:-1]
+        proto *= factor / proto.sum()
+        # Row r weighs input x[q - (taps - 1 - r)] for the `factor` outputs of input q
+        self._phases = proto.reshape(taps, factor)[::-1].copy()
+        self.reset()
+
+    def reset(self):
+        self.history = np.zeros(self.taps - 1)
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        ext = np.concatenate([self.history, np.asarray(x, dtype=np.float64)])
+        windows = np.lib.stride_tricks.sliding_window_view(ext, self.taps)
+        out = np.empty((len(windows), self.factor))
+        for lo in range(0, len(windows), self.chunk):
+            out[lo:lo + self.chunk] = windows[lo:lo + self.chunk] @ self._phases
+        self.history = ext[len(ext) - len(self.history):]
+        return out.ravel()
+
+
+# --- Designs ---
+
+def one_pole_lowpass(cutoff: float, sample_rate: int = SAMPLE_RATE) -> IIRFilter:
+    """6 dB/octave low-pass: y[n] = y[n-1] + g * (x[n] - y[n-1])."""
+    g = 1.0 - math.exp(-2 * math.pi * cutoff / sample_rate)
+    return IIRFilter([g], [1.0, g - 1.0])
+
+
+def one_pole_highpass(cutoff: float, sample_rate: int = SAMPLE_RATE) -> IIRFilter:
+    """6 dB/octave high-pass: the input minus its one-pole low-pass."""
+    p = math.exp(-2 * math.pi * cutoff / sample_rate)
+    return IIRFilter([(1 + p) / 2, -(1 + p) / 2], [1.0, -p])
+
+
+def _biquad(b0, b1, b2, a0, a1, a2) -> IIRFilter:
+    return IIRFilter([b0, b1, b2], [a0, a1, a2])
+
+
+def _omega(freq: float, q: float, sample_rate: int):
+    w = 2 * math.pi * freq / sample_rate
+    return math.cos(w), math.sin(w) / (2 * q)
+
+
+def lowpass(cutoff: float, q: float = 1 / math.sqrt(2), sample_rate: int = SAMPLE_RATE) -> IIRFilter:
+    """12 dB/octave low-pass biquad (Butterworth at the default q)."""
+    cos_w, alpha = _omega(cutoff, q, sample_rate)
+    return _biquad((1 - cos_w) / 2, 1 - cos_w, (1 - cos_w) / 2, 1 + alpha, -2 * cos_w, 1 - alpha)
+
+
+def highpass(cutoff: float, q: float = 1 / math.sqrt(2), sample_rate: int = SAMPLE_RATE) -> IIRFilter:
+    """12 dB/octave high-pass biquad (Butterworth at the default q)."""
+    cos_w, alpha = _omega(cutoff, q, sample_rate)
+    return _biquad((1 + cos_w) / 2, -(1 + cos_w), (1 + cos_w) / 2, 1 + alpha, -2 * cos_w, 1 - alpha)
+
+
+def bandpass(center: float, q: float = 1.0, sample_rate: int = SAMPLE_RATE) -> IIRFilter:
+    """Band-pass biquad with 0 dB gain at the center frequency."""
+    cos_w, alpha = _omega(center, q, sample_rate)
+    return _biquad(alpha, 0.0, -alpha, 1 + alpha, -2 * cos_w, 1 - alpha)
+
+
+def _shelf(freq: float, gain_db: float, slope: float, sample_rate: int, high: bool) -> IIRFilter:
+    amp = 10 ** (gain_db / 40)
+    w = 2 * math.pi * freq / sample_rate
+    cos_w = math.cos(w)
+    alpha = math.sin(w) / 2 * math.sqrt((amp + 1 / amp) * (1 / slope - 1) + 2)
+    root = 2 * math.sqrt(amp) * alpha
+    sign = -1 if high else 1
+    return _biquad(
+        amp * ((amp + 1) - sign * (amp - 1) * cos_w + root),
+        sign * 2 * amp * ((amp - 1) - sign * (amp + 1) * cos_w),
+        amp * ((amp + 1) - sign * (amp - 1) * cos_w - root),
+        (amp + 1) + sign * (amp - 1) * cos_w + root,
+        -sign * 2 * ((amp - 1) + sign * (amp + 1) * cos_w),
+        (amp + 1) + sign * (amp - 1) * cos_w - root,
+    )
+
+
+def low_shelf(freq: float, gain_db: float, slope: float = 1.0, sample_rate: int = SAMPLE_RATE) -> IIRFilter:
+    """Boost or cut everything below freq by gain_db."""
+    return _shelf(freq, gain_db, slope, sample_rate, high=False)
+
+
+def high_shelf(freq: float, gain_db: float, slope: float = 1.0, sample_rate: int = SAMPLE_RATE) -> IIRFilter:
+    """Boost or cut everything above freq by gain_db."""
+    return _shelf(freq, gain_db, slope, sample_rate, high=True)
+
+
+def fir_lowpass(cutoff: float, numtaps: int = 101, sample_rate: int = SAMPLE_RATE) -> FIRFilter:
+    """Linear-phase windowed-sinc (Hamming) low-pass with unity DC gain."""
+    n = np.arange(numtaps) - (numtaps - 1) / 2
+    taps = np.sinc(2 * cutoff / sample_rate * n) * np.hamming(numtaps)
+    return FIRFilter(taps / taps.sum())
+
+
+# --- Filter banks (spectral analysis) ---
+
+def hz_to_mel(f):
+    return 2595.0 * np.log10(1.0 + np.asarray(f) / 700.0)
+
+
+def mel_to_hz(m):
+    return 700.0 * (10.0 ** (np.asarray(m) / 2595.0) - 1.0)
+
+
+def band_filters(bin_freqs, centers):
+    """Triangular filterbank (bands x bins) with peaks at centers[1:-1]."""
+    lower, center, upper = centers[:-2, None], centers[1:-1, None], centers[2:, None]
+    rising = (bin_freqs - lower) / np.maximum(center - lower, 1e-9)
+    falling = (upper - bin_freqs) / np.maximum(upper - center, 1e-9)
+    return np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
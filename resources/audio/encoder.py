@@ -0,0 +1,119 @@
+"""Stream rendered PCM straight into ffmpeg.
+
+EncodeSink starts one ffmpeg process that reads raw PCM from stdin and
+writes every requested target format, so a sound is rendered once and no
+intermediate WAV touches the disk. Outputs are written to temporary files
+and renamed into place only after ffmpeg exits successfully.
+"""
+
+import os
+import subprocess
+import tempfile
+
+import spans
+from wavio import encode_pcm
+
+# Target name -> (file extension, ffmpeg muxer, codec arguments)
+TARGETS = {
+    "mp3": ("mp3", "mp3", ["-c:a", "libmp3lame", "-q:a", "2"]),  # VBR ~190 kbps
+    "opus": ("opus", "ogg", ["-c:a", "libopus", "-b:a", "64k"]),
+    "webm": ("webm", "webm", ["-c:a", "libopus", "-b:a", "64k"]),
+}
+
+# wavio sample format -> ffmpeg raw PCM demuxer
+RAW_FORMATS = {"pcm16": "s16le", "pcm24": "s24le", "float32": "f32le"}
+
+
+class EncodeError(RuntimeError):
+    """ffmpeg is missing or exited with an error."""
+
+
+def output_paths(directory: str, name: str, targets) -> dict[str, str]:
+    """Final output path for each target, e.g. {"mp3": ".../bubble.mp3"}."""
+    return {target: os.path.join(directory, f"{name}.{TARGETS[target][0]}") for target in targets}
+
+
+class EncodeSink:
+    """Write float sample blocks to one or more encoded files via ffmpeg's stdin.
+
+    `outputs` maps target names to paths; targets are looked up in TARGETS
+    unless another table of (extension, muxer, codec arguments) is given.
+    """
+
+    def __init__(self, outputs: dict[str, str], sample_rate: int, channels: int = 1,
+                 sample_format: str = "pcm16", targets: dict | None = None):
+        self.outputs = outputs
+        self.sample_format = sample_format
+        self._partials = {target: path + ".partial" for target, path in outputs.items()}
+        cmd = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", RAW_FORMATS[sample_format], "-ar", str(sample_rate), "-ac", str(channels),
+            "-i", "pipe:0",
+        ]
+        for target, partial in self._partials.items():
+            _, muxer, codec_args = (targets or TARGETS)[target]
+            cmd += [*codec_args, "-f", muxer, partial]
+        # stderr goes to a file so a chatty ffmpeg can never block our writes
+        self._stderr = tempfile.TemporaryFile()
+        try:
+            self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                          stderr=self._stderr)
+        except FileNotFoundError:
+            self._stderr.close()
+            raise EncodeError("ffmpeg not found on PATH") from None
+
+    def write(self, samples):
+        with spans.span("ffmpeg"):
+            data = encode_pcm(samples, self.sample_format)
+            try:
+                self._proc.stdin.write(data)
+            except BrokenPipeError:
+                self._fail()
+            spans.add(bytes=len(data))
+
+    def close(self):
+        """Finish encoding and move the outputs into place."""
+        if self._proc.stdin.closed:
+            return
+        with spans.span("ffmpeg"):
+            try:
+                self._proc.stdin.close()
+            except BrokenPipeError:
+                pass
+            returncode = self._proc.wait()
+        if returncode != 0:
+            self._fail()
+        for target, partial in self._partials.items():
+            os.replace(partial, self.outputs[target])
+        self._stderr.close()
+
+    def abort(self):
+        """Stop ffmpeg and remove any partial output."""
+        if self._proc.poll() is None:
+            self._proc.kill()
+        try:
+            self._proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._proc.wait()
+        for partial in self._partials.values():
+            if os.path.exists(partial):
+                os.remove(partial)
+        self._stderr.close()
+
+    def _fail(self):
+        self._proc.wait()
+        self._stderr.seek(0)
+        message = self._stderr.read().decode(errors="replace").strip()
+        self.abort()
+        names = ", ".join(os.path.basename(path) for path in self.outputs.values())
+        raise EncodeError(f"ffmpeg failed ({self._proc.returncode}) encoding {names}: {message}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        elif not self._stderr.closed:
+            self.abort()
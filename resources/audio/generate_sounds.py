@@ -1,432 +1,319 @@
 #!/usr/bin/env python3
 """Generate synthesized placeholder audio assets for Cocopilot Island Mode."""
 
-import math
+import argparse
 import os
-import random
-import struct
 import subprocess
-import wave
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+import ambient
+import assets
+import build_cache
+import graph
+import profiles
+import spans
+import sprite
+from encoder import TARGETS, EncodeError, EncodeSink, output_paths
+from stream import blocks, collect
+from synth import SAMPLE_RATE
+from wavio import WavWriter, write_wav_file
 
-SAMPLE_RATE = 44100
 OUTPUT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
-def write_wav(filename: str, samples: list[float], sample_rate: int = SAMPLE_RATE):
-    """Write mono float samples [-1,1] to a WAV file."""
+def write_wav(filename: str, samples, sample_rate: int = SAMPLE_RATE,
+              sample_format: str = "pcm16", dither: bool = False):
+    """Write mono float samples [-1,1] to a WAV file.
+
+    sample_format is "pcm16" (default), "pcm24" or "float32"; dither adds
+    TPDF dither before quantizing to integer PCM.
+    """
+    path = os.path.join(OUTPUT_DIR, filename)
+    return write_wav_file(path, samples, sample_rate, sample_format, dither)
+
+
+def write_wav_stream(filename: str, stream, sample_rate: int = SAMPLE_RATE,
+                     sample_format: str = "pcm16", dither: bool = False):
+    """Write a block stream (see stream.py) to a WAV file as it renders."""
     path = os.path.join(OUTPUT_DIR, filename)
-    with wave.open(path, "w") as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(sample_rate)
-        for s in samples:
-            s = max(-1.0, min(1.0, s))
-            wf.writeframes(struct.pack("<h", int(s * 32767)))
+    with WavWriter(path, sample_rate, sample_format=sample_format, dither=dither) as wf:
+        for block in blocks(stream):
+            wf.write(block)
     return path
 
 
 def convert_to_mp3(wav_path: str):
-    """Convert WAV to MP3 using ffmpeg, then remove WAV."""
+    """Convert WAV to MP3 using ffmpeg, then remove WAV.
+
+    The build itself pipes PCM straight to ffmpeg (see encode_sound); this is
+    for converting WAV files written with write_wav.
+    """
     mp3_path = wav_path.replace(".wav", ".mp3")
-    subprocess.run(
-        ["ffmpeg", "-y", "-i", wav_path, "-b:a", "128k", "-q:a", "2", mp3_path],
-        capture_output=True,
-    )
-    os.remove(wav_path)
+    partial = mp3_path + ".partial"
+    _, muxer, codec_args = TARGETS["mp3"]
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-y", "-i", wav_path, *codec_args, "-f", muxer, partial],
+            capture_output=True,
+        )
+        if result.returncode != 0:
+            message = result.stderr.decode(errors="replace").strip().splitlines()[-1:]
+            raise EncodeError(f"ffmpeg failed ({result.returncode}) on {wav_path}: {' '.join(message)}")
+        os.replace(partial, mp3_path)
+    except FileNotFoundError:
+        raise EncodeError("ffmpeg not found on PATH") from None
+    finally:
+        os.remove(wav_path)
+        if os.path.exists(partial):
+            os.remove(partial)
     return mp3_path
 
 
-def envelope(t: float, attack: float, decay: float, duration: float) -> float:
-    """Simple attack-decay envelope."""
-    if t < attack:
-        return t / attack
-    elif t > duration - decay:
-        return max(0, (duration - t) / decay)
-    return 1.0
-
-
-def noise() -> float:
-    return random.uniform(-1, 1)
-
-
-# --- Sound generators ---
-
-def gen_ambient_ocean():
-    """Underwater ambient loop: deep rumble, bubbles, shimmer, ~16s."""
-    duration = 16.0
-    n = int(SAMPLE_RATE * duration)
-    samples = [0.0] * n
-    random.seed(99)
-
-    # Deep ocean rumble: low-frequency filtered noise
-    for i in range(n):
-        t = i / SAMPLE_RATE
-        rumble_env = 0.2 + 0.1 * math.sin(2 * math.pi * t / 8.0)
-        samples[i] += noise() * rumble_env * 0.1
-
-    # Low-pass filter (running average with wide window)
-    filtered = [0.0] * n
-    window = 40
-    running = 0.0
-    for i in range(n):
-        running += samples[i]
-        if i >= window:
-            running -= samples[i - window]
-        filtered[i] = running / min(i + 1, window)
-    samples = filtered
-
-    # Bubble clusters: short rising tones at random intervals
-    bubble_times = sorted([random.uniform(0.5, 15) for _ in range(20)])
-    for bt in bubble_times:
-        bub_dur = random.uniform(0.03, 0.1)
-        freq_start = random.uniform(200, 500)
-        freq_end = freq_start * random.uniform(1.3, 1.8)
-        vol = random.uniform(0.03, 0.08)
-        si = int(bt * SAMPLE_RATE)
-        ei = min(si + int(bub_dur * SAMPLE_RATE), n)
-        for i in range(si, ei):
-            lt = (i - si) / SAMPLE_RATE
-            frac = lt / bub_dur
-            freq = freq_start + (freq_end - freq_start) * frac
-            env = math.sin(math.pi * frac)
-            samples[i] += math.sin(2 * math.pi * freq * lt) * env * vol
-
-    # Gentle water movement: low-frequency swells
-    for i in range(n):
-        t = i / SAMPLE_RATE
-        # Slow deep swells instead of high-pitched shimmer
-        swell = math.sin(2 * math.pi * 80 * t) * 0.015
-        swell *= 0.5 + 0.5 * math.sin(2 * math.pi * t / 5.0)
-        samples[i] += swell
-
-    # Fade in/out for looping
-    fade = int(SAMPLE_RATE * 1.5)
-    for i in range(fade):
-        f = i / fade
-        samples[i] *= f
-        samples[n - 1 - i] *= f
-
-    return samples, duration
-
-
-def gen_bubble():
-    """Single rising bubble pop, ~0.2s."""
-    duration = 0.2
-    n = int(SAMPLE_RATE * duration)
-    samples = [0.0] * n
-
-    for i in range(n):
-        t = i / SAMPLE_RATE
-        frac = t / duration
-        freq = 400 + 800 * frac  # rising pitch
-        env = math.sin(math.pi * frac) ** 0.5
-        val = math.sin(2 * math.pi * freq * t) * env * 0.4
-        # Add pop at the end
-        if frac > 0.8:
-            pop_frac = (frac - 0.8) / 0.2
-            val += noise() * (1 - pop_frac) * 0.3
-        samples[i] = val
-
-    return samples, duration
-
-
-def gen_dolphin_call():
-    """Dolphin whistle/chirp: frequency sweep with harmonics, ~0.8s."""
-    duration = 0.8
-    n = int(SAMPLE_RATE * duration)
-    samples = [0.0] * n
-
-    # Main whistle: ascending then descending frequency sweep
-    for i in range(n):
-        t = i / SAMPLE_RATE
-        frac = t / duration
-        # Bell-curve frequency sweep
-        freq = 2000 + 3000 * math.sin(math.pi * frac)
-        env = math.sin(math.pi * frac) ** 0.7 * 0.35
-        val = math.sin(2 * math.pi * freq * t) * env
-        # Add vibrato
-        val += math.sin(2 * math.pi * (freq * 1.01) * t) * env * 0.2
-        samples[i] = val
-
-    return samples, duration
-
-
-def gen_ambient_island():
-    """Tropical ambient loop: layered noise (waves) + bird chirps, ~30s."""
-    duration = 30.0
-    n = int(SAMPLE_RATE * duration)
-    samples = [0.0] * n
-    random.seed(42)
-
-    # Ocean waves: slow amplitude-modulated filtered noise
-    for i in range(n):
-        t = i / SAMPLE_RATE
-        # Slow wave envelope (~6 second cycle)
-        wave_env = 0.3 + 0.2 * math.sin(2 * math.pi * t / 6.0)
-        # Simple low-pass approximation: average nearby noise
-        raw = noise() * wave_env * 0.15
-        samples[i] += raw
-
-    # Simple low-pass filter (running average)
-    filtered = [0.0] * n
-    window = 20
-    running = 0.0
-    for i in range(n):
-        running += samples[i]
-        if i >= window:
-            running -= samples[i - window]
-        filtered[i] = running / min(i + 1, window)
-    samples = filtered
-
-    # Bird chirps: short sine sweeps at random intervals
-    chirp_times = sorted([random.uniform(1, 29) for _ in range(25)])
-    for ct in chirp_times:
-        chirp_dur = random.uniform(0.05, 0.15)
-        freq_start = random.uniform(2000, 4000)
-        freq_end = random.uniform(3000, 6000)
-        vol = random.uniform(0.05, 0.12)
-        start_i = int(ct * SAMPLE_RATE)
-        end_i = min(start_i + int(chirp_dur * SAMPLE_RATE), n)
-        for i in range(start_i, end_i):
-            lt = (i - start_i) / SAMPLE_RATE
-            frac = lt / chirp_dur
-            freq = freq_start + (freq_end - freq_start) * frac
-            env = math.sin(math.pi * frac)  # bell envelope
-            samples[i] += math.sin(2 * math.pi * freq * lt) * env * vol
-
-    # Gentle breeze: very low freq modulated noise
-    for i in range(n):
-        t = i / SAMPLE_RATE
-        breeze = noise() * 0.03 * (0.5 + 0.5 * math.sin(2 * math.pi * t / 10))
-        samples[i] += breeze
-
-    # Fade in/out for looping
-    fade = int(SAMPLE_RATE * 2)
-    for i in range(fade):
-        f = i / fade
-        samples[i] *= f
-        samples[n - 1 - i] *= f
-
-    return samples, duration
-
-
-def gen_monkey_call():
-    """Excited monkey vocalization: frequency-modulated bursts, ~1.5s."""
-    duration = 1.5
-    n = int(SAMPLE_RATE * duration)
-    samples = [0.0] * n
-
-    # Series of 4-5 short "oo-oo-ah" calls
-    calls = [(0.0, 0.2, 800, 600), (0.25, 0.2, 900, 700),
-             (0.55, 0.15, 1000, 800), (0.75, 0.15, 1100, 850),
-             (1.0, 0.35, 1200, 500)]
-
-    for start, dur, f1, f2 in calls:
-        si = int(start * SAMPLE_RATE)
-        ei = min(si + int(dur * SAMPLE_RATE), n)
-        for i in range(si, ei):
-            lt = (i - si) / SAMPLE_RATE
-            frac = lt / dur
-            freq = f1 + (f2 - f1) * frac
-            # Add vibrato
-            freq += 30 * math.sin(2 * math.pi * 25 * lt)
-            env = math.sin(math.pi * frac) ** 0.5
-            val = math.sin(2 * math.pi * freq * lt) * env * 0.4
-            # Add harmonics for richness
-            val += math.sin(2 * math.pi * freq * 2 * lt) * env * 0.15
-            val += math.sin(2 * math.pi * freq * 3 * lt) * env * 0.08
-            samples[i] += val
-
-    return samples, duration
-
-
-def gen_chime():
-    """Soft notification chime: bell-like tone with harmonics, ~1s."""
-    duration = 1.2
-    n = int(SAMPLE_RATE * duration)
-    samples = [0.0] * n
-
-    # Bell: fundamental + inharmonic partials with different decay rates
-    partials = [
-        (880, 0.4, 2.0),    # fundamental
-        (1760, 0.2, 3.0),   # 2nd harmonic
-        (2640, 0.1, 4.0),   # 3rd harmonic
-        (3520, 0.05, 5.0),  # 4th
-        (1320, 0.15, 2.5),  # inharmonic
-    ]
+# --- Sounds (declared in sounds.json, compiled by graph.py) ---
 
-    for freq, amp, decay in partials:
-        for i in range(n):
-            t = i / SAMPLE_RATE
-            env = math.exp(-decay * t)
-            samples[i] += math.sin(2 * math.pi * freq * t) * env * amp
-
-    return samples, duration
-
-
-def gen_typewriter():
-    """Typewriter key clicks: short noise bursts, ~1.5s."""
-    duration = 1.5
-    n = int(SAMPLE_RATE * duration)
-    samples = [0.0] * n
-    random.seed(123)
-
-    # Generate 8-10 key clicks at varying intervals
-    click_times = [0.0]
-    t = 0.0
-    for _ in range(9):
-        t += random.uniform(0.1, 0.18)
-        if t < duration - 0.05:
-            click_times.append(t)
-
-    for ct in click_times:
-        click_dur = random.uniform(0.008, 0.015)
-        si = int(ct * SAMPLE_RATE)
-        ei = min(si + int(click_dur * SAMPLE_RATE), n)
-        vol = random.uniform(0.3, 0.5)
-        for i in range(si, ei):
-            lt = (i - si) / SAMPLE_RATE
-            frac = lt / click_dur
-            env = (1 - frac) ** 2  # fast decay
-            samples[i] += noise() * env * vol
-            # Add a tiny resonance
-            samples[i] += math.sin(2 * math.pi * 3500 * lt) * env * vol * 0.3
-
-    return samples, duration
-
-
-def gen_coconut_crack():
-    """Coconut impact: sharp transient + resonant body, ~0.8s."""
-    duration = 0.8
-    n = int(SAMPLE_RATE * duration)
-    samples = [0.0] * n
-    random.seed(77)
-
-    for i in range(n):
-        t = i / SAMPLE_RATE
-        # Initial sharp crack (noise burst)
-        if t < 0.01:
-            crack = noise() * (1 - t / 0.01) * 0.7
-        else:
-            crack = 0
-        # Hollow resonance
-        res_env = math.exp(-8 * t)
-        resonance = (
-            math.sin(2 * math.pi * 350 * t) * 0.3 +
-            math.sin(2 * math.pi * 700 * t) * 0.15 +
-            math.sin(2 * math.pi * 1100 * t) * 0.08
-        ) * res_env
-        # Secondary smaller crack
-        if 0.05 < t < 0.065:
-            crack += noise() * 0.2 * (1 - (t - 0.05) / 0.015)
-
-        samples[i] = crack + resonance
-
-    return samples, duration
-
-
-def gen_error():
-    """Error sound: two descending tones, ~0.6s."""
-    duration = 0.6
-    n = int(SAMPLE_RATE * duration)
-    samples = [0.0] * n
-
-    # Two descending buzzy tones
-    tones = [(0.0, 0.25, 520, 480), (0.3, 0.25, 480, 380)]
-
-    for start, dur, f1, f2 in tones:
-        si = int(start * SAMPLE_RATE)
-        ei = min(si + int(dur * SAMPLE_RATE), n)
-        for i in range(si, ei):
-            lt = (i - si) / SAMPLE_RATE
-            frac = lt / dur
-            freq = f1 + (f2 - f1) * frac
-            env = envelope(lt, 0.01, 0.05, dur)
-            # Square-ish wave for urgency
-            val = math.sin(2 * math.pi * freq * lt)
-            val = max(-1, min(1, val * 3)) * 0.3  # soft clip
-            samples[i] += val * env
-
-    return samples, duration
-
-
-def gen_success():
-    """Success sound: ascending tone pair, ~0.8s."""
-    duration = 0.8
-    n = int(SAMPLE_RATE * duration)
-    samples = [0.0] * n
-
-    # Two ascending chime tones (major third interval)
-    tones = [(0.0, 0.5, 523.25), (0.2, 0.6, 659.25)]  # C5, E5
-
-    for start, dur, freq in tones:
-        si = int(start * SAMPLE_RATE)
-        ei = min(si + int(dur * SAMPLE_RATE), n)
-        for i in range(si, ei):
-            lt = (i - si) / SAMPLE_RATE
-            env = math.exp(-3.0 * lt) * envelope(lt, 0.005, 0.01, dur)
-            val = math.sin(2 * math.pi * freq * lt) * env * 0.35
-            val += math.sin(2 * math.pi * freq * 2 * lt) * env * 0.1
-            samples[i] += val
-
-    return samples, duration
-
-
-def gen_goodbye():
-    """Goodbye melody: gentle descending arpeggio, ~2.5s."""
-    duration = 2.5
-    n = int(SAMPLE_RATE * duration)
-    samples = [0.0] * n
-
-    # Descending notes: E5 -> C5 -> A4 -> F4 (gentle resolution)
-    notes = [
-        (0.0, 0.8, 659.25),   # E5
-        (0.5, 0.8, 523.25),   # C5
-        (1.0, 0.8, 440.00),   # A4
-        (1.5, 1.0, 349.23),   # F4
-    ]
+COMPILER = graph.Compiler()
+
+
+def render_sound(name: str, duration: float | None = None):
+    """Render a sound from its graph. Returns (samples, duration).
+
+    Ambient loops are recombined from their segment pool (see ambient.py).
+    """
+    if ambient.segmented(COMPILER.sounds[name]):
+        stream, duration = ambient.bed(COMPILER, name, duration)
+        return collect(stream), duration
+    return COMPILER.render(name, duration)
+
+
+SOUNDS = {name: partial(render_sound, name) for name in COMPILER.sounds}
+
+# Loops that can be rendered block by block straight into the encoder
+STREAMS = {name: partial(ambient.stream, COMPILER, name) for name, sound in COMPILER.sounds.items() if sound.get("loop")}
+
+# Everything else is packed into the audio sprite (see sprite.py)
+ONE_SHOTS = [name for name in SOUNDS if name not in STREAMS]
 
-    for start, dur, freq in notes:
-        si = int(start * SAMPLE_RATE)
-        ei = min(si + int(dur * SAMPLE_RATE), n)
-        for i in range(si, ei):
-            lt = (i - si) / SAMPLE_RATE
-            env = math.exp(-2.0 * lt) * envelope(lt, 0.02, 0.1, dur)
-            val = math.sin(2 * math.pi * freq * lt) * env * 0.3
-            # Soft harmonics
-            val += math.sin(2 * math.pi * freq * 2 * lt) * env * 0.08
-            val += math.sin(2 * math.pi * freq * 3 * lt) * env * 0.03
-            samples[i] += val
 
-    # Fade out
-    fade = int(SAMPLE_RATE * 0.5)
-    for i in range(fade):
-        samples[n - 1 - i] *= i / fade
+def max_distance(name: str) -> float:
+    """Spectral-distance threshold for a sound's encoding (dB, see profiles.py).
 
-    return samples, duration
+    The sprite has to satisfy the strictest of its sounds.
+    """
+    if name == sprite.SPRITE_NAME:
+        return min(max_distance(one_shot) for one_shot in ONE_SHOTS)
+    return COMPILER.sounds[name].get("max_distance", profiles.DEFAULT_MAX_DISTANCE)
+
+
+def encoder_settings(formats=("mp3",), optimize: bool = True) -> list:
+    """What decides the encoded bytes: the fixed targets, or the optimizer and its profiles."""
+    if not optimize:
+        return [{fmt: TARGETS[fmt] for fmt in formats}]
+    with open(profiles.__file__, encoding="utf-8") as f:
+        source = f.read()
+    return [{fmt: profiles.PROFILES[fmt] for fmt in formats}, source]
+
+
+def cache_key(name: str, ambient_duration: float | None = None, formats=("mp3",), optimize: bool = True) -> str:
+    """Content hash of everything that determines a sound's outputs (see build_cache)."""
+    params = {"duration": ambient_duration} if name in STREAMS and ambient_duration else {}
+    return build_cache.content_key(
+        graph.dependencies(COMPILER.spec, name), build_cache.library_sources(),
+        params, SAMPLE_RATE, "pcm16", encoder_settings(formats, optimize),
+    )
+
+
+def sprite_key(formats=("mp3",), optimize: bool = True) -> str:
+    """Content hash of the sprite: its sounds' keys plus the packing code."""
+    with open(sprite.__file__, encoding="utf-8") as f:
+        source = f.read()
+    return build_cache.content_key([cache_key(name, None, formats, optimize) for name in ONE_SHOTS], source)
+
+
+def _encode(name: str, render, formats, optimize: bool):
+    """Encode the blocks of render() into every format.
+
+    With optimize, each format gets the smallest profile that passes the
+    sound's threshold (see profiles.py). Returns (paths, {format: result}).
+    """
+    if optimize:
+        chosen = {}
+        for fmt in formats:
+            with spans.span("optimize", format=fmt):
+                chosen[fmt] = profiles.optimize(name, render, fmt, OUTPUT_DIR, SAMPLE_RATE, max_distance(name))
+        return [result["path"] for result in chosen.values()], chosen
+    outputs = output_paths(OUTPUT_DIR, name, formats)
+    with spans.span("encode"), EncodeSink(outputs, SAMPLE_RATE) as sink:
+        for chunk in render():
+            sink.write(chunk)
+    return list(outputs.values()), {}
+
+
+def encode_sprite(formats=("mp3",), optimize: bool = True):
+    """Render every one-shot into one sprite file plus its offsets manifest.
+
+    Returns (output paths, duration, seconds, encodings) like encode_sound.
+    """
+    start = time.perf_counter()
+    with spans.span("sound", sound=sprite.SPRITE_NAME):
+        rendered = {}
+        for name in ONE_SHOTS:
+            with spans.span("render", sound=name):
+                rendered[name] = SOUNDS[name]()[0]
+        with spans.span("pack"):
+            samples, slots = sprite.pack(rendered)
+        paths, encodings = _encode(sprite.SPRITE_NAME, lambda: [samples], formats, optimize)
+        paths.append(sprite.write_manifest(sprite.manifest(slots, paths), OUTPUT_DIR))
+    return paths, len(samples) / SAMPLE_RATE, time.perf_counter() - start, encodings
+
+
+def encode_sound(name: str, ambient_duration: float | None = None, formats=("mp3",), optimize: bool = True):
+    """Render one sound and pipe it through ffmpeg into every target format.
+
+    Streamable sounds are encoded block by block while they render (and
+    rendered again block by block to score the candidates when optimizing).
+    Returns (output paths, duration, seconds, encodings).
+    """
+    start = time.perf_counter()
+    with spans.span("sound", sound=name):
+        if name in STREAMS:
+            duration = ambient_duration or COMPILER.sounds[name]["duration"]
+            render = lambda: blocks(STREAMS[name](ambient_duration)[0])
+        else:
+            with spans.span("render"):
+                samples, duration = SOUNDS[name]()
+            render = lambda: [samples]
+        paths, encodings = _encode(name, render, formats, optimize)
+    return paths, duration, time.perf_counter() - start, encodings
+
+
+def write_asset_manifest() -> str:
+    """Describe the shipped sprite and loops for the renderer's loader (see assets.py)."""
+    loops = {name: os.path.join(OUTPUT_DIR, f"{name}.mp3") for name in STREAMS}
+    sprite_path = os.path.join(OUTPUT_DIR, f"{sprite.SPRITE_NAME}.mp3")
+    return assets.write_manifest(assets.manifest(sprite_path, assets.read_slots(OUTPUT_DIR), loops), OUTPUT_DIR)
+
+
+def build(names: list[str], jobs: int = 1, ambient_duration: float | None = None,
+          formats=("mp3",), optimize: bool = True) -> dict:
+    """Render and encode sounds, returning {name: (paths, duration, seconds, encodings)}.
+
+    With jobs > 1, sounds are built on a process pool; each worker renders
+    into its own ffmpeg process, so synthesis and encoding overlap. Every
+    sound seeds its own randomness, so the files are identical to a
+    serial build.
+    """
+    results = {}
+    if jobs <= 1:
+        for name in names:
+            print(f"Generating {name}...")
+            results[name] = encode_sound(name, ambient_duration, formats, optimize)
+            print(f"  -> {', '.join(results[name][0])} ({results[name][1]:.1f}s)")
+        return results
+
+    print(f"Generating {len(names)} sounds with {jobs} jobs...")
+    # Workers record their own spans and send them back with each result
+    init = {"initializer": spans.enable, "initargs": (spans.memory(),)} if spans.enabled() else {}
+    with ProcessPoolExecutor(jobs, **init) as pool:
+        futures = {
+            pool.submit(spans.call, encode_sound, name, ambient_duration, formats, optimize): name
+            for name in names
+        }
+        for future in as_completed(futures):
+            result, recorded = future.result()
+            spans.merge(recorded)
+            results[futures[future]] = result
+            print(f"  -> {', '.join(result[0])} ({result[1]:.1f}s)")
+    return {name: results[name] for name in names}
+
+
+def print_summary(results: dict, wall: float):
+    print(f"\n{'sound':<16}{'length':>8}{'time':>10}")
+    for name, (_, duration, seconds, _) in results.items():
+        print(f"{name:<16}{duration:>7.1f}s{seconds:>9.2f}s")
+    print(f"{'wall time':<16}{'':>8}{wall:>9.2f}s")
 
 
 def main():
-    sounds = {
-        "ambient-island": gen_ambient_island,
-        "ambient-ocean": gen_ambient_ocean,
-        "monkey-call": gen_monkey_call,
-        "dolphin-call": gen_dolphin_call,
-        "bubble": gen_bubble,
-        "chime": gen_chime,
-        "typewriter": gen_typewriter,
-        "coconut-crack": gen_coconut_crack,
-        "error": gen_error,
-        "success": gen_success,
-        "goodbye": gen_goodbye,
-    }
-
-    for name, generator in sounds.items():
-        print(f"Generating {name}...")
-        samples, duration = generator()
-        wav_path = write_wav(f"{name}.wav", samples)
-        mp3_path = convert_to_mp3(wav_path)
-        print(f"  -> {mp3_path} ({duration:.1f}s)")
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--ambient-duration", type=float, metavar="SECONDS",
+        help="length of the ambient loops (streamed in blocks, constant memory)",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1, metavar="N",
+        help="render and encode up to N sounds in parallel (default: 1)",
+    )
+    parser.add_argument(
+        "--formats", nargs="+", choices=list(TARGETS), default=["mp3"], metavar="FORMAT",
+        help=f"output formats, encoded from a single render ({', '.join(TARGETS)}; default: mp3)",
+    )
+    parser.add_argument(
+        "--no-optimize", dest="optimize", action="store_false",
+        help="encode with the fixed default settings instead of searching for the smallest passing profile",
+    )
+    parser.add_argument("--force", action="store_true", help="rebuild every sound, ignoring the cache")
+    parser.add_argument(
+        "--only", nargs="+", choices=list(SOUNDS), metavar="NAME",
+        help="rebuild only these sounds (always, regardless of the cache)",
+    )
+    parser.add_argument(
+        "--trace", metavar="PATH",
+        help="profile every sound and stage; write a Chrome trace (JSON) to PATH and print a summary",
+    )
+    parser.add_argument(
+        "--trace-memory", action="store_true",
+        help="with --trace, also record allocations per span (tracemalloc; slows the build down)",
+    )
+    args = parser.parse_args()
+    if args.trace:
+        spans.enable(memory=args.trace_memory)
+
+    start = time.perf_counter()
+    manifest = build_cache.load_manifest(OUTPUT_DIR)
+    entries = manifest.setdefault("sounds", {})
+    keys = {name: cache_key(name, args.ambient_duration, args.formats, args.optimize) for name in args.only or SOUNDS}
+    stale = [
+        name for name, key in keys.items()
+        if args.force or args.only or not build_cache.is_fresh(entries.get(name), key, OUTPUT_DIR)
+    ]
+    for name in keys:
+        if name not in stale:
+            print(f"Up to date: {name}")
+    pack_key = sprite_key(args.formats, args.optimize)
+    repack = args.force or any(name in ONE_SHOTS for name in stale) or not build_cache.is_fresh(
+        entries.get(sprite.SPRITE_NAME), pack_key, OUTPUT_DIR)
+    describe = "mp3" in args.formats
+    if not stale and not repack:
+        if describe and not os.path.exists(os.path.join(OUTPUT_DIR, assets.MANIFEST_NAME)):
+            print(f"Asset manifest: {write_asset_manifest()}")
+        print("\nNothing to do.")
+        return
+
+    try:
+        results = build(stale, args.jobs, args.ambient_duration, args.formats, args.optimize)
+        if repack:
+            print(f"Packing {len(ONE_SHOTS)} one-shots into {sprite.SPRITE_NAME}...")
+            results[sprite.SPRITE_NAME] = encode_sprite(args.formats, args.optimize)
+    except EncodeError as e:
+        raise SystemExit(f"Error: {e}")
+    for name, (paths, duration, _, _) in results.items():
+        key = pack_key if name == sprite.SPRITE_NAME else keys[name]
+        entries[name] = build_cache.record(key, paths, OUTPUT_DIR, duration=duration)
+    build_cache.save_manifest(manifest, OUTPUT_DIR)
+    print_summary(results, time.perf_counter() - start)
+    encodings = {name: result[3] for name, result in results.items() if result[3]}
+    if encodings:
+        profiles.print_report(encodings)
+        profiles.update_report(encodings, OUTPUT_DIR)
+    if repack and "mp3" in args.formats:
+        sprite.startup_report(ONE_SHOTS, list(STREAMS), OUTPUT_DIR)
+    if describe:
+        print(f"Asset manifest: {write_asset_manifest()}")
+    if args.trace:
+        spans.print_summary()
+        print(f"\nTrace written to {spans.write_trace(args.trace)} (open in chrome://tracing or ui.perfetto.dev)")
 
     print("\nDone! All audio files generated.")
 
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Golden-hash check: every build renders the same bytes.
+
+Each sound is rendered three ways and its 16-bit PCM hashed (SHA-256):
+
+    serial     one process, one sound after another, as generate_sounds.py -j 1
+    parallel   on a process pool, as generate_sounds.py -j N
+    streamed   block by block at several block sizes, as the encoder sees loops
+
+All three must agree with each other and with golden-hashes.json. Every
+layer of a sound draws its noise from its own seeded generator (see
+graph.py), so the hashes depend on nothing but the sound graphs and the
+synthesis code. Block sizes are multiples of dsp.CHUNK, so filtered sounds
+are bit-identical too. Ambient loops are checked as the recombined beds
+that ship (see ambient.py).
+
+With --encoded, every sound is also encoded twice with the fixed encoder
+targets and the files compared byte for byte. Encoded bytes depend on the
+local ffmpeg build, so they are compared between runs rather than against
+the golden file.
+
+Usage:
+    python3 golden.py                  # check against golden-hashes.json
+    python3 golden.py --update         # record new hashes after an intended change
+    python3 golden.py --encoded -j 4
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import ambient
+import dsp
+import graph
+from build_cache import write_json_atomic
+from encoder import EncodeSink, output_paths
+from generate_sounds import render_sound
+from stream import blocks
+from synth import SAMPLE_RATE
+from wavio import encode_pcm
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_PATH = os.path.join(SCRIPT_DIR, "golden-hashes.json")
+BLOCK_SIZES = (dsp.CHUNK, 4 * dsp.CHUNK, 32 * dsp.CHUNK)
+
+
+def pcm_hash(chunks) -> str:
+    """SHA-256 of a stream of float sample arrays as 16-bit PCM."""
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(encode_pcm(chunk))
+    return digest.hexdigest()
+
+
+def render_hash(name: str) -> str:
+    """Hash of a whole render, as the build does it (also the pool worker)."""
+    samples, _ = render_sound(name)
+    return pcm_hash([samples])
+
+
+def stream_hash(name: str, block_size: int) -> str:
+    stream, _ = ambient.stream(graph.Compiler(), name, block_size=block_size)
+    return pcm_hash(blocks(stream))
+
+
+def encoded_hash(name: str, directory: str) -> str:
+    """SHA-256 of the MP3 a fixed-target encode of the sound produces."""
+    path = output_paths(directory, name, ("mp3",))["mp3"]
+    stream, _ = ambient.stream(graph.Compiler(), name)
+    with EncodeSink({"mp3": path}, SAMPLE_RATE) as sink:
+        for block in blocks(stream):
+            sink.write(block)
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_golden(path: str = GOLDEN_PATH) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_golden(hashes: dict, path: str = GOLDEN_PATH):
+    write_json_atomic(path, hashes, sort_keys=True)
+
+
+def check(names: list[str], jobs: int, encoded: bool) -> dict:
+    """{name: {"serial", "parallel", "streamed": [...], "encoded": [...]}} of hashes."""
+    results = {name: {"serial": render_hash(name)} for name in names}
+    with ProcessPoolExecutor(max(2, jobs)) as pool:
+        for name, digest in zip(names, pool.map(render_hash, names)):
+            results[name]["parallel"] = digest
+    for name in names:
+        results[name]["streamed"] = [stream_hash(name, size) for size in BLOCK_SIZES]
+    if encoded:
+        for name in names:
+            with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+                results[name]["encoded"] = [encoded_hash(name, first), encoded_hash(name, second)]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--update", action="store_true", help="record the serial hashes as the new golden file")
+    parser.add_argument("--golden", default=GOLDEN_PATH, metavar="PATH", help="golden hash JSON file")
+    parser.add_argument("--only", nargs="+", metavar="SOUND", help="check only these sounds")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, metavar="N",
+                        help="process pool size for the parallel renders")
+    parser.add_argument("--encoded", action="store_true",
+                        help="also encode every sound twice and compare the MP3 bytes (needs ffmpeg)")
+    args = parser.parse_args()
+
+    names = list(graph.load_spec()["sounds"])
+    unknown = set(args.only or []) - set(names)
+    if unknown:
+        parser.error(f"unknown sound(s): {', '.join(sorted(unknown))}")
+    names = [name for name in names if not args.only or name in args.only]
+
+    golden = load_golden(args.golden)
+    results = check(names, args.jobs, args.encoded)
+    failed = []
+    print(f"{'sound':<16}{'sha256':<18}  status")
+    for name, result in results.items():
+        digest = result["serial"]
+        problems = []
+        if result["parallel"] != digest:
+            problems.append("parallel differs")
+        for size, streamed in zip(BLOCK_SIZES, result["streamed"]):
+            if streamed != digest:
+                problems.append(f"{size}-sample blocks differ")
+        if "encoded" in result and len(set(result["encoded"])) > 1:
+            problems.append("encoded bytes differ between runs")
+        if not args.update and name in golden and golden[name] != digest:
+            problems.append("differs from golden")
+        if problems:
+            failed.append(name)
+        status = ", ".join(problems) or ("ok" if args.update or name in golden else "new")
+        print(f"{name:<16}{digest[:16]:<18}  {status}")
+
+    if failed:
+        print(f"\n{len(failed)} sound(s) not reproducible: {', '.join(failed)}")
+        sys.exit(1)
+    if args.update:
+        save_golden({**golden, **{name: result["serial"] for name, result in results.items()}}, args.golden)
+        print(f"\nGolden hashes saved to {args.golden}")
+    elif not golden:
+        print(f"\nNo golden hashes at {args.golden}; run with --update to record them.")
+
+
+if __name__ == "__main__":
+    main()
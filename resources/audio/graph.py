@@ -0,0 +1,567 @@
+"""Declarative sound graphs.
+
+Every sound is described as data in sounds.json and compiled here into the
+block-stream stages of stream.py. A sound is a seed, a duration, optional
+tunable "params" ({"keys": {"default": 9, "min": 1, "max": 40}}), and a
+list of stages applied in order to a mix bus:
+
+    {"signal": expr}                          mix expr(t) over the whole sound
+    {"notes": [{"start", "dur", ...}], "voice": expr}
+    {"scatter": {...}, "params": {...}, "voice": expr}   random onsets
+    {"onsets": {...}, "params": {...}, "voice": expr}    random gaps
+    {"filter": {"type": "lowpass", "cutoff": 1000}}      dsp.py filter on the bus
+    {"fade": {"in": 2.0, "out": 2.0}}
+    {"band": {"bandwidth": 3000, "stages": [...]}}       stages at a reduced rate
+
+Expressions are numbers, "$param" references, or {"op": ...} nodes (see
+OPS). {"op": "ref", "def": name} splices in a named subgraph from "defs".
+A sound's params are visible as "$name" in every stage, and a render can
+override them to make a variant (a higher-pitched success, more key
+clicks), e.g. compiler.render("typewriter", params={"keys": 4}); values
+outside a param's declared range are a SpecError.
+Randomness never comes from a global generator. Every stage draws its
+random parameters and onset times from its own stream, and every noise node
+of every layer (a signal stage, or one event of a voice stage) gets its own
+stream too, derived from the sound's seed and that position (see
+synth.generator). Sounds without a "seed" get one from their name. Noise is
+drawn as blocks are rendered, so rendering serially, in another process or
+at any block size gives the same samples.
+
+Oscillators (sine, square, saw, triangle, partials) with a constant
+frequency evaluate f * t directly. When the frequency is itself an
+expression (a sweep, a vibrato), the node integrates it with its own
+osc.Phase, which runs on from block to block like a noise stream, so the
+pitch follows the sweep instead of overshooting it.
+
+A band renders its stages on their own bus at the lowest rate (SAMPLE_RATE
+divided by band_factor) that still holds its bandwidth, and mixes them
+into the outer bus through one dsp.Upsampler. Noise at the lower rate is
+scaled to the same level per Hz, and the band's stages keep their place
+in the stage numbering, so banding one layer leaves the others' seeds
+alone.
+
+Pure subgraphs (no noise, no running phase) are memoized on their
+canonical key and the time slice, duration and rate they are evaluated
+over: an envelope shared by several harmonics, a def used by two layers or
+by two sounds, or a layer every segment of an ambient pool repeats, is
+computed once per block. The cache lives as long as the compiler, across
+sounds, and is bounded by bytes; noise is seeded per layer and is never
+cached. A pure signal or voice compiled again with the same params reuses
+its closures instead of walking the spec again.
+"""
+
+import itertools
+import json
+import math
+import operator
+import os
+from collections import OrderedDict
+from functools import reduce
+
+import numpy as np
+
+import dsp
+import osc
+import spans
+from stream import BLOCK_SIZE, add_events, add_stream, collect, fade_edges, mix, source, upsample
+from stream import process as process_stage
+from synth import SAMPLE_RATE, bell, envelope, exp_decay, generator, noise, seed_for, sine, span, sweep
+
+SPEC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sounds.json")
+CACHE_BYTES = 16 << 20
+# Rate divisors a band may render at, and its block size there (a multiple of
+# dsp.CHUNK, fixed so the band renders the same whatever the outer block size)
+BAND_FACTORS = [f for f in range(1, 33) if SAMPLE_RATE % f == 0]
+BAND_BLOCK = 16 * dsp.CHUNK
+
+FILTERS = {
+    "lowpass": dsp.lowpass,
+    "highpass": dsp.highpass,
+    "bandpass": dsp.bandpass,
+    "low_shelf": dsp.low_shelf,
+    "high_shelf": dsp.high_shelf,
+    "one_pole_lowpass": dsp.one_pole_lowpass,
+    "one_pole_highpass": dsp.one_pole_highpass,
+}
+
+
+class SpecError(ValueError):
+    """A sound spec is malformed or references something that does not exist."""
+
+
+def band_factor(bandwidth: float, sample_rate: int = SAMPLE_RATE) -> int:
+    """Largest rate divisor whose upsampler passband still covers `bandwidth` Hz."""
+    fits = [f for f in BAND_FACTORS if sample_rate % f == 0
+            and sample_rate / f * dsp.Upsampler.PASSBAND >= bandwidth]
+    return max(fits, default=1)
+
+
+def load_spec(path: str = SPEC_PATH) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _refs(node):
+    """Names of the defs an expression references directly."""
+    if isinstance(node, dict):
+        if node.get("op") == "ref":
+            yield node["def"]
+        for value in node.values():
+            yield from _refs(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _refs(value)
+
+
+def dependencies(spec: dict, name: str) -> dict:
+    """A sound's entry plus every def it uses, for content hashing."""
+    defs = spec.get("defs", {})
+    used = {}
+    todo = list(_refs(spec["sounds"][name]))
+    while todo:
+        ref = todo.pop()
+        if ref not in used:
+            used[ref] = defs.get(ref)
+            todo.extend(_refs(defs.get(ref)))
+    return {"sound": spec["sounds"][name], "defs": used}
+
+
+class _Context:
+    """Time slice an expression is evaluated over, at the sample rate of its layer."""
+
+    __slots__ = ("t", "dur", "sample_rate", "sig", "_frac")
+
+    def __init__(self, t, dur, kind, sample_rate: int = SAMPLE_RATE):
+        self.t = t
+        self.dur = dur
+        self.sample_rate = sample_rate
+        self.sig = (kind, len(t), float(t[0]) if len(t) else 0.0, dur, sample_rate)
+        self._frac = None
+
+    @property
+    def frac(self):
+        """Position through the sound or note, 0 to 1 (computed on first use)."""
+        if self._frac is None:
+            self._frac = self.t / self.dur
+        return self._frac
+
+
+class _Layer:
+    """Where an expression sits in a sound: hands out the streams for its noise nodes."""
+
+    __slots__ = ("seed", "path", "sample_rate", "_nodes")
+
+    def __init__(self, seed: int, *path: int, sample_rate: int = SAMPLE_RATE):
+        self.seed = seed
+        self.path = path
+        self.sample_rate = sample_rate
+        self._nodes = 0
+
+    def noise(self) -> np.random.Generator:
+        self._nodes += 1
+        return generator(self.seed, *self.path, self._nodes)
+
+
+# Scalar fields of each op (resolved at compile time); every other field is an expression
+_SCALARS = {
+    "sine": ("harmonic",), "lfo": ("period",), "bell": ("power",), "decay": ("rate",),
+    "ad": ("attack", "decay"), "clip": ("lo", "hi"), "partials": ("harmonics",),
+}
+
+# Oscillators as fn(cycles, freq, **fields), with the phase in cycles (see osc.py)
+OSCILLATORS = {
+    "sine": osc.sine,
+    "square": osc.square,
+    "saw": osc.saw,
+    "triangle": osc.triangle,
+    "partials": osc.partials,
+}
+
+OPS = {
+    "t": lambda ctx: ctx.t,
+    "frac": lambda ctx: ctx.frac,
+    "sine": lambda ctx, freq, harmonic=1: sine(freq, ctx.t, harmonic),
+    "square": lambda ctx, freq: osc.square(freq * ctx.t, freq, ctx.sample_rate),
+    "saw": lambda ctx, freq: osc.saw(freq * ctx.t, freq, ctx.sample_rate),
+    "triangle": lambda ctx, freq: osc.triangle(freq * ctx.t, freq, ctx.sample_rate),
+    "partials": lambda ctx, freq, harmonics, amps: osc.partials(freq * ctx.t, freq, harmonics, amps, ctx.sample_rate),
+    "lfo": lambda ctx, period: np.sin(2 * math.pi * ctx.t / period),
+    "sweep": lambda ctx, **f: sweep(f["from"], f["to"], ctx.frac),
+    "bell": lambda ctx, power=1.0: bell(ctx.frac, power),
+    "decay": lambda ctx, rate: exp_decay(ctx.t, rate),
+    "ad": lambda ctx, attack, decay: envelope(ctx.t, attack, decay, ctx.dur),
+    "add": lambda ctx, of: reduce(operator.add, of),
+    "sub": lambda ctx, of: reduce(operator.sub, of),
+    "mul": lambda ctx, of: reduce(operator.mul, of),
+    "pow": lambda ctx, of: of[0] ** of[1],
+    "clip": lambda ctx, of, lo=-1.0, hi=1.0: np.clip(of, lo, hi),
+}
+
+
+class Compiler:
+    """Turns sound specs into block streams, sharing a memo cache between sounds.
+
+    The cache is bounded by cache_bytes; the intern tables are not, so a
+    long-lived compiler calls reset() when they grow too large.
+    """
+
+    def __init__(self, spec: dict | None = None, memoize: bool = True, cache_bytes: int = CACHE_BYTES):
+        self.spec = spec if spec is not None else load_spec()
+        self.memoize = memoize
+        self.cache_bytes = cache_bytes
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        self._keys = {}
+        self._uses = {}
+        self._compiled = {}
+        self._ids = itertools.count()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def sounds(self) -> dict:
+        return self.spec["sounds"]
+
+    # --- Scalars ---
+
+    def value(self, node, params: dict, rng: np.random.Generator | None = None):
+        """Resolve a scalar: number, "$param", uniform draw (from rng) or add/mul of those."""
+        if isinstance(node, (int, float)):
+            return node
+        if isinstance(node, str) and node.startswith("$"):
+            try:
+                return params[node[1:]]
+            except KeyError:
+                raise SpecError(f"Unknown parameter {node}") from None
+        if isinstance(node, dict):
+            op = node.get("op")
+            if op == "uniform":
+                if rng is None:
+                    raise SpecError("Random parameters are only allowed in voice stages")
+                return float(rng.uniform(self.value(node["lo"], params, rng), self.value(node["hi"], params, rng)))
+            if op in ("add", "mul"):
+                combine = operator.add if op == "add" else operator.mul
+                return reduce(combine, [self.value(v, params, rng) for v in node["of"]])
+        raise SpecError(f"Not a scalar: {node!r}")
+
+    def _params(self, spec: dict, fixed: dict, rng: np.random.Generator | None = None) -> dict:
+        params = dict(fixed)
+        for key, node in spec.items():
+            params[key] = self.value(node, params, rng)
+        return params
+
+    # --- Expressions ---
+
+    def expr(self, node, params: dict, layer: _Layer):
+        """Compile an expression to (key, fn); key is None for impure (noisy) subgraphs.
+
+        Noise nodes take their streams from `layer`, in the order they are
+        compiled.
+        """
+        if isinstance(node, (int, float)) or (isinstance(node, str) and node.startswith("$")):
+            const = self.value(node, params)
+            return self._intern(("const", const)), lambda ctx: const
+        if isinstance(node, list):
+            parts = [self.expr(n, params, layer) for n in node]
+            keys = [k for k, _ in parts]
+            fns = [f for _, f in parts]
+            key = None if None in keys else self._intern(("list", tuple(keys)))
+            return key, lambda ctx: [f(ctx) for f in fns]
+        if not isinstance(node, dict) or "op" not in node:
+            raise SpecError(f"Not an expression: {node!r}")
+
+        op = node["op"]
+        if op == "ref":
+            defs = self.spec.get("defs", {})
+            if node["def"] not in defs:
+                raise SpecError(f"Unknown def: {node['def']}")
+            return self.expr(defs[node["def"]], self._params(node.get("with", {}), params), layer)
+        if op == "noise":
+            rng = layer.noise()
+            if layer.sample_rate == SAMPLE_RATE:
+                return None, lambda ctx: noise(len(ctx.t), rng)
+            # Keep the power per Hz of full-rate noise: the band that remains sounds as loud
+            gain = math.sqrt(layer.sample_rate / SAMPLE_RATE)
+            return None, lambda ctx: noise(len(ctx.t), rng) * gain
+        if op not in OPS:
+            raise SpecError(f"Unknown op: {op}")
+        if op in OSCILLATORS and "freq" not in node:
+            raise SpecError(f"{op} needs a freq")
+
+        scalars = {}
+        children = {}
+        for field, value in node.items():
+            if field == "op":
+                continue
+            if field in _SCALARS.get(op, ()):
+                scalars[field] = (tuple(self.value(v, params) for v in value) if isinstance(value, list)
+                                  else self.value(value, params))
+            else:
+                children[field] = self.expr(value, params, layer)
+        if op == "partials":
+            self._check_partials(node, scalars.get("harmonics"))
+        if op in OSCILLATORS and not self._constant(node.get("freq"), params):
+            return None, self._oscillator(OSCILLATORS[op], scalars, children, layer.sample_rate)
+        fn = OPS[op]
+        names = list(children)
+        fns = [f for _, f in children.values()]
+        keys = [k for k, _ in children.values()]
+        key = None if None in keys else self._intern((op, tuple(sorted(scalars.items())), tuple(zip(names, keys))))
+        compiled = lambda ctx: fn(ctx, **scalars, **{n: f(ctx) for n, f in zip(names, fns)})
+        if key is None or op in ("t", "frac") or not self.memoize:
+            return key, compiled
+        # Only subgraphs that occur more than once, in this sound or any sound
+        # compiled before it, are worth a cache lookup
+        uses = self._uses
+        uses[key] = uses.get(key, 0) + 1
+        return key, lambda ctx: self._memo(key, ctx, compiled) if uses[key] > 1 else compiled(ctx)
+
+    def _constant(self, node, params: dict) -> bool:
+        """Whether an expression is a scalar known at compile time."""
+        try:
+            self.value(node, params)
+        except SpecError:
+            return False
+        return True
+
+    @staticmethod
+    def _check_partials(node: dict, harmonics):
+        if not isinstance(harmonics, tuple) or not all(
+                isinstance(k, int) and 0 < k <= osc.MAX_HARMONIC for k in harmonics):
+            raise SpecError(f"partials needs a list of harmonics from 1 to {osc.MAX_HARMONIC}: {harmonics!r}")
+        if not isinstance(node.get("amps"), list) or len(node["amps"]) != len(harmonics):
+            raise SpecError("partials needs one amp per harmonic")
+
+    def _oscillator(self, fn, scalars: dict, children: dict, sample_rate: int):
+        """An oscillator whose frequency varies: integrates it with a Phase of its own (impure)."""
+        phase = osc.Phase(sample_rate)
+        freq = children.pop("freq")[1]
+        names = list(children)
+        fns = [f for _, f in children.values()]
+
+        def compiled(ctx):
+            f = freq(ctx)
+            return fn(phase.process(f, len(ctx.t)), f, **scalars, **{n: g(ctx) for n, g in zip(names, fns)},
+                      sample_rate=sample_rate)
+
+        return compiled
+
+    def clear(self):
+        """Drop every memoized result."""
+        self._cache.clear()
+        self._cached_bytes = 0
+
+    def reset(self):
+        """Drop memoized results and forget every subgraph compiled so far.
+
+        The intern tables grow with every distinct subgraph, so a compiler
+        that lives as long as a server and sees arbitrary variants should be
+        reset now and then (see sound_server.py); a build never needs to.
+        """
+        self.clear()
+        self._keys, self._uses, self._compiled = {}, {}, {}
+
+    @property
+    def subgraphs(self) -> int:
+        """How many entries the intern and compile tables hold."""
+        return len(self._keys) + len(self._compiled)
+
+    def prime(self, name: str, params: dict | None = None):
+        """Compile a sound without rendering it.
+
+        Its subgraphs then count as seen before, so the next render of the
+        sound keeps every pure slice it computes for later renders.
+        """
+        self.stream(name, params=params)
+
+    def _stage_expr(self, node, params: dict, layer: _Layer):
+        """expr() for a stage's signal or a voice, reusing a pure one compiled with the same params.
+
+        A pure expression draws no noise from `layer`, so skipping its
+        compilation leaves the other layers' streams alone.
+        """
+        slot = (id(node), tuple(params.items()), layer.sample_rate)
+        entry = self._compiled.get(slot)
+        if entry is not None and entry[0] is node:  # the node is kept alive, so its id is not reused
+            _, key, fn = entry
+            if key in self._uses:
+                self._uses[key] += 1
+            return key, fn
+        key, fn = self.expr(node, params, layer)
+        if key is not None and self.memoize:
+            self._compiled[slot] = node, key, fn
+        return key, fn
+
+    def _intern(self, signature: tuple) -> int:
+        """Integer naming a canonical subgraph (hash-consing).
+
+        Ids are never reused, even across reset(), so a stream compiled
+        earlier cannot read another subgraph's results.
+        """
+        key = self._keys.get(signature)
+        if key is None:
+            key = self._keys[signature] = next(self._ids)
+        return key
+
+    def _memo(self, key: int, ctx: _Context, compiled):
+        slot = (key, ctx.sig)
+        hit = self._cache.get(slot)
+        if hit is not None:
+            self._cache.move_to_end(slot)
+            self.hits += 1
+            return hit
+        self.misses += 1
+        result = compiled(ctx)
+        size = getattr(result, "nbytes", 0)
+        self._cache[slot] = result
+        self._cached_bytes += size
+        while self._cached_bytes > self.cache_bytes and self._cache:
+            _, old = self._cache.popitem(last=False)
+            self._cached_bytes -= getattr(old, "nbytes", 0)
+        return result
+
+    # --- Sounds ---
+
+    def _voice(self, voice, params: dict, n: int, layer: _Layer):
+        """Event (si, ei, render) for one note of a voice."""
+        rate = layer.sample_rate
+        si, ei = span(params["start"], params["dur"], n, rate)
+        _, fn = self._stage_expr(voice, params, layer)
+        dur = params["dur"]
+        return si, ei, lambda lt: fn(_Context(lt, dur, "note", rate))
+
+    def _events(self, stage: dict, base: dict, duration: float, n: int, seed: int, index: int,
+                sample_rate: int = SAMPLE_RATE) -> list:
+        """Events of voice stage `index`; event k's noise comes from path (index, k + 1)."""
+        rng = generator(seed, index)
+        if "notes" in stage:
+            notes = [self._params(note, base, rng) for note in stage["notes"]]
+        elif "scatter" in stage:
+            spec = stage["scatter"]
+            count = round(self.value(spec["count"], base) * duration / spec.get("per", duration))
+            lo, hi = (duration + x if x < 0 else x for x in spec["window"])
+            times = sorted(rng.uniform(lo, hi, count).tolist())
+            notes = [self._params(stage.get("params", {}), {**base, "start": start}, rng) for start in times]
+        else:
+            spec = stage["onsets"]
+            end = duration + spec["before"] if spec["before"] < 0 else spec["before"]
+            times = [spec.get("first", 0.0)]
+            t = times[0]
+            for _ in range(int(self.value(spec["count"], base))):
+                t += self.value(spec["gap"], base, rng)
+                if t < end:
+                    times.append(t)
+            notes = [self._params(stage.get("params", {}), {**base, "start": start}, rng) for start in times]
+        events = [self._voice(stage["voice"], params, n, _Layer(seed, index, k + 1, sample_rate=sample_rate))
+                  for k, params in enumerate(notes)]
+        events.sort(key=lambda event: event[0])
+        return events
+
+    def variant_params(self, name: str, overrides: dict | None = None) -> dict:
+        """A sound's param defaults with `overrides` applied, each checked against its range."""
+        declared = self.sounds[name].get("params", {})
+        unknown = set(overrides or {}) - set(declared)
+        if unknown:
+            raise SpecError(f"Unknown parameter(s) for {name}: {', '.join(sorted(unknown))}")
+        params = {}
+        for key, param in declared.items():
+            if not isinstance(param, dict) or not {"default", "min", "max"} <= set(param):
+                raise SpecError(f"Param {key} of {name} needs a default, min and max")
+            value = (overrides or {}).get(key, param["default"])
+            if not param["min"] <= value <= param["max"]:
+                raise SpecError(f"{key} must be in [{param['min']:g}, {param['max']:g}] for {name}")
+            params[key] = value
+        return params
+
+    def stream(self, name: str, duration: float | None = None, block_size: int = BLOCK_SIZE,
+               params: dict | None = None, seed: int | None = None):
+        """Compile a sound into a block stream. Returns (stream, duration).
+
+        `params` overrides the sound's declared params (see variant_params)
+        and `seed` its seed, for another take of the same sound.
+        """
+        if name not in self.sounds:
+            raise SpecError(f"Unknown sound: {name}")
+        sound = self.sounds[name]
+        base = self.variant_params(name, params)
+        duration = duration or sound["duration"]
+        n = int(SAMPLE_RATE * duration)
+        if seed is None:
+            seed = sound.get("seed", seed_for(name))
+        stream, _ = self._bus(name, sound["stages"], base, duration, n, seed, 0, block_size, SAMPLE_RATE)
+        return stream, duration
+
+    def _bus(self, name: str, stages: list, base: dict, duration: float, n: int, seed: int, first: int,
+             block_size: int, sample_rate: int):
+        """Block stream of n samples mixing `stages` at sample_rate. Returns (stream, next index).
+
+        Stages are numbered from `first` for their random streams. Stages in
+        a band continue the numbering of the stages around it, as if the
+        band were spliced into the list, so wrapping stages in a band does
+        not change the random draws of any other stage.
+        """
+        stream = None  # the first layer starts the bus; later ones mix onto it
+        index = first
+        for stage in stages:
+            if stream is None and "signal" not in stage:
+                stream = source(n, lambda t: np.zeros(len(t)), block_size, sample_rate)
+            if "band" in stage:
+                band, index = self._band(name, stage["band"], base, duration, n, seed, index, block_size, sample_rate)
+                stream = spans.blocks(add_stream(stream, band), "band", sound=name)
+                continue
+            if "signal" in stage:
+                key, fn = self._stage_expr(stage["signal"], base, _Layer(seed, index, 0, sample_rate=sample_rate))
+                layer = lambda t, fn=fn: fn(_Context(t, duration, "bus", sample_rate))
+                if stream is None:
+                    # Later stages add into the bus blocks in place; a pure layer may be a cached array
+                    first = layer if key is None else (lambda t, layer=layer: np.array(layer(t), dtype=np.float64))
+                    stream = source(n, first, block_size, sample_rate)
+                else:
+                    stream = mix(stream, layer, sample_rate)
+            elif "voice" in stage:
+                events = self._events(stage, base, duration, n, seed, index, sample_rate)
+                stream = add_events(stream, events, sample_rate)
+            elif "filter" in stage:
+                args = dict(stage["filter"])
+                kind = args.pop("type")
+                if kind not in FILTERS:
+                    raise SpecError(f"Unknown filter: {kind}")
+                stream = process_stage(stream, FILTERS[kind](**args, sample_rate=sample_rate))
+            elif "fade" in stage:
+                fade = stage["fade"]
+                stream = fade_edges(stream, n, int(sample_rate * fade.get("in", 0)),
+                                    int(sample_rate * fade.get("out", 0)))
+            else:
+                raise SpecError(f"Unknown stage in {name}: {sorted(stage)}")
+            kind = next(k for k in ("signal", "voice", "filter", "fade") if k in stage)
+            stream = spans.blocks(stream, kind, sound=name, stage=index)
+            index += 1
+        return stream, index
+
+    def _band(self, name: str, band: dict, base: dict, duration: float, n: int, seed: int, first: int,
+              block_size: int, sample_rate: int):
+        """A band stage: its own bus at the lowest rate that holds `bandwidth`, upsampled to sample_rate."""
+        if "bandwidth" not in band or not band.get("stages"):
+            raise SpecError(f"A band in {name} needs a bandwidth and stages")
+        factor = band_factor(self.value(band["bandwidth"], base), sample_rate)
+        if factor == 1:
+            return self._bus(name, band["stages"], base, duration, n, seed, first, block_size, sample_rate)
+        low, index = self._bus(name, band["stages"], base, duration, -(-n // factor), seed, first,
+                               BAND_BLOCK, sample_rate // factor)
+        return upsample(low, dsp.Upsampler(factor), n), index
+
+    def render(self, name: str, duration: float | None = None, params: dict | None = None,
+               seed: int | None = None):
+        """Render a whole sound. Returns (samples, duration).
+
+        One-shots are short, so they render as a single block; loops keep
+        streaming in BLOCK_SIZE blocks to bound their temporaries.
+        """
+        if name not in self.sounds:
+            raise SpecError(f"Unknown sound: {name}")
+        sound = self.sounds[name]
+        block_size = BLOCK_SIZE
+        if not sound.get("loop"):
+            block_size = max(1, int(SAMPLE_RATE * (duration or sound["duration"])))
+        stream, duration = self.stream(name, duration, block_size, params, seed)
+        return collect(stream), duration
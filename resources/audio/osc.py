@@ -0,0 +1,171 @@
+"""Phase-accumulating oscillators and band-limited wavetables (used by graph.py).
+
+An oscillator is driven by its phase in cycles. For a constant frequency
+that is just f * t; for a swept one it is the running integral of f, kept
+by a Phase accumulator from block to block. Evaluating sin(2*pi*f(t)*t)
+instead makes the pitch overshoot: its instantaneous frequency is
+f(t) + t * f'(t), so a 520 -> 480 Hz sweep would end at 440 Hz.
+
+Shapes other than a lone sine are read from wavetables built from their
+Fourier series, one table per octave of fundamental so no partial lands
+above Nyquist:
+
+    cycles = Phase().process(freq)        # freq: per-sample Hz
+    square(cycles, freq)                  # odd harmonics, 1/k
+    partials(cycles, freq, (1, 2, 3), (0.4, 0.15, 0.08))   # one table read
+
+A bank of harmonics with fixed amplitudes is summed into a single table,
+so it costs one lookup however many partials it has. Partials with their
+own envelopes share one sine and cosine of the phase and step through the
+higher harmonics with the recurrence sin((k+1)x) = 2 cos(x) sin(kx) -
+sin((k-1)x), which is a few multiply-adds per partial instead of a sin().
+"""
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from synth import SAMPLE_RATE
+
+TABLE_SIZE = 4096
+MAX_HARMONIC = TABLE_SIZE // 4  # keeps linear interpolation error well below 16-bit resolution
+
+# Fourier series of the band-limited shapes: amplitude of harmonic k (0 if absent)
+SERIES = {
+    "square": lambda k: np.where(k % 2 == 1, 4 / (math.pi * k), 0.0),
+    "saw": lambda k: 2 / math.pi * np.where(k % 2 == 1, 1.0, -1.0) / k,
+    "triangle": lambda k: np.where(k % 2 == 1, 8 / math.pi ** 2 * np.where(k % 4 == 1, 1.0, -1.0) / k ** 2, 0.0),
+}
+
+
+class Phase:
+    """Running phase, in cycles, of an oscillator whose frequency varies per sample.
+
+    Sample n gets the sum of f[0..n-1] / sample_rate, so the first sample
+    of the first block has phase 0 like sin(2*pi*f*t) does. The carry is
+    fed into the same cumulative sum as the block (see RunningAverage), so
+    any split into blocks gives bit-identical phases. The phase is never
+    wrapped: after a minute at 20 kHz it still resolves 1e-9 cycles.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.phase = 0.0
+
+    def process(self, freq, n: int | None = None) -> np.ndarray:
+        """Phases of the next block; a scalar freq needs the block length n."""
+        freq = np.broadcast_to(np.asarray(freq, dtype=np.float64), (n,) if n is not None else np.shape(freq))
+        steps = np.empty(len(freq) + 1)
+        steps[0] = self.phase
+        steps[1:] = freq / self.sample_rate
+        running = np.cumsum(steps)
+        self.phase = running[-1]
+        return running[:-1]
+
+
+def _table(harmonics: np.ndarray, amps: np.ndarray) -> np.ndarray:
+    """One cycle of sum(amps[i] * sin(2*pi*harmonics[i]*x)), plus two wrap-around samples."""
+    spectrum = np.zeros(TABLE_SIZE // 2 + 1, dtype=complex)
+    np.add.at(spectrum, harmonics, -0.5j * TABLE_SIZE * amps)
+    cycle = np.fft.irfft(spectrum, TABLE_SIZE)
+    return np.concatenate([cycle, cycle[:2]])
+
+
+@lru_cache(maxsize=None)
+def shape_table(shape: str, top: int) -> np.ndarray:
+    """Wavetable of `shape` with its harmonics up to `top`."""
+    k = np.arange(1, top + 1)
+    return _table(k, SERIES[shape](k))
+
+
+@lru_cache(maxsize=256)
+def bank_table(harmonics: tuple, amps: tuple) -> np.ndarray:
+    """Wavetable of fixed-amplitude partials."""
+    return _table(np.asarray(harmonics), np.asarray(amps, dtype=np.float64))
+
+
+def lookup(table: np.ndarray, cycles: np.ndarray) -> np.ndarray:
+    """Linearly interpolated read of a wavetable at the given phases."""
+    x = (cycles - np.floor(cycles)) * TABLE_SIZE
+    i = x.astype(np.intp)
+    a = table[i]
+    return a + (table[i + 1] - a) * (x - i)
+
+
+def _by_level(cycles: np.ndarray, levels, table_for) -> np.ndarray:
+    """Read each sample from the table for its level (a scalar or one int per sample)."""
+    if np.ndim(levels) == 0 or levels.min() == levels.max():
+        return lookup(table_for(int(np.max(levels))), cycles)
+    out = np.empty(len(cycles))
+    for level in np.unique(levels):
+        where = levels == level
+        out[where] = lookup(table_for(int(level)), cycles[where])
+    return out
+
+
+def _headroom(freq, sample_rate: int):
+    """Nyquist over |freq|: partials below this many times the fundamental are safe."""
+    with np.errstate(divide="ignore"):
+        return sample_rate / 2 / np.abs(freq)
+
+
+def sine(cycles: np.ndarray, freq=None, harmonic: int = 1, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    return np.sin(2 * math.pi * harmonic * cycles)
+
+
+def shape(name: str, cycles: np.ndarray, freq, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Band-limited `name` wave; the table is picked per sample by octave of freq."""
+    octave = np.floor(np.log2(np.maximum(_headroom(freq, sample_rate), 1.0)))
+    levels = np.minimum(octave, math.log2(MAX_HARMONIC)).astype(int)
+    return _by_level(cycles, levels, lambda level: shape_table(name, 1 << level))
+
+
+def square(cycles, freq, sample_rate: int = SAMPLE_RATE):
+    return shape("square", cycles, freq, sample_rate)
+
+
+def saw(cycles, freq, sample_rate: int = SAMPLE_RATE):
+    return shape("saw", cycles, freq, sample_rate)
+
+
+def triangle(cycles, freq, sample_rate: int = SAMPLE_RATE):
+    return shape("triangle", cycles, freq, sample_rate)
+
+
+def partials(cycles: np.ndarray, freq, harmonics, amps, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Sum of amps[i] * sin(2*pi*harmonics[i]*cycles), leaving out partials above Nyquist.
+
+    Scalar amps go through one summed wavetable; if any amp is an envelope
+    (an array), the partials come from the sine recurrence instead.
+    """
+    order = sorted(range(len(harmonics)), key=lambda i: harmonics[i])
+    harmonics = [int(harmonics[i]) for i in order]
+    amps = [amps[i] for i in order]
+    headroom = _headroom(freq, sample_rate)
+    if all(np.ndim(a) == 0 for a in amps):
+        amps = tuple(float(a) for a in amps)
+        counts = np.searchsorted(harmonics, headroom, side="left")
+        return _by_level(cycles, counts, lambda count: bank_table(tuple(harmonics[:count]), amps[:count]))
+
+    # Three rotating buffers and in-place updates keep the working set at five arrays
+    twice_cos = 2 * math.pi * cycles
+    current = np.sin(twice_cos)
+    np.cos(twice_cos, out=twice_cos)
+    twice_cos *= 2
+    previous, spare = np.zeros(len(cycles)), np.empty(len(cycles))
+    out = np.zeros(len(cycles))
+    pending = list(zip(harmonics, amps))
+    for k in range(1, harmonics[-1] + 1):
+        while pending and pending[0][0] == k:
+            _, amp = pending.pop(0)
+            if np.ndim(headroom) == 0 and k >= headroom:
+                continue
+            np.multiply(current, amp, out=spare)
+            if np.ndim(headroom):
+                spare *= k < headroom
+            out += spare
+        np.multiply(twice_cos, current, out=spare)
+        spare -= previous
+        previous, current, spare = current, spare, previous
+    return out
@@ -0,0 +1,105 @@
+"""Multi-resolution min/max waveform peaks.
+
+A pyramid is a list of (samples_per_pixel, mins, maxs) levels, finest first,
+each level halving the resolution of the one before it. The finest level is
+one reduceat pass over the samples; every coarser level folds pairs of
+pixels from the previous one, so the whole pyramid costs little more than
+reading the audio once.
+
+Peaks files use the audiowaveform binary format (version 2, one channel):
+one header + interleaved min/max record per level, concatenated finest
+first. The first record alone is a valid audiowaveform .dat file.
+"""
+
+import os
+import struct
+
+import numpy as np
+
+MIN_PIXELS = 2048  # the finest level has at least this many pixels
+MIN_LENGTH = 64  # stop adding levels once a level would be shorter
+
+# audiowaveform v2 header: version, flags, sample rate, samples per pixel, length, channels
+_HEADER = struct.Struct("<iIiiIi")
+_FLAG_8BIT = 1
+_FORMATS = {8: ("<i1", 127), 16: ("<i2", 32767)}
+
+
+def build_pyramid(samples, min_pixels: int = MIN_PIXELS, min_length: int = MIN_LENGTH):
+    """Min/max pyramid of a mono float signal, finest level first."""
+    x = np.asarray(samples, dtype=np.float32)
+    if len(x) == 0:
+        return [(1, np.zeros(0, np.float32), np.zeros(0, np.float32))]
+    spp = 1
+    while len(x) // (spp * 2) >= min_pixels:
+        spp *= 2
+    starts = np.arange(0, len(x), spp)
+    mins, maxs = np.minimum.reduceat(x, starts), np.maximum.reduceat(x, starts)
+    levels = [(spp, mins, maxs)]
+    while len(mins) >= 2 * min_length:
+        pairs = np.arange(0, len(mins), 2)
+        mins, maxs = np.minimum.reduceat(mins, pairs), np.maximum.reduceat(maxs, pairs)
+        spp *= 2
+        levels.append((spp, mins, maxs))
+    return levels
+
+
+def level_for(pyramid, samples_per_pixel: float):
+    """The coarsest level that still has at least the requested resolution."""
+    fitting = [level for level in pyramid if level[0] <= samples_per_pixel]
+    return fitting[-1] if fitting else pyramid[0]
+
+
+def columns(pyramid, num_samples: int, width: int):
+    """(x, mins, maxs) for drawing about `width` columns across the full duration."""
+    spp, mins, maxs = level_for(pyramid, max(1, num_samples // width))
+    count = min(width, len(mins))
+    starts = (np.arange(count) * len(mins)) // max(1, count)
+    x = starts * spp / max(1, num_samples) * width
+    return x, np.minimum.reduceat(mins, starts), np.maximum.reduceat(maxs, starts)
+
+
+def encode_peaks(pyramid, sample_rate: int, bits: int = 8) -> bytes:
+    """Serialize a pyramid as concatenated audiowaveform v2 records."""
+    if bits not in _FORMATS:
+        raise ValueError(f"Unsupported peak resolution: {bits} bits")
+    dtype, full_scale = _FORMATS[bits]
+    flags = _FLAG_8BIT if bits == 8 else 0
+    parts = []
+    for spp, mins, maxs in pyramid:
+        pairs = np.empty(2 * len(mins), dtype=np.float64)
+        pairs[0::2], pairs[1::2] = mins, maxs
+        values = np.clip(np.rint(pairs * full_scale), -full_scale - 1, full_scale).astype(dtype)
+        parts.append(_HEADER.pack(2, flags, sample_rate, spp, len(mins), 1) + values.tobytes())
+    return b"".join(parts)
+
+
+def decode_peaks(data: bytes):
+    """Parse a peaks file. Returns (pyramid, sample_rate) with float peaks in [-1, 1]."""
+    pyramid = []
+    sample_rate = 0
+    pos = 0
+    while pos < len(data):
+        version, flags, sample_rate, spp, length, channels = _HEADER.unpack_from(data, pos)
+        if version != 2 or channels != 1:
+            raise ValueError(f"Unsupported peaks record (version {version}, {channels} channels)")
+        dtype, full_scale = _FORMATS[8 if flags & _FLAG_8BIT else 16]
+        pos += _HEADER.size
+        values = np.frombuffer(data, dtype, 2 * length, pos).astype(np.float32) / full_scale
+        pos += 2 * length * np.dtype(dtype).itemsize
+        pyramid.append((spp, values[0::2], values[1::2]))
+    return pyramid, sample_rate
+
+
+def write_peaks(path: str, pyramid, sample_rate: int, bits: int = 8) -> str:
+    """Write a peaks file atomically (a reader never sees a partial file)."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(encode_peaks(pyramid, sample_rate, bits))
+    os.replace(tmp, path)
+    return path
+
+
+def read_peaks(path: str):
+    with open(path, "rb") as f:
+        return decode_peaks(f.read())
@@ -0,0 +1,188 @@
+"""Encoding-profile optimizer: the smallest encoding that still sounds the same.
+
+Every sound is encoded under a set of candidate profiles for its output
+format (MP3 VBR levels at 44.1/32/22.05 kHz, Opus bitrates), each
+candidate is decoded again and scored against a fresh render with a
+log-spectral distance, and the smallest candidate within the sound's
+threshold ("max_distance" in sounds.json, in dB) is kept.
+
+The distance compares Hann-windowed 2048-sample frames folded into BANDS
+mel bands up to MAX_FREQ (band energies, not single bins, so a codec that
+reproduces a noise texture rather than its exact samples is not punished
+for it). For every frame it takes the RMS difference in dB over the
+bands, with both spectra floored RANGE_DB below the reference frame's
+peak so that masked, inaudible detail (which is exactly what a perceptual
+codec drops) does not count, and averages over the frames that are not
+silent. Render, encode and decode are all
+streamed, so long ambients are scored in bounded memory.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import spans
+from build_cache import write_json_atomic
+from decoder import decode_blocks
+from dsp import band_filters, hz_to_mel, mel_to_hz
+from encoder import EncodeSink
+
+FRAME = 2048
+BANDS = 40
+MIN_FREQ = 40.0
+MAX_FREQ = 16000.0
+RANGE_DB = 60.0
+SILENCE_DB = -90.0
+DEFAULT_MAX_DISTANCE = 1.0
+REPORT_NAME = "encoding-report.json"
+# Closest candidate to the old fixed setting (-b:a 128k -q:a 2), the baseline in reports
+REFERENCE_PROFILE = {"mp3": "mp3-v2-44k", "opus": "opus-64k", "webm": "webm-64k"}
+
+# Output format -> {profile name: (file extension, ffmpeg muxer, codec arguments)}
+PROFILES = {
+    "mp3": {
+        f"mp3-v{q}-{rate // 1000}k": ("mp3", "mp3", ["-c:a", "libmp3lame", "-q:a", str(q), "-ar", str(rate)])
+        for rate in (44100, 32000, 22050)
+        for q in (2, 4, 6, 8)
+    },
+    "opus": {
+        f"opus-{kbps}k": ("opus", "ogg", ["-c:a", "libopus", "-b:a", f"{kbps}k"])
+        for kbps in (24, 32, 48, 64, 96)
+    },
+    "webm": {
+        f"webm-{kbps}k": ("webm", "webm", ["-c:a", "libopus", "-b:a", f"{kbps}k"])
+        for kbps in (24, 32, 48, 64, 96)
+    },
+}
+
+
+def _frames(chunks, size: int = FRAME):
+    """Re-cut a stream of sample arrays into consecutive frames of `size` (last one zero-padded)."""
+    pending = np.zeros(0)
+    for chunk in chunks:
+        pending = np.concatenate([pending, chunk])
+        whole = len(pending) - len(pending) % size
+        if whole:
+            yield from pending[:whole].reshape(-1, size)
+            pending = pending[whole:]
+    if len(pending):
+        yield np.pad(pending, (0, size - len(pending)))
+
+
+def _band_db(frame: np.ndarray, window: np.ndarray, bank: np.ndarray) -> np.ndarray:
+    """Mel band energies in dB relative to a full-scale sine."""
+    power = np.abs(np.fft.rfft(frame * window)) ** 2 / (len(frame) / 4) ** 2
+    return 10 * np.log10(bank @ power + 1e-20)
+
+
+def spectral_distances(reference, candidates: dict, sample_rate: int) -> dict:
+    """Mean log-spectral distance (dB) of each candidate stream from the reference stream.
+
+    `reference` and every value of `candidates` are iterables of sample
+    arrays; they are consumed in lockstep, one frame at a time.
+    """
+    window = np.hanning(FRAME)
+    centers = mel_to_hz(np.linspace(hz_to_mel(MIN_FREQ), hz_to_mel(min(MAX_FREQ, sample_rate / 2)), BANDS + 2))
+    bank = band_filters(np.fft.rfftfreq(FRAME, 1 / sample_rate), centers)
+    streams = {name: _frames(chunks) for name, chunks in candidates.items()}
+    totals = dict.fromkeys(candidates, 0.0)
+    counted = 0
+    silent = np.zeros(FRAME)
+    for ref_frame in _frames(reference):
+        test_frames = {name: next(frames, silent) for name, frames in streams.items()}
+        ref = _band_db(ref_frame, window, bank)
+        peak = ref.max()
+        if peak < SILENCE_DB:
+            continue
+        floor = peak - RANGE_DB
+        ref = np.maximum(ref, floor)
+        for name, frame in test_frames.items():
+            test = np.maximum(_band_db(frame, window, bank), floor)
+            totals[name] += np.sqrt(np.mean((test - ref) ** 2))
+        counted += 1
+    return {name: total / max(1, counted) for name, total in totals.items()}
+
+
+def decode_seconds(path: str, sample_rate: int) -> float:
+    """Wall time to decode a file completely (blocks are discarded as they arrive)."""
+    start = time.perf_counter()
+    for _ in decode_blocks(path, sample_rate):
+        pass
+    return time.perf_counter() - start
+
+
+def optimize(name: str, render, fmt: str, directory: str, sample_rate: int, max_distance: float) -> dict:
+    """Encode `name` under every profile for `fmt` and keep the smallest that passes.
+
+    `render()` returns a fresh iterable of sample blocks each time it is
+    called (the sound is rendered twice: once to encode, once to score).
+    The winner is moved to <directory>/<name>.<ext>; the result records
+    every candidate's size, distance and decode time.
+    """
+    profiles = PROFILES[fmt]
+    tmp = tempfile.mkdtemp(prefix=f".{name}-", dir=directory)
+    try:
+        paths = {profile: os.path.join(tmp, f"{profile}.{ext}") for profile, (ext, _, _) in profiles.items()}
+        with spans.span("encode candidates", format=fmt), EncodeSink(paths, sample_rate, targets=profiles) as sink:
+            for block in render():
+                sink.write(block)
+
+        with spans.span("score candidates", format=fmt):
+            distances = spectral_distances(
+                render(), {profile: decode_blocks(path, sample_rate) for profile, path in paths.items()},
+                sample_rate)
+        with spans.span("time decodes", format=fmt):
+            candidates = {
+                profile: {
+                    "bytes": os.path.getsize(paths[profile]),
+                    "distance": round(float(distances[profile]), 3),
+                    "decode_ms": round(decode_seconds(paths[profile], sample_rate) * 1000, 1),
+                }
+                for profile in profiles
+            }
+        passing = [p for p in profiles if candidates[p]["distance"] <= max_distance]
+        # Nothing passes: fall back to the highest-fidelity candidate
+        chosen = min(passing, key=lambda p: candidates[p]["bytes"]) if passing else \
+            min(profiles, key=lambda p: candidates[p]["distance"])
+        ext = profiles[chosen][0]
+        output = os.path.join(directory, f"{name}.{ext}")
+        os.replace(paths[chosen], output)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {"path": output, "profile": chosen, "max_distance": max_distance,
+            "passed": bool(passing), "candidates": candidates}
+
+
+def print_report(encodings: dict):
+    """Table of the chosen profile per asset and format against the reference profile."""
+    print(f"\n{'asset':<16}{'profile':<14}{'size':>9}{'was':>9}{'distance':>10}{'limit':>7}{'decode':>9}")
+    totals = [0, 0]
+    for name, formats in encodings.items():
+        for fmt, result in formats.items():
+            chosen = result["candidates"][result["profile"]]
+            was = result["candidates"][REFERENCE_PROFILE[fmt]]["bytes"]
+            totals = [totals[0] + chosen["bytes"], totals[1] + was]
+            flag = "" if result["passed"] else "  (none passed)"
+            print(f"{name:<16}{result['profile']:<14}{chosen['bytes'] / 1024:>7.1f}KB{was / 1024:>7.1f}KB"
+                  f"{chosen['distance']:>8.2f}dB{result['max_distance']:>7.1f}{chosen['decode_ms']:>7.1f}ms{flag}")
+    print(f"{'total':<30}{totals[0] / 1024:>7.1f}KB{totals[1] / 1024:>7.1f}KB")
+
+
+def update_report(encodings: dict, directory: str) -> str:
+    """Merge freshly optimized assets into encoding-report.json (written atomically)."""
+    path = os.path.join(directory, REPORT_NAME)
+    try:
+        with open(path, encoding="utf-8") as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        report = {}
+    for name, formats in encodings.items():
+        report[name] = {
+            fmt: {key: value for key, value in result.items() if key != "path"}
+            for fmt, result in formats.items()
+        }
+    return write_json_atomic(path, report, sort_keys=True)
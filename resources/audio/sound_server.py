@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""Local synthesis daemon: parameterized sound variants on demand.
+
+The shipped MP3s are fixed renders of sounds.json. This daemon keeps the
+compiled graphs in memory and renders variants of them on request, e.g. a
+success sound pitched by how long the tool ran, or a typewriter with one
+click per edited line, using the params a sound declares (see graph.py).
+Recent renders are kept as WAV bytes in an LRU cache bounded by size, so
+repeating a variant costs a dictionary lookup. The default one-shots are
+rendered into the cache at startup.
+
+It listens on localhost HTTP (or a Unix socket with --socket) and answers
+GET requests:
+
+    /sounds                           {name: {"duration", "loop", "params"}}
+    /render/<name>?keys=4&duration=1  16-bit mono WAV of the variant
+    /metrics                          request counts, cache stats, latency
+
+Rendered responses carry X-Cache (hit or miss) and X-Render-Ms headers.
+Latency is measured server-side, from the parsed request to the response
+bytes, and reported per outcome as mean/p50/p95/p99/max over the last
+LATENCY_WINDOW requests. SoundClient talks to a running daemon; --bench
+starts one in-process and measures cold and cached requests per sound.
+
+Usage:
+    python3 sound_server.py                     # http://127.0.0.1:8765
+    python3 sound_server.py --socket /tmp/cocopilot-sounds.sock
+    python3 sound_server.py --bench
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import signal
+import socket
+import socketserver
+import statistics
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit
+
+import graph
+from synth import SAMPLE_RATE
+from wavio import wav_bytes
+
+DEFAULT_PORT = 8765
+CACHE_BYTES = 64 << 20
+MEMO_BYTES = 64 << 20  # the compiler's slices of every one-shot, so variants only render what they change
+LATENCY_WINDOW = 1024
+MAX_DURATION = 60.0
+MAX_SUBGRAPHS = 4096  # intern and compile table entries the compiler keeps between renders
+HIT_BUDGET_MS = 1.0
+COLD_BUDGET_MS = 5.0
+
+
+class RenderCache:
+    """Thread-safe LRU of rendered variants, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int = CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class LatencyStats:
+    """Rolling latency samples per outcome ("hit", "miss", "error")."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = {}
+        self._counts = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(outcome, deque(maxlen=self._window)).append(seconds)
+            self._counts[outcome] = self._counts.get(outcome, 0) + 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            samples = {outcome: sorted(values) for outcome, values in self._samples.items()}
+            counts = dict(self._counts)
+        return {
+            outcome: {
+                "count": counts[outcome],
+                "mean_ms": round(statistics.fmean(values) * 1000, 3),
+                **{f"p{q}_ms": round(_percentile(values, q) * 1000, 3) for q in (50, 95, 99)},
+                "max_ms": round(values[-1] * 1000, 3),
+            }
+            for outcome, values in samples.items()
+        }
+
+
+def _percentile(ordered: list, q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class Synthesizer:
+    """Renders sound variants through one compiler, behind the render cache."""
+
+    def __init__(self, spec: dict | None = None, cache_bytes: int = CACHE_BYTES):
+        self.compiler = graph.Compiler(spec, cache_bytes=MEMO_BYTES)
+        self.cache = RenderCache(cache_bytes)
+        self.latency = LatencyStats()
+        self._render_lock = threading.Lock()  # the compiler's memo cache is not thread-safe
+
+    def sounds(self) -> dict:
+        return {
+            name: {"duration": sound["duration"], "loop": bool(sound.get("loop")),
+                   "params": sound.get("params", {})}
+            for name, sound in self.compiler.sounds.items()
+        }
+
+    def variant_key(self, name: str, duration: float | None, params: dict) -> tuple:
+        """Cache key: explicit defaults and omitted params name the same variant."""
+        if name not in self.compiler.sounds:
+            raise graph.SpecError(f"Unknown sound: {name}")
+        resolved = self.compiler.variant_params(name, params)
+        duration = duration or self.compiler.sounds[name]["duration"]
+        if not 0 < duration <= MAX_DURATION:
+            raise ValueError(f"duration must be in (0, {MAX_DURATION:g}] seconds")
+        return name, float(duration), tuple(sorted(resolved.items()))
+
+    def render(self, name: str, duration: float | None = None, params: dict | None = None):
+        """WAV bytes of a variant. Returns (data, hit)."""
+        key = self.variant_key(name, duration, params or {})
+        data = self.cache.get(key)
+        if data is not None:
+            return data, True
+        with self._render_lock:
+            if self.compiler.subgraphs > MAX_SUBGRAPHS:
+                self.compiler.reset()  # every new variant adds subgraphs; a build never sees enough to matter
+                self._prime()
+            samples, _ = self.compiler.render(name, key[1], dict(key[2]))
+        data = wav_bytes(samples, SAMPLE_RATE)
+        self.cache.put(key, data)
+        return data, False
+
+    def one_shots(self) -> list:
+        return [name for name, sound in self.compiler.sounds.items() if not sound.get("loop")]
+
+    def _prime(self):
+        """Compile every one-shot, so the next render of each memoizes its pure slices."""
+        for name in self.one_shots():
+            self.compiler.prime(name)
+
+    def warm(self) -> int:
+        """Render every one-shot's default variant into the cache. Returns how many.
+
+        The compiler keeps the slices those renders compute, so a variant
+        (another pitch, more keys) recomputes only what its params change.
+        """
+        with self._render_lock:
+            self._prime()
+        names = self.one_shots()
+        for name in names:
+            self.render(name)
+        return len(names)
+
+    def metrics(self) -> dict:
+        return {"cache": self.cache.stats(), "latency": self.latency.summary()}
+
+
+def _number(text: str) -> float:
+    value = float(text)
+    if not math.isfinite(value):
+        raise ValueError(f"not a finite number: {text}")
+    return int(value) if value.is_integer() else value
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so a client pays for one connect
+    disable_nagle_algorithm = True  # headers and a small body go out as separate writes
+    server_version = "CocopilotSounds/1"
+
+    def do_GET(self):
+        start = time.perf_counter()
+        synth = self.server.synthesizer
+        url = urlsplit(self.path)
+        try:
+            if url.path == "/sounds":
+                self._send(200, json.dumps(synth.sounds()).encode(), "application/json")
+            elif url.path == "/metrics":
+                self._send(200, json.dumps(synth.metrics()).encode(), "application/json")
+            elif url.path.startswith("/render/"):
+                query = {key: _number(value) for key, value in parse_qsl(url.query, strict_parsing=True)}
+                duration = query.pop("duration", None)
+                data, hit = synth.render(url.path[len("/render/"):], duration, query)
+                seconds = time.perf_counter() - start
+                synth.latency.record("hit" if hit else "miss", seconds)
+                self._send(200, data, "audio/wav", {"X-Cache": "hit" if hit else "miss",
+                                                    "X-Render-Ms": f"{seconds * 1000:.3f}"})
+            else:
+                self._error(404, f"Not found: {url.path}")
+        except graph.SpecError as e:
+            synth.latency.record("error", time.perf_counter() - start)
+            self._error(404 if str(e).startswith("Unknown sound") else 400, str(e))
+        except ValueError as e:
+            synth.latency.record("error", time.perf_counter() - start)
+            self._error(400, str(e))
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict | None = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str):
+        self._send(status, json.dumps({"error": message}).encode(), "application/json")
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class SoundServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, synthesizer: Synthesizer, verbose: bool = False):
+        self.synthesizer = synthesizer
+        self.verbose = verbose
+        super().__init__(address, RequestHandler)
+
+
+class _UnixRequestHandler(RequestHandler):
+    disable_nagle_algorithm = False  # not a TCP socket
+
+
+class UnixSoundServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, synthesizer: Synthesizer, verbose: bool = False):
+        self.synthesizer = synthesizer
+        self.verbose = verbose
+        if os.path.exists(path):
+            os.remove(path)  # a stale socket from a previous run
+        super().__init__(path, _UnixRequestHandler)
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+class SoundClientError(RuntimeError):
+    """The daemon rejected a request."""
+
+
+class SoundClient:
+    """Minimal client for a running daemon, over TCP or a Unix socket.
+
+    Reuses one keep-alive connection, so it is not thread-safe; give every
+    thread its own client.
+    """
+
+    def __init__(self, port: int = DEFAULT_PORT, host: str = "127.0.0.1", socket_path: str | None = None,
+                 timeout: float = 10.0):
+        if socket_path:
+            self._conn = _UnixConnection(socket_path, timeout)
+        else:
+            self._conn = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _get(self, path: str):
+        self._conn.request("GET", path)
+        response = self._conn.getresponse()
+        body = response.read()
+        if response.status != 200:
+            try:
+                message = json.loads(body)["error"]
+            except (ValueError, KeyError):
+                message = body.decode(errors="replace")
+            raise SoundClientError(f"{response.status}: {message}")
+        return response, body
+
+    def sounds(self) -> dict:
+        return json.loads(self._get("/sounds")[1])
+
+    def metrics(self) -> dict:
+        return json.loads(self._get("/metrics")[1])
+
+    def render(self, name: str, duration: float | None = None, **params) -> bytes:
+        """WAV bytes of a sound variant."""
+        return self.render_info(name, duration, **params)[0]
+
+    def render_info(self, name: str, duration: float | None = None, **params):
+        """(WAV bytes, cache hit, server-side milliseconds) for a sound variant."""
+        query = dict(params, **({"duration": duration} if duration else {}))
+        path = f"/render/{quote(name)}" + (f"?{urlencode(query)}" if query else "")
+        response, body = self._get(path)
+        return body, response.getheader("X-Cache") == "hit", float(response.getheader("X-Render-Ms"))
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def bench(repeat: int = 50) -> list:
+    """Start a warmed daemon on a free port and time cached and cold requests per variant.
+
+    Every one-shot's default variant is pre-rendered, as at startup; each
+    param at its bounds (and a few values in between) is rendered cold.
+    Returns the variants over HIT_BUDGET_MS or COLD_BUDGET_MS.
+    """
+    synthesizer = Synthesizer()
+    start = time.perf_counter()
+    count = synthesizer.warm()
+    print(f"Pre-rendered {count} default sounds in {(time.perf_counter() - start) * 1000:.0f}ms\n")
+    server = SoundServer(("127.0.0.1", 0), synthesizer)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    variants = [(name, {}) for name in synthesizer.one_shots()]
+    for name in synthesizer.one_shots():
+        for param, bounds in synthesizer.compiler.sounds[name].get("params", {}).items():
+            variants += [(name, {param: bounds["min"]}), (name, {param: bounds["max"]})]
+    variants += [("typewriter", {"keys": 4}), ("success", {"pitch": 1.5})]
+    over = []
+    try:
+        with SoundClient(server.server_address[1]) as client:
+            print(f"{'variant':<24}{'cold':>9}{'cached':>9}{'round trip':>12}  status")
+            for name, params in variants:
+                _, hit, cold = client.render_info(name, **params)
+                cached, trips = [], []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    _, _, ms = client.render_info(name, **params)
+                    trips.append(time.perf_counter() - start)
+                    cached.append(ms)
+                label = name + "".join(f" {k}={v}" for k, v in params.items())
+                problems = []
+                if statistics.median(cached) > HIT_BUDGET_MS:
+                    problems.append(f"hit over {HIT_BUDGET_MS:g}ms")
+                if not hit and cold > COLD_BUDGET_MS:
+                    problems.append(f"cold over {COLD_BUDGET_MS:g}ms")
+                if problems:
+                    over.append(label)
+                first = f"{'-':>9}" if hit else f"{cold:>7.2f}ms"
+                print(f"{label:<24}{first}{statistics.median(cached):>7.3f}ms"
+                      f"{statistics.median(trips) * 1000:>10.3f}ms  {', '.join(problems) or 'ok'}")
+            print()
+            for outcome, stats in client.metrics()["latency"].items():
+                print(f"{outcome:<8}" + "  ".join(f"{key} {value}" for key, value in stats.items()))
+    finally:
+        server.shutdown()
+        server.server_close()
+    if over:
+        print(f"\n{len(over)} variant(s) over budget: {', '.join(over)}")
+    return over
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"TCP port on 127.0.0.1 (default: {DEFAULT_PORT})")
+    parser.add_argument("--socket", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--cache-mb", type=float, default=CACHE_BYTES / 2**20, metavar="MB",
+                        help=f"render cache size (default: {CACHE_BYTES >> 20})")
+    parser.add_argument("--no-warm", dest="warm", action="store_false",
+                        help="do not pre-render the default one-shots at startup")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    parser.add_argument("--bench", action="store_true", help="measure cold and cached latency, then exit")
+    args = parser.parse_args()
+
+    if args.bench:
+        if bench():
+            sys.exit(1)
+        return
+    synthesizer = Synthesizer(cache_bytes=int(args.cache_mb * 2**20))
+    if args.warm:
+        print(f"Pre-rendered {synthesizer.warm()} default sounds")
+    if args.socket:
+        server = UnixSoundServer(args.socket, synthesizer, args.verbose)
+        where = args.socket
+    else:
+        server = SoundServer(("127.0.0.1", args.port), synthesizer, args.verbose)
+        where = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"Serving {len(synthesizer.compiler.sounds)} sounds on {where}")
+    signal.signal(signal.SIGTERM, signal.default_int_handler)  # clean up the socket on kill too
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""Offline soundtrack renderer: a recorded session as one audio file.
+
+Reads a Copilot CLI events.jsonl, maps every event to the sound the app
+would play for it (a mirror of getSoundForEvent in
+src/renderer/audio/event-sound-map.ts and SOUND_DEFS in audio-manager.ts;
+keep them in sync) and mixes those sounds at the events' timestamps over
+the looping ambient bed.
+
+The mixer is a sample-accurate overlap-add: each cue starts at the sample
+its timestamp falls on, and every output block sums the parts of the
+voices that overlap it. At most `max_voices` voices sound at once; a new
+voice steals the oldest one, which fades out over STEAL_FADE seconds
+instead of being cut off. Events, voices and output are all streamed: the
+file is read line by line, only the sounding voices are held, and blocks
+go straight to the WAV writer or ffmpeg, so memory does not grow with
+the length of the session. Sounds are rendered once from their graphs
+(generate_sounds.SOUNDS) and shared by every voice that plays them.
+
+Usage:
+    python3 soundtrack.py ~/.copilot/session-state/<id>/events.jsonl -o session.mp3
+    python3 soundtrack.py events.jsonl -o session.wav --ambient ambient-ocean --max-gap 10
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from encoder import TARGETS, EncodeSink
+from generate_sounds import SOUNDS
+from stream import BLOCK_SIZE
+from synth import SAMPLE_RATE
+from wavio import WavWriter
+
+MAX_VOICES = 8
+STEAL_FADE = 0.005
+DEFAULT_VOLUME = 0.5  # AppSettings.audioVolume default
+
+# Sound id -> (sound, volume), as in SOUND_DEFS
+SOUND_DEFS = {
+    "ambient-island": ("ambient-island", 0.3),
+    "ambient-ocean": ("ambient-ocean", 0.4),
+    "welcome": ("chime", 0.3),
+    "session-start": ("monkey-call", 1.0),
+    "dolphin-call": ("dolphin-call", 1.0),
+    "bubble": ("bubble", 1.0),
+    "user-message": ("chime", 1.0),
+    "tool-edit": ("typewriter", 1.0),
+    "tool-bash": ("coconut-crack", 1.0),
+    "tool-success": ("success", 1.0),
+    "tool-error": ("error", 1.0),
+    "session-end": ("goodbye", 1.0),
+}
+
+_EVENT_SOUNDS = {
+    "session.start": "session-start",
+    "user.message": "user-message",
+    "assistant.turn_start": "user-message",
+    "assistant.turn_end": "tool-success",
+    "session.shutdown": "session-end",
+}
+
+
+def sound_for_event(event_type: str, data: dict) -> str | None:
+    """Sound id for an event, or None (same rules as getSoundForEvent)."""
+    if event_type == "tool.execution_start":
+        tool = data.get("toolName") or ""
+        if tool in ("edit", "create"):
+            return "tool-edit"
+        return "tool-bash" if tool == "bash" else None
+    if event_type == "tool.execution_complete":
+        return "tool-error" if data.get("success") is False else "tool-success"
+    return _EVENT_SOUNDS.get(event_type)
+
+
+def read_events(lines):
+    """(seconds since the epoch, type, data) for every well-formed event.
+
+    Lines that are not JSON objects with a string type and an ISO
+    timestamp are skipped, like the app's parser does.
+    """
+    for line in lines:
+        try:
+            event = json.loads(line)
+            seconds = datetime.fromisoformat(event["timestamp"].replace("Z", "+00:00")).timestamp()
+            event_type = event["type"]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            continue
+        data = event.get("data")
+        if isinstance(event_type, str):
+            yield seconds, event_type, data if isinstance(data, dict) else {}
+
+
+def cues(events, max_gap: float | None = None, sample_rate: int = SAMPLE_RATE):
+    """(start sample, sound id) for every event that has a sound.
+
+    Times are relative to the first event. With max_gap, a pause between
+    consecutive events longer than that is shortened to max_gap seconds.
+    """
+    previous = None
+    elapsed = 0.0
+    for seconds, event_type, data in events:
+        if previous is None:
+            previous = seconds
+        step = seconds - previous
+        elapsed += min(step, max_gap) if max_gap is not None else step
+        previous = seconds
+        sound_id = sound_for_event(event_type, data)
+        if sound_id is not None:
+            yield round(elapsed * sample_rate), sound_id
+
+
+class _Voice:
+    __slots__ = ("start", "stop", "samples", "gain", "fade_at")
+
+    def __init__(self, start: int, samples: np.ndarray, gain: float):
+        self.start = start
+        self.stop = start + len(samples)
+        self.samples = samples
+        self.gain = gain
+        self.fade_at = None  # set when stolen: sample where the fade-out starts
+
+
+class Mixer:
+    """Overlap-add of one-shot voices over an optional looping bed."""
+
+    def __init__(self, volume: float = DEFAULT_VOLUME, ambient: str | None = "ambient-island",
+                 max_voices: int = MAX_VOICES, block_size: int = BLOCK_SIZE, sample_rate: int = SAMPLE_RATE):
+        self.volume = volume
+        self.max_voices = max_voices
+        self.block_size = block_size
+        self.fade = max(1, int(STEAL_FADE * sample_rate))
+        self._buffers = {}
+        self.bed = None
+        if ambient:
+            sound, gain = SOUND_DEFS[ambient]
+            self.bed = SOUNDS[sound]()[0] * (gain * volume)
+        self.played = 0
+        self.stolen = 0
+        self.late = 0
+
+    def buffer(self, sound_id: str) -> np.ndarray:
+        """A sound's samples, rendered on first use and shared by all its voices."""
+        if sound_id not in self._buffers:
+            sound, _ = SOUND_DEFS[sound_id]
+            self._buffers[sound_id] = SOUNDS[sound]()[0]
+        return self._buffers[sound_id]
+
+    def _start(self, active: list, start: int, sound_id: str):
+        sounding = [v for v in active if v.fade_at is None]
+        if len(sounding) >= self.max_voices:
+            oldest = min(sounding, key=lambda v: v.start)
+            oldest.fade_at = max(start, oldest.start)
+            oldest.stop = min(oldest.stop, oldest.fade_at + self.fade)
+            self.stolen += 1
+        active.append(_Voice(start, self.buffer(sound_id), SOUND_DEFS[sound_id][1] * self.volume))
+        self.played += 1
+
+    def _bed(self, pos: int, end: int) -> np.ndarray:
+        """Samples pos..end of the looped bed (a fresh array to mix into)."""
+        if self.bed is None:
+            return np.zeros(end - pos)
+        out = np.empty(end - pos)
+        filled = 0
+        while filled < len(out):  # slice copies; np.take(mode="wrap") is ~30x slower
+            i = (pos + filled) % len(self.bed)
+            n = min(len(out) - filled, len(self.bed) - i)
+            out[filled:filled + n] = self.bed[i:i + n]
+            filled += n
+        return out
+
+    def _add(self, out: np.ndarray, pos: int, voice: _Voice):
+        lo, hi = max(voice.start, pos), min(voice.stop, pos + len(out))
+        if lo >= hi:
+            return
+        part = voice.samples[lo - voice.start:hi - voice.start] * voice.gain
+        if voice.fade_at is not None and hi > voice.fade_at:
+            part *= np.clip((voice.fade_at + self.fade - np.arange(lo, hi)) / self.fade, 0.0, 1.0)
+        out[lo - pos:hi - pos] += part
+
+    def blocks(self, cues):
+        """Mix (start sample, sound id) cues, sorted by start, into output blocks.
+
+        Output runs until the last voice has finished. A cue that starts
+        before audio already written (an out-of-order event) plays at the
+        current position and is counted as late.
+        """
+        cues = iter(cues)
+        pending = next(cues, None)
+        active = []
+        pos = 0
+        while pending is not None or active:
+            end = pos + self.block_size
+            while pending is not None and pending[0] < end:
+                start, sound_id = pending
+                if start < pos:
+                    start = pos
+                    self.late += 1
+                self._start(active, start, sound_id)
+                pending = next(cues, None)
+            if pending is None and active:
+                end = min(end, max(v.stop for v in active))  # trim the last block
+            out = self._bed(pos, end)
+            for voice in active:
+                self._add(out, pos, voice)
+            active = [v for v in active if v.stop > end]
+            yield out
+            pos = end
+
+
+def render(events_path: str, output: str, volume: float = DEFAULT_VOLUME, ambient: str | None = "ambient-island",
+           max_voices: int = MAX_VOICES, max_gap: float | None = None) -> dict:
+    """Render a session to `output` (.wav, or any encoder target extension). Returns stats."""
+    ext = os.path.splitext(output)[1].lstrip(".").lower()
+    targets = {info[0]: name for name, info in TARGETS.items()}
+    if ext != "wav" and ext not in targets:
+        raise ValueError(f"Unsupported output format: .{ext} (use .wav or .{', .'.join(targets)})")
+
+    start = time.perf_counter()
+    mixer = Mixer(volume, ambient, max_voices)
+    samples = 0
+    peak = 0.0
+    with open(events_path, encoding="utf-8", errors="replace") as f:
+        blocks = mixer.blocks(cues(read_events(f), max_gap))
+        sink = WavWriter(output, SAMPLE_RATE) if ext == "wav" else EncodeSink({targets[ext]: output}, SAMPLE_RATE)
+        with sink:
+            for block in blocks:
+                sink.write(block)
+                samples += len(block)
+                peak = max(peak, float(np.abs(block).max()))
+    return {"output": output, "cues": mixer.played, "stolen": mixer.stolen, "late": mixer.late,
+            "duration": samples / SAMPLE_RATE, "peak": peak, "seconds": time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("events", help="events.jsonl of a recorded session")
+    parser.add_argument("-o", "--output", default="soundtrack.mp3", help="output file (.wav, .mp3, .opus, .webm)")
+    parser.add_argument("--ambient", default="ambient-island", choices=["ambient-island", "ambient-ocean", "none"],
+                        help="looping bed under the event sounds (default: ambient-island)")
+    parser.add_argument("--volume", type=float, default=DEFAULT_VOLUME, help=f"master volume (default: {DEFAULT_VOLUME})")
+    parser.add_argument("--max-voices", type=int, default=MAX_VOICES, metavar="N",
+                        help=f"voices sounding at once before the oldest is stolen (default: {MAX_VOICES})")
+    parser.add_argument("--max-gap", type=float, metavar="S", help="shorten pauses between events to at most S seconds")
+    args = parser.parse_args()
+    if args.max_voices < 1:
+        parser.error("--max-voices must be at least 1")
+
+    try:
+        stats = render(args.events, args.output, args.volume, None if args.ambient == "none" else args.ambient,
+                       args.max_voices, args.max_gap)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"{stats['output']}: {stats['duration']:.1f}s, {stats['cues']} sounds "
+          f"({stats['stolen']} voices stolen, {stats['late']} late), peak {stats['peak']:.2f}, "
+          f"rendered in {stats['seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
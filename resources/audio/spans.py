@@ -0,0 +1,225 @@
+"""Opt-in profiling spans for the build and visualization pipelines.
+
+Code marks its stages with spans:
+
+    with spans.span("encode", sound=name):
+        ...
+    stream = spans.blocks(stream, "filter", sound=name)   # time every block a stage yields
+    spans.add(bytes=len(data))                            # count into the open span
+
+Each span records its wall time, the CPU time of its thread, the CPU time
+of child processes it waited for (ffmpeg) and the counters added while it
+was open; counters also roll up into the enclosing spans. With memory=True
+it also records, through tracemalloc, the net bytes allocated and the peak
+above the span's start (NumPy reports its buffers to tracemalloc too).
+Spans nest, so a stage's self time is its wall time minus its children's.
+
+Until enable() is called, span() hands back a shared no-op context,
+blocks() returns the stream itself and add() returns at once: a disabled
+span costs one global lookup. Traces export as Chrome trace-event JSON
+(load in chrome://tracing or https://ui.perfetto.dev) and summarize as a
+table of stages.
+"""
+
+import contextlib
+import os
+import threading
+import time
+import tracemalloc
+
+from build_cache import write_json_atomic
+
+_enabled = False
+_memory = False
+_events = []
+_local = threading.local()
+_NULL = contextlib.nullcontext()
+
+
+def enable(memory: bool = False):
+    """Start recording spans (and allocations, with memory=True)."""
+    global _enabled, _memory
+    _enabled = True
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def memory() -> bool:
+    return _memory
+
+
+class _Span:
+    __slots__ = ("name", "args", "start", "cpu", "children_cpu", "mem", "peak", "child_wall")
+
+    def __init__(self, name: str, args: dict):
+        self.name = name
+        self.args = args
+        self.child_wall = 0
+
+    def __enter__(self):
+        stack = _stack()
+        if stack and "sound" in stack[-1].args:
+            self.args.setdefault("sound", stack[-1].args["sound"])
+        if _memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.mem = self.peak = current
+        stack.append(self)
+        times = os.times()
+        self.children_cpu = times.children_user + times.children_system
+        self.cpu = time.thread_time_ns()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        cpu = time.thread_time_ns() - self.cpu
+        times = os.times()
+        stack = _stack()
+        stack.pop()
+        wall = end - self.start
+        args = self.args
+        args["cpu_ms"] = round(cpu / 1e6, 3)
+        args["self_ms"] = round((wall - self.child_wall) / 1e6, 3)
+        children_cpu = times.children_user + times.children_system - self.children_cpu
+        if children_cpu:
+            args["child_cpu_ms"] = round(children_cpu * 1000, 1)
+        if _memory:
+            current, peak = tracemalloc.get_traced_memory()
+            self.peak = max(self.peak, peak)
+            args["alloc_bytes"] = current - self.mem
+            args["peak_bytes"] = self.peak - self.mem
+        if stack:
+            parent = stack[-1]
+            parent.child_wall += wall
+            if "bytes" in args:
+                parent.args["bytes"] = parent.args.get("bytes", 0) + args["bytes"]
+            if _memory:
+                parent.peak = max(parent.peak, self.peak)
+        _events.append({
+            "name": self.name, "cat": "build", "ph": "X", "ts": self.start / 1000, "dur": wall / 1000,
+            "pid": os.getpid(), "tid": threading.get_native_id(), "args": args,
+        })
+        return False
+
+
+def _stack() -> list:
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+
+def span(name: str, **args):
+    """Context manager timing one stage; args (e.g. sound=...) label it in the trace."""
+    if not _enabled:
+        return _NULL
+    return _Span(name, args)
+
+
+def add(**counters):
+    """Add counters (e.g. bytes=...) to the innermost open span."""
+    if not _enabled:
+        return
+    stack = _stack()
+    if stack:
+        args = stack[-1].args
+        for key, value in counters.items():
+            args[key] = args.get(key, 0) + value
+
+
+def blocks(stream, name: str, **args):
+    """Wrap an iterator so each item it yields is produced inside a span.
+
+    For stream stages: upstream stages run inside the span too and show up
+    as its children, so the stage's own work is its self time.
+    """
+    if not _enabled:
+        return stream
+    return _traced(iter(stream), name, args)
+
+
+def _traced(iterator, name: str, args: dict):
+    while True:
+        with _Span(name, dict(args)):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def call(fn, *args, **kwargs):
+    """Run fn and return (its result, the spans it recorded): for process pool workers."""
+    start = len(_events)
+    result = fn(*args, **kwargs)
+    recorded = _events[start:]
+    del _events[start:]
+    return result, recorded
+
+
+def merge(events: list):
+    """Add spans recorded in another process (see call)."""
+    _events.extend(events)
+
+
+def events() -> list:
+    return list(_events)
+
+
+def write_trace(path: str) -> str:
+    """Write the recorded spans as Chrome trace-event JSON."""
+    return write_json_atomic(path, {"traceEvents": _events, "displayTimeUnit": "ms"}, indent=None)
+
+
+def summary(recorded: list | None = None) -> dict:
+    """{stage: totals} of calls, wall/self/CPU milliseconds, bytes and peak memory."""
+    totals = {}
+    for event in recorded if recorded is not None else _events:
+        args = event["args"]
+        row = totals.setdefault(event["name"], {"calls": 0, "wall_ms": 0.0, "self_ms": 0.0, "cpu_ms": 0.0,
+                                                "child_cpu_ms": 0.0, "bytes": 0, "peak_bytes": 0})
+        row["calls"] += 1
+        row["wall_ms"] += event["dur"] / 1000
+        row["self_ms"] += args["self_ms"]
+        row["cpu_ms"] += args["cpu_ms"]
+        row["child_cpu_ms"] += args.get("child_cpu_ms", 0.0)
+        row["bytes"] += args.get("bytes", 0)
+        row["peak_bytes"] = max(row["peak_bytes"], args.get("peak_bytes", 0))
+    return totals
+
+
+def by_sound(recorded: list | None = None) -> dict:
+    """{sound: milliseconds} of self time spent on each sound, across all its stages."""
+    totals = {}
+    for event in recorded if recorded is not None else _events:
+        sound = event["args"].get("sound")
+        if sound is not None:
+            totals[sound] = totals.get(sound, 0.0) + event["args"]["self_ms"]
+    return totals
+
+
+def print_summary(recorded: list | None = None):
+    """Tables of stages by self time (the time spent in the stage itself) and of sounds."""
+    totals = summary(recorded)
+    print(f"\n{'stage':<18}{'calls':>7}{'self':>10}{'wall':>10}{'cpu':>10}{'ffmpeg':>9}{'written':>10}"
+          + (f"{'peak':>9}" if _memory else ""))
+    for name, row in sorted(totals.items(), key=lambda item: -item[1]["self_ms"]):
+        line = (f"{name:<18}{row['calls']:>7}{row['self_ms']:>8.1f}ms{row['wall_ms']:>8.1f}ms"
+                f"{row['cpu_ms']:>8.1f}ms{row['child_cpu_ms']:>7.0f}ms{row['bytes'] / 1024:>8.0f}KB")
+        if _memory:
+            line += f"{row['peak_bytes'] / 2**20:>7.1f}MB"
+        print(line)
+    sounds = by_sound(recorded)
+    if sounds:
+        print(f"\n{'sound':<18}{'time':>10}")
+        for sound, ms in sorted(sounds.items(), key=lambda item: -item[1]):
+            print(f"{sound:<18}{ms:>8.1f}ms")
@@ -0,0 +1,100 @@
+"""Audio sprite: all one-shot sounds packed into one file.
+
+The app loads sprite.mp3 once and plays slices of it through Howler's
+sprite API, using the offsets in sprite.json:
+
+    {"src": ["sprite.mp3"], "sprite": {"bubble": [100, 250], ...}}
+
+Each entry is [offset, duration] in milliseconds. Sounds start on a 10 ms
+boundary (441 samples at 44.1 kHz), so offsets are exact whole numbers,
+and are separated by GAP seconds of silence. Every slot runs on into that
+silence by TAIL seconds, so a decoder that does not trim the MP3 encoder
+delay still plays the end of the sound rather than cutting it off.
+"""
+
+import math
+import os
+import time
+
+import numpy as np
+
+from build_cache import write_json_atomic
+from decoder import decode
+from synth import SAMPLE_RATE
+
+SPRITE_NAME = "sprite"
+MANIFEST_NAME = "sprite.json"
+GAP = 0.1
+TAIL = 0.05
+ALIGN_MS = 10
+
+
+def layout(lengths: dict, sample_rate: int = SAMPLE_RATE) -> dict:
+    """Sample offset of each sound: {name: (start, length)}, in the given order."""
+    align = sample_rate * ALIGN_MS // 1000
+    gap = int(sample_rate * GAP)
+    slots = {}
+    pos = gap  # lead-in silence too, for the encoder delay of the first sound
+    for name, length in lengths.items():
+        pos = -(-pos // align) * align
+        slots[name] = (pos, length)
+        pos += length + gap
+    return slots
+
+
+def pack(rendered: dict, sample_rate: int = SAMPLE_RATE):
+    """Concatenate {name: samples} into one buffer. Returns (samples, slots)."""
+    slots = layout({name: len(samples) for name, samples in rendered.items()}, sample_rate)
+    end = max((start + length for start, length in slots.values()), default=0)
+    out = np.zeros(end + int(sample_rate * GAP))
+    for name, samples in rendered.items():
+        start, length = slots[name]
+        out[start:start + length] = samples
+    return out, slots
+
+
+def manifest(slots: dict, files: list[str], sample_rate: int = SAMPLE_RATE) -> dict:
+    """Howler sprite definition for the packed slots."""
+    tail = int(sample_rate * TAIL)
+    sprite = {
+        name: [start * 1000 // sample_rate, math.ceil((length + tail) * 1000 / sample_rate)]
+        for name, (start, length) in slots.items()
+    }
+    return {"src": [os.path.basename(path) for path in files], "sprite": sprite}
+
+
+def write_manifest(data: dict, directory: str) -> str:
+    """Write sprite.json atomically and return its path."""
+    return write_json_atomic(os.path.join(directory, MANIFEST_NAME), data)
+
+
+def _decode_cost(paths: list[str], sample_rate: int):
+    """(bytes fetched, decode seconds, decoded float32 bytes) for decoding every path."""
+    fetched = decoded = 0
+    start = time.perf_counter()
+    for path in paths:
+        fetched += os.path.getsize(path)
+        decoded += decode(path, sample_rate).nbytes
+    return fetched, time.perf_counter() - start, decoded
+
+
+def startup_report(one_shots: list[str], loops: list[str], directory: str,
+                   sample_rate: int = SAMPLE_RATE):
+    """Print what app startup fetches and decodes with separate files vs the sprite.
+
+    Before, every sound was a preloaded Web Audio Howl, so all eleven files
+    (ambients included) were fetched and fully decoded to float32 at startup.
+    After, the sprite is decoded once and the ambients stream through an
+    HTML5 audio element when played. ffmpeg decoding stands in for the
+    browser's decodeAudioData.
+    """
+    files = [os.path.join(directory, f"{name}.mp3") for name in one_shots + loops]
+    before = _decode_cost(files, sample_rate)
+    after = _decode_cost([os.path.join(directory, f"{SPRITE_NAME}.mp3")], sample_rate)
+    print(f"\n{'startup':<20}{'files':>6}{'fetched':>10}{'decode':>10}{'decoded':>10}")
+    for label, count, (fetched, seconds, decoded) in [
+        ("separate files", len(files), before),
+        ("sprite + streamed", 1, after),
+    ]:
+        print(f"{label:<20}{count:>6}{fetched / 1024:>8.0f}KB{seconds * 1000:>8.0f}ms"
+              f"{decoded / 2**20:>8.1f}MB")
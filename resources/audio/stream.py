@@ -0,0 +1,134 @@
+"""Block-streaming render stages for long sounds.
+
+A stream is an iterator of (start, block) pairs: `block` holds the samples
+from index `start` onwards. Stages wrap a stream and yield transformed
+blocks, so a layered sound renders with memory bounded by the block size
+rather than its duration:
+
+    stream = source(n, lambda t: noise(len(t), bed) * 0.1)
+    stream = process(stream, RunningAverage(20))
+    stream = add_events(stream, chirps)
+    stream = add_stream(stream, upsample(rumble, Upsampler(4), n))   # a layer rendered at 1/4 rate
+    stream = fade_edges(stream, n, fade, fade)
+"""
+
+import numpy as np
+
+from synth import SAMPLE_RATE
+
+BLOCK_SIZE = 8192
+
+
+def source(n: int, render, block_size: int = BLOCK_SIZE, sample_rate: int = SAMPLE_RATE):
+    """Stream of n samples where each block is render(t) for its time slice."""
+    for start in range(0, n, block_size):
+        t = np.arange(start, min(start + block_size, n)) / sample_rate
+        yield start, render(t)
+
+
+def mix(stream, render, sample_rate: int = SAMPLE_RATE):
+    """Add render(t) on top of every block."""
+    for start, block in stream:
+        t = np.arange(start, start + len(block)) / sample_rate
+        yield start, block + render(t)
+
+
+def process(stream, processor):
+    """Run every block through a stateful processor such as RunningAverage."""
+    for start, block in stream:
+        yield start, processor.process(block)
+
+
+def add_events(stream, events, sample_rate: int = SAMPLE_RATE):
+    """Mix short sounds into the blocks they overlap.
+
+    `events` is an iterable of (si, ei, render) sorted by si; render(lt)
+    returns the event's samples for local times lt (seconds since si) and
+    is called once per block the event spans. Overlapping events are added
+    in list order. Only events still sounding are kept in memory. Events
+    covering the same local range in a block share one lt array, so render
+    must not modify it.
+    """
+    events = iter(events)
+    pending = next(events, None)
+    active = []
+    for start, block in stream:
+        stop = start + len(block)
+        while pending is not None and pending[0] < stop:
+            active.append(pending)
+            pending = next(events, None)
+        axes = {}
+        for si, ei, render in active:
+            lo, hi = max(si, start), min(ei, stop)
+            if lo < hi:
+                local = (lo - si, hi - si)
+                if local not in axes:
+                    axes[local] = np.arange(*local) / sample_rate
+                block[lo - start:hi - start] += render(axes[local])
+        active = [event for event in active if event[1] > stop]
+        yield start, block
+
+
+def upsample(stream, upsampler, n: int):
+    """A stream at upsampler.factor times the rate of `stream`, cut to n samples.
+
+    The upsampler's delay is taken out, and its lookahead past the end of
+    the input is fed with silence, so sample i lines up with input sample
+    i / factor. Blocks come out upsampler.factor times as long as they go in.
+    """
+    skip = upsampler.delay
+    start = 0
+
+    def emit(block):
+        nonlocal skip, start
+        dropped = min(skip, len(block))
+        skip -= dropped
+        block = block[dropped:dropped + n - start]
+        if len(block):
+            yield start, block
+            start += len(block)
+
+    for _, block in stream:
+        yield from emit(upsampler.process(block))
+    yield from emit(upsampler.process(np.zeros(upsampler.taps // 2 + 1)))
+
+
+def add_stream(stream, other):
+    """Add `other` to `stream` sample for sample, whatever the block sizes of each."""
+    other = iter(other)
+    pending = np.zeros(0)
+    for start, block in stream:
+        while len(pending) < len(block):
+            item = next(other, None)
+            if item is None:
+                break
+            pending = np.concatenate([pending, item[1]])
+        take = min(len(block), len(pending))
+        block[:take] += pending[:take]
+        pending = pending[take:]
+        yield start, block
+
+
+def fade_edges(stream, n: int, fade_in: int, fade_out: int):
+    """Linear fade over the first fade_in and last fade_out of n samples."""
+    for start, block in stream:
+        stop = start + len(block)
+        if start < fade_in:
+            idx = np.arange(start, min(stop, fade_in))
+            block[:len(idx)] *= idx / fade_in
+        if stop > n - fade_out:
+            idx = np.arange(max(start, n - fade_out), stop)
+            block[len(block) - len(idx):] *= (n - 1 - idx) / fade_out
+        yield start, block
+
+
+def blocks(stream):
+    """Drop the start offsets, e.g. to feed a WavWriter."""
+    for _, block in stream:
+        yield block
+
+
+def collect(stream) -> np.ndarray:
+    """Render a whole stream into one array."""
+    parts = [block for _, block in stream]
+    return np.concatenate(parts) if parts else np.zeros(0)
@@ -0,0 +1,159 @@
+"""Vectorized synthesis primitives used by the sound graphs (graph.py).
+
+Every primitive works on whole NumPy arrays instead of single samples, so a
+graph node is a handful of array expressions rather than a per-sample loop.
+"""
+
+import hashlib
+import math
+
+import numpy as np
+
+SAMPLE_RATE = 44100
+
+
+def silence(duration: float, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Zero buffer long enough for `duration` seconds."""
+    return np.zeros(int(sample_rate * duration))
+
+
+def timeline(n: int, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Sample times in seconds for a buffer of n samples."""
+    return np.arange(n) / sample_rate
+
+
+def span(start: float, dur: float, n: int, sample_rate: int = SAMPLE_RATE):
+    """Index range (si, ei) of a note starting at `start` seconds, clipped to n."""
+    si = int(start * sample_rate)
+    return si, min(si + int(dur * sample_rate), n)
+
+
+def segment(start: float, dur: float, n: int, sample_rate: int = SAMPLE_RATE):
+    """Index range and local time axis of a note starting at `start` seconds.
+
+    Returns (si, ei, lt) where samples[si:ei] is the note clipped to the
+    buffer length n and lt is the time since the note started.
+    """
+    si, ei = span(start, dur, n, sample_rate)
+    return si, ei, np.arange(max(0, ei - si)) / sample_rate
+
+
+def sine(freq, t: np.ndarray, harmonic: int = 1) -> np.ndarray:
+    """Sine at `freq` Hz (scalar or per-sample array) evaluated at times t.
+
+    `harmonic` selects an integer multiple of freq, e.g. 2 for the octave.
+    """
+    if harmonic == 1:
+        return np.sin(2 * math.pi * freq * t)
+    return np.sin(2 * math.pi * freq * harmonic * t)
+
+
+def sweep(f1: float, f2: float, frac: np.ndarray) -> np.ndarray:
+    """Linear frequency sweep from f1 to f2 as frac goes from 0 to 1."""
+    return f1 + (f2 - f1) * frac
+
+
+def bell(frac: np.ndarray, power: float = 1.0) -> np.ndarray:
+    """Half-sine bell envelope over frac in [0, 1), optionally shaped by power."""
+    env = np.sin(math.pi * frac)
+    if power != 1.0:
+        env = env ** power
+    return env
+
+
+def exp_decay(t: np.ndarray, rate: float) -> np.ndarray:
+    """Exponential decay envelope exp(-rate * t)."""
+    return np.exp(-rate * t)
+
+
+def envelope(t: np.ndarray, attack: float, decay: float, duration: float) -> np.ndarray:
+    """Simple attack-decay envelope evaluated over a time array."""
+    env = np.ones_like(t)
+    rise = t < attack
+    env[rise] = t[rise] / attack
+    fall = ~rise & (t > duration - decay)
+    env[fall] = np.maximum(0, (duration - t[fall]) / decay)
+    return env
+
+
+def seed_for(name: str) -> int:
+    """Stable default seed derived from a sound's name."""
+    return int.from_bytes(hashlib.sha256(name.encode("utf-8")).digest()[:8], "little")
+
+
+def generator(seed: int, *path: int) -> np.random.Generator:
+    """Independent random stream for one layer of one sound.
+
+    The stream depends only on the sound's seed and the layer's path (stage,
+    event and node index in graph.py), never on what else has been drawn
+    before, so layers can render in any order, in blocks or in separate
+    processes and still produce the same samples.
+    """
+    return np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed, spawn_key=path)))
+
+
+def noise(n: int, rng: np.random.Generator) -> np.ndarray:
+    """n uniform samples in [-1, 1) from rng.
+
+    Successive calls continue the stream, so drawing a layer's noise block
+    by block gives the same samples as drawing it all at once.
+    """
+    return rng.uniform(-1.0, 1.0, n)
+
+
+class RunningAverage:
+    """Boxcar low-pass: mean of the last `window` samples (fewer at the start).
+
+    Reproduces the add-then-subtract order of a scalar running sum, so the
+    result matches the original loop exactly rather than to within rounding.
+    The running sum and the last `window` inputs carry over between calls,
+    so a signal can be filtered in consecutive blocks.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.running = 0.0
+        self.history = np.zeros(0)
+        self.count = 0
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        w = self.window
+        m = len(x)
+        h = len(self.history)
+        ext = np.concatenate([self.history, x])
+        # Local index from which a sample also leaves the window
+        full = min(max(0, w - self.count), m)
+        # Interleave the samples entering and leaving the window in loop
+        # order: x[i] alone while filling up, then (x[i], -x[i-w]).
+        steps = np.empty(1 + full + 2 * (m - full))
+        steps[0] = self.running
+        steps[1:1 + full] = x[:full]
+        steps[1 + full::2] = x[full:]
+        steps[2 + full::2] = -ext[h + full - w:h + m - w]
+        running = np.cumsum(steps)[1:]
+
+        out = np.empty(m)
+        out[:full] = running[:full] / np.arange(self.count + 1, self.count + full + 1)
+        out[full:] = running[full + 1::2] / w
+        if m:
+            self.running = running[-1]
+        self.history = ext[-w:]
+        self.count += m
+        return out
+
+
+def running_average(x: np.ndarray, window: int) -> np.ndarray:
+    """Running-average low-pass over a whole buffer (see RunningAverage)."""
+    return RunningAverage(window).process(x)
+
+
+def fade_in(samples: np.ndarray, fade: int) -> np.ndarray:
+    """Linear fade over the first `fade` samples (in place)."""
+    samples[:fade] *= np.arange(fade) / fade
+    return samples
+
+
+def fade_out(samples: np.ndarray, fade: int) -> np.ndarray:
+    """Linear fade over the last `fade` samples (in place)."""
+    samples[len(samples) - fade:] *= (np.arange(fade) / fade)[::-1]
+    return samples
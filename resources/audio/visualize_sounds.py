@@ -1,104 +1,244 @@
 #!/usr/bin/env python3
 """Generate spectrograms and waveform visualizations for all Cocopilot sounds."""
 
+import argparse
+import base64
 import os
-import struct
-import wave
 import math
 import json
+import struct
+import zlib
+
+import numpy as np
+
+import build_cache
+import peaks
+import spans
+from decoder import DecodeError, decode
+from dsp import band_filters, hz_to_mel, mel_to_hz
+from wavio import read_wav
 
 SAMPLE_RATE = 44100
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, "visualizations")
 
+SOUND_NAMES = [
+    "ambient-island", "ambient-ocean", "monkey-call", "dolphin-call", "bubble", "chime",
+    "typewriter", "coconut-crack", "error", "success", "goodbye",
+]
+
+# Modules whose source affects the visualizations of an asset
+VIZ_MODULES = ["visualize_sounds.py", "peaks.py", "dsp.py", "decoder.py", "wavio.py"]
+
 
 def read_wav_samples(filename):
     """Read WAV file and return float samples [-1, 1]."""
     path = os.path.join(SCRIPT_DIR, filename)
     if not os.path.exists(path):
         return None, 0
-    with wave.open(path, "r") as wf:
-        n = wf.getnframes()
-        data = wf.readframes(n)
-        samples = []
-        for i in range(n):
-            val = struct.unpack_from("<h", data, i * 2)[0]
-            samples.append(val / 32767.0)
-        return samples, wf.getframerate()
-
-
-def compute_spectrogram(samples, sample_rate, window_size=1024, hop=512):
-    """Compute FFT-based spectrogram using numpy. Returns 2D array of magnitudes."""
-    import numpy as np
-    arr = np.array(samples)
+    samples, sample_rate = read_wav(path)
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    return samples, sample_rate
+
+
+def read_asset(name, source="mp3"):
+    """Samples of a built asset: the shipped <name>.mp3 (decoded via ffmpeg) or <name>.wav.
+
+    Returns (samples, sample_rate, path), or (None, 0, path) if the file is missing.
+    """
+    path = os.path.join(SCRIPT_DIR, f"{name}.{source}")
+    if source == "wav":
+        samples, sample_rate = read_wav_samples(f"{name}.wav")
+        return samples, sample_rate, path
+    if not os.path.exists(path):
+        return None, 0, path
+    return decode(path, SAMPLE_RATE), SAMPLE_RATE, path
+
+
+def compute_spectrogram(samples, sample_rate, window_size=1024, hop=512,
+                        scale="linear", bands=128, fmin=40.0, fmax=None, db=False):
+    """Compute an FFT-based spectrogram with one batched real FFT.
+
+    Returns (spectrogram, freqs, times): a float32 array of magnitudes shaped
+    (frames, bins), the centre frequency of each bin in Hz and the start time
+    of each frame in seconds. scale="log" or "mel" folds the linear bins into
+    `bands` triangular bands between fmin and fmax (default Nyquist); db=True
+    converts magnitudes to decibels.
+    """
+    arr = np.asarray(samples, dtype=np.float64)
+    if len(arr) < window_size:
+        arr = np.pad(arr, (0, window_size - len(arr)))
     n = len(arr)
     num_windows = max(1, (n - window_size) // hop)
     freq_bins = window_size // 2
     hann = np.hanning(window_size)
-    spectrogram = []
-    
-    for w in range(num_windows):
-        start = w * hop
-        windowed = arr[start:start + window_size] * hann
-        fft = np.fft.rfft(windowed)
-        magnitudes = (np.abs(fft[:freq_bins]) / window_size).tolist()
-        spectrogram.append(magnitudes)
-    
-    return spectrogram, freq_bins, sample_rate / 2
+
+    # Every frame is a strided view into arr; only the windowed copy is materialized
+    frames = np.lib.stride_tricks.sliding_window_view(arr, window_size)[::hop][:num_windows]
+    fft = np.fft.rfft(frames * hann, axis=1)
+    spectrogram = (np.abs(fft[:, :freq_bins]) / window_size).astype(np.float32)
+    freqs = np.arange(freq_bins) * (sample_rate / window_size)
+    times = np.arange(num_windows) * (hop / sample_rate)
+
+    if scale != "linear":
+        top = fmax or sample_rate / 2
+        if scale == "mel":
+            centers = mel_to_hz(np.linspace(hz_to_mel(fmin), hz_to_mel(top), bands + 2))
+        elif scale == "log":
+            centers = np.geomspace(fmin, top, bands + 2)
+        else:
+            raise ValueError(f"Unknown frequency scale: {scale}")
+        spectrogram = spectrogram @ band_filters(freqs, centers).T
+        freqs = centers[1:-1]
+    if db:
+        spectrogram = 20 * np.log10(np.maximum(spectrogram, 1e-10), dtype=np.float32)
+
+    return spectrogram, freqs, times
+
+
+# Viridis-inspired color ramp: dark purple → teal → green → yellow
+# (segment start, segment width, start color, end color)
+COLOR_RAMP = [
+    (0.0, 0.33, (68, 1, 84), (33, 145, 140)),
+    (0.33, 0.33, (33, 145, 140), (94, 201, 98)),
+    (0.66, 0.34, (94, 201, 98), (253, 231, 37)),
+]
+
+
+def spectrogram_colors(mag):
+    """Map magnitudes in [0, 1] to an (..., 3) array of 0-255 RGB values."""
+    segment = np.searchsorted([lo for lo, _, _, _ in COLOR_RAMP[1:]], mag, side="right")
+    rgb = np.zeros(mag.shape + (3,), dtype=np.int64)
+    for i, (lo, width, start, end) in enumerate(COLOR_RAMP):
+        sel = segment == i
+        t2 = (mag[sel] - lo) / width
+        for c in range(3):
+            rgb[sel, c] = (start[c] + t2 * (end[c] - start[c])).astype(np.int64)
+    return rgb
+
+
+BACKGROUND = (15, 15, 26)  # #0f0f1a
+SPECTROGRAM_RENDERERS = ["png", "runs", "rects"]
+
+
+def spectrogram_palette(levels):
+    """Background followed by `levels` evenly spaced ramp colors, as an (levels + 1, 3) array."""
+    return np.vstack([BACKGROUND, spectrogram_colors(np.arange(levels) / (levels - 1))])
+
+
+def quantize_spectrogram(raw, levels, columns=None):
+    """Map normalized magnitudes to palette indices (0 = below threshold).
+
+    With `columns`, frames are max-pooled down to at most that many so the
+    image has no more columns than it is drawn with.
+    """
+    if columns and len(raw) > columns:
+        edges = (np.arange(columns) * len(raw)) // columns
+        raw = np.maximum.reduceat(raw, edges, axis=0)
+    mag = np.minimum(1.0, raw.astype(np.float64) ** 0.3)
+    index = 1 + np.round(mag * (levels - 1)).astype(np.int64)
+    return np.where(raw >= 0.005, index, 0)
+
+
+def _png_chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+
+def encode_png(pixels, palette):
+    """Encode a (height, width) array of palette indices as an 8-bit indexed PNG."""
+    height, width = pixels.shape
+    rows = np.zeros((height, width + 1), dtype=np.uint8)  # filter byte 0 per scanline
+    rows[:, 1:] = pixels
+    header = struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", header)
+            + _png_chunk(b"PLTE", np.asarray(palette, dtype=np.uint8).tobytes())
+            + _png_chunk(b"IDAT", zlib.compress(rows.tobytes(), 9))
+            + _png_chunk(b"IEND", b""))
+
+
+def _cell_rects(raw, width, height):
+    """One <rect> per visible cell, each in its exact ramp color."""
+    num_time, num_freq = raw.shape
+    cell_w = width / num_time
+    cell_h = height / num_freq
+    ts, fs = np.nonzero(raw >= 0.005)
+    # Aggressive gamma correction for visibility
+    mag = np.minimum(1.0, raw[ts, fs].astype(np.float64) ** 0.3)
+    rgb = spectrogram_colors(mag)
+    return ''.join(
+        f'<rect x="{t * cell_w:.1f}" y="{height - (f + 1) * cell_h:.1f}" width="{cell_w + 0.5:.1f}" height="{cell_h + 0.5:.1f}" fill="rgb({r},{g},{b})"/>'
+        for t, f, (r, g, b) in zip(ts.tolist(), fs.tolist(), rgb.tolist())
+    )
 
 
-def spectrogram_to_svg(spectrogram, max_freq, duration, title, width=800, height=300):
-    """Convert spectrogram data to an SVG heatmap."""
-    if not spectrogram:
+def _run_rects(index, palette, width, height):
+    """One <rect> per run of equal palette index along each frequency row."""
+    num_time, num_freq = index.shape
+    cell_w = width / num_time
+    cell_h = height / num_freq
+    rows = index.T
+    # A run starts wherever the index differs from the cell before it
+    starts = np.ones(rows.shape, dtype=bool)
+    starts[:, 1:] = rows[:, 1:] != rows[:, :-1]
+    fs, ts = np.nonzero(starts)
+    lengths = np.diff(np.append(np.flatnonzero(starts.ravel()), rows.size))
+    values = rows[fs, ts]
+    keep = values > 0
+    colors = [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in palette.tolist()]
+    return ''.join(
+        f'<rect x="{t * cell_w:.1f}" y="{height - (f + 1) * cell_h:.1f}" width="{n * cell_w + 0.5:.1f}" height="{cell_h + 0.5:.1f}" fill="{colors[v]}"/>'
+        for f, t, n, v in zip(fs[keep].tolist(), ts[keep].tolist(), lengths[keep].tolist(), values[keep].tolist())
+    )
+
+
+def spectrogram_to_svg(spectrogram, freqs, duration, title, width=800, height=300, max_freq=8000,
+                       render="png", levels=32):
+    """Convert a (frames, bins) magnitude array to an SVG heatmap.
+
+    render="png" embeds the heatmap as one indexed PNG (at most `width`
+    columns, `levels` ramp colors); "runs" draws run-length-merged rects
+    with the same quantized colors; "rects" draws one rect per cell in
+    exact colors, as the original output did.
+    """
+    if render not in SPECTROGRAM_RENDERERS:
+        raise ValueError(f"Unknown spectrogram renderer: {render}")
+    if len(spectrogram) == 0:
         return f'<svg width="{width}" height="{height}"><text x="50%" y="50%" text-anchor="middle" fill="#aaa">No data</text></svg>'
     
-    num_time = len(spectrogram)
-    num_freq = len(spectrogram[0]) if spectrogram else 0
-    
     # Only show up to 8kHz
-    max_bin = min(num_freq, int(8000 / max_freq * num_freq))
-    
-    cell_w = width / num_time
-    cell_h = height / max_bin
+    step = freqs[1] - freqs[0] if len(freqs) > 1 else 0
+    if step and freqs[0] == 0 and np.allclose(np.diff(freqs), step):
+        max_bin = min(len(freqs), int(max_freq / step))  # linear FFT bins
+    else:
+        max_bin = int(np.searchsorted(freqs, max_freq, side="right"))  # log/mel bands
+    max_bin = max(1, max_bin)
+    visible = spectrogram[:, :max_bin]
     
     # Find max magnitude for normalization (use log scale for better visibility)
-    max_mag = max(max(row[:max_bin]) for row in spectrogram) if spectrogram else 1
+    max_mag = float(visible.max())
     if max_mag == 0:
         max_mag = 1
+    raw = visible / max_mag
     
-    rects = []
-    for t in range(num_time):
-        for f in range(max_bin):
-            raw = spectrogram[t][f] / max_mag
-            if raw < 0.005:
-                continue
-            # Aggressive gamma correction for visibility
-            mag = min(1.0, raw ** 0.3)
-            # Viridis-inspired color ramp: dark purple → teal → green → yellow
-            if mag < 0.33:
-                t2 = mag / 0.33
-                r = int(68 + t2 * (33 - 68))
-                g = int(1 + t2 * (145 - 1))
-                b = int(84 + t2 * (140 - 84))
-            elif mag < 0.66:
-                t2 = (mag - 0.33) / 0.33
-                r = int(33 + t2 * (94 - 33))
-                g = int(145 + t2 * (201 - 145))
-                b = int(140 + t2 * (98 - 140))
-            else:
-                t2 = (mag - 0.66) / 0.34
-                r = int(94 + t2 * (253 - 94))
-                g = int(201 + t2 * (231 - 201))
-                b = int(98 + t2 * (37 - 98))
-            x = t * cell_w
-            y = height - (f + 1) * cell_h
-            rects.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="{cell_w + 0.5:.1f}" height="{cell_h + 0.5:.1f}" fill="rgb({r},{g},{b})"/>')
+    if render == "rects":
+        heatmap = _cell_rects(raw, width, height)
+    else:
+        palette = spectrogram_palette(levels)
+        index = quantize_spectrogram(raw, levels, columns=width if render == "png" else None)
+        if render == "runs":
+            heatmap = _run_rects(index, palette, width, height)
+        else:
+            png = encode_png(index.T[::-1].astype(np.uint8), palette)
+            href = "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+            heatmap = (f'<image width="{width}" height="{height}" preserveAspectRatio="none" '
+                       f'style="image-rendering:pixelated" href="{href}"/>')
     
     svg = f'''<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height + 60}" viewBox="0 0 {width} {height + 60}">
   <rect width="{width}" height="{height + 60}" fill="#0f0f1a"/>
   <text x="{width / 2}" y="20" text-anchor="middle" fill="#e0e0e0" font-size="14" font-family="sans-serif">{title}</text>
   <g transform="translate(0, 30)">
-    {''.join(rects)}
+    {heatmap}
     <!-- Axes -->
     <text x="5" y="{height + 15}" fill="#888" font-size="10">0s</text>
     <text x="{width - 30}" y="{height + 15}" fill="#888" font-size="10">{duration:.1f}s</text>
@@ -109,30 +249,19 @@ def spectrogram_to_svg(spectrogram, max_freq, duration, title, width=800, height
     return svg
 
 
-def waveform_to_svg(samples, duration, title, width=800, height=120):
-    """Create SVG waveform visualization."""
-    if not samples:
+def waveform_to_svg(pyramid, num_samples, duration, title, width=800, height=120):
+    """Create SVG waveform visualization from a peak pyramid (see peaks.py)."""
+    if num_samples == 0:
         return ''
     
-    # Downsample for visualization
-    step = max(1, len(samples) // width)
-    points = []
+    x, mins, maxs = peaks.columns(pyramid, num_samples, width)
     mid = height // 2
+    y_top = mid - maxs.astype(np.float64) * mid * 0.9
+    y_bottom = mid - mins.astype(np.float64) * mid * 0.9
     
-    for i in range(0, min(len(samples), width * step), step):
-        x = (i / len(samples)) * width
-        # Get min/max in this window
-        window = samples[i:i + step]
-        y_min = mid - min(window) * mid * 0.9
-        y_max = mid - max(window) * mid * 0.9
-        points.append(f'{x:.1f},{y_max:.1f}')
-    
-    # Reverse path for the bottom half
-    for i in range(min(len(samples), width * step) - step, -1, -step):
-        x = (i / len(samples)) * width
-        window = samples[i:i + step]
-        y = mid - min(window) * mid * 0.9
-        points.append(f'{x:.1f},{y:.1f}')
+    # Top edge left to right, then the bottom edge back
+    points = [f'{px:.1f},{py:.1f}' for px, py in zip(x.tolist(), y_top.tolist())]
+    points += [f'{px:.1f},{py:.1f}' for px, py in zip(x[::-1].tolist(), y_bottom[::-1].tolist())]
     
     path = ' '.join(points)
     
@@ -146,54 +275,115 @@ def waveform_to_svg(samples, duration, title, width=800, height=120):
 </svg>'''
 
 
+def output_paths(name):
+    """(spectrogram SVG, waveform SVG, peaks) paths of a sound's visualizations."""
+    return [os.path.join(OUTPUT_DIR, f"{name}-{kind}") for kind in ("spectrogram.svg", "waveform.svg", "peaks.dat")]
+
+
+def write_text(path, text):
+    """Write a file atomically, so a dev server watching it never loads half of it."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+    spans.add(bytes=len(text))
+
+
+def visualize(name, samples, sample_rate, render="png"):
+    """Write a sound's spectrogram, waveform and peaks files.
+
+    Returns (duration, spectrogram SVG, waveform SVG, written paths).
+    """
+    spec_path, wave_path, peaks_path = output_paths(name)
+    duration = len(samples) / sample_rate
+    with spans.span("stft"):
+        spec_data, freqs, _ = compute_spectrogram(
+            samples, sample_rate,
+            window_size=512 if duration < 2 else 1024,
+            hop=256 if duration < 2 else 512
+        )
+    with spans.span("spectrogram svg"):
+        svg_spec = spectrogram_to_svg(spec_data, freqs, duration, f"{name} — Spectrogram", render=render)
+    with spans.span("peaks"):
+        pyramid = peaks.build_pyramid(samples)
+    with spans.span("waveform svg"):
+        svg_wave = waveform_to_svg(pyramid, len(samples), duration, name)
+
+    # Individual SVGs and the peaks file for the renderer
+    with spans.span("write"):
+        spans.add(bytes=os.path.getsize(peaks.write_peaks(peaks_path, pyramid, sample_rate)))
+        write_text(spec_path, svg_spec)
+        write_text(wave_path, svg_wave)
+    return duration, svg_spec, svg_wave, [spec_path, wave_path, peaks_path]
+
+
+def source_key(asset_path, render="png"):
+    """Cache key of a sound's visualizations: the asset's bytes and this code."""
+    viz_source = []
+    for filename in VIZ_MODULES:
+        with open(os.path.join(SCRIPT_DIR, filename), encoding="utf-8") as f:
+            viz_source.append(f.read())
+    return build_cache.content_key(build_cache.file_sha256(asset_path), viz_source, render)
+
+
 def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--force", action="store_true", help="regenerate every visualization, ignoring the cache")
+    parser.add_argument("--only", nargs="+", choices=SOUND_NAMES, metavar="NAME",
+                        help="regenerate only these sounds' visualizations")
+    parser.add_argument("--source", choices=["mp3", "wav"], default="mp3",
+                        help="analyze the shipped MP3s (default) or WAVs written by write_wav")
+    parser.add_argument("--render", choices=SPECTROGRAM_RENDERERS, default="png",
+                        help="spectrogram heatmap as an embedded PNG (default), run-length rects or one rect per cell")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="profile every sound and stage; write a Chrome trace (JSON) to PATH and print a summary")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="with --trace, also record allocations per span (tracemalloc; slower)")
+    args = parser.parse_args()
+    if args.trace:
+        spans.enable(memory=args.trace_memory)
+
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
-    # First generate WAV files temporarily for analysis
-    print("Generating temporary WAV files for analysis...")
-    import importlib.util
-    spec = importlib.util.spec_from_file_location("gen", os.path.join(SCRIPT_DIR, "generate_sounds.py"))
-    gen = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(gen)
-    
-    sounds = {
-        "ambient-island": gen.gen_ambient_island,
-        "ambient-ocean": gen.gen_ambient_ocean,
-        "monkey-call": gen.gen_monkey_call,
-        "dolphin-call": gen.gen_dolphin_call,
-        "bubble": gen.gen_bubble,
-        "chime": gen.gen_chime,
-        "typewriter": gen.gen_typewriter,
-        "coconut-crack": gen.gen_coconut_crack,
-        "error": gen.gen_error,
-        "success": gen.gen_success,
-        "goodbye": gen.gen_goodbye,
-    }
-    
+    manifest = build_cache.load_manifest(SCRIPT_DIR)
+    entries = manifest.setdefault("visualizations", {})
     all_svgs = []
     
-    for name, generator in sounds.items():
-        print(f"Analyzing {name}...")
-        samples, duration = generator()
-        
-        # Generate spectrogram
-        spec_data, freq_bins, max_freq = compute_spectrogram(
-            samples, SAMPLE_RATE,
-            window_size=512 if duration < 2 else 1024,
-            hop=256 if duration < 2 else 512
-        )
-        
-        svg_spec = spectrogram_to_svg(spec_data, max_freq, duration, f"{name} — Spectrogram")
-        svg_wave = waveform_to_svg(samples, duration, name)
+    for name in SOUND_NAMES:
+        spec_path, wave_path, peaks_path = output_paths(name)
+        asset_path = os.path.join(SCRIPT_DIR, f"{name}.{args.source}")
+        key = source_key(asset_path, args.render)
+        forced = args.force or (args.only is not None and name in args.only)
+        skipped = args.only is not None and name not in args.only  # left alone even if its outputs are missing
+        if not forced and (skipped or build_cache.is_fresh(entries.get(name), key, SCRIPT_DIR)):
+            if all(map(os.path.exists, [spec_path, wave_path, peaks_path])) and name in entries:
+                print(f"Up to date: {name}")
+                with open(spec_path) as f:
+                    svg_spec = f.read()
+                with open(wave_path) as f:
+                    svg_wave = f.read()
+                all_svgs.append((name, entries[name]["duration"], svg_spec, svg_wave))
+                continue
+            if skipped:
+                continue
         
-        # Save individual SVGs
-        with open(os.path.join(OUTPUT_DIR, f"{name}-spectrogram.svg"), "w") as f:
-            f.write(svg_spec)
-        with open(os.path.join(OUTPUT_DIR, f"{name}-waveform.svg"), "w") as f:
-            f.write(svg_wave)
+        print(f"Analyzing {name}...")
+        with spans.span("visualize", sound=name):
+            try:
+                with spans.span("decode"):
+                    samples, sample_rate, _ = read_asset(name, args.source)
+            except DecodeError as e:
+                raise SystemExit(f"Error: {e}")
+            if samples is None:
+                print(f"  skipped: {asset_path} not found")
+                continue
+            duration, svg_spec, svg_wave, paths = visualize(name, samples, sample_rate, args.render)
+        entries[name] = build_cache.record(key, paths, SCRIPT_DIR, duration=duration)
         
         all_svgs.append((name, duration, svg_spec, svg_wave))
     
+    build_cache.save_manifest(manifest, SCRIPT_DIR)
+    
     # Generate combined HTML page
     html_parts = ['''<!DOCTYPE html>
 <html>
@@ -214,8 +404,8 @@ def main():
 </head>
 <body>
 <h1>🔊 Cocopilot Sound Visualizations</h1>
-<p>All sounds are procedurally generated using pure Python (sine waves, noise, envelopes). 
-No external audio libraries required — just math and the standard library's <code>wave</code> module.</p>
+<p>All sounds are procedurally generated from the graphs in <code>sounds.json</code>, rendered with NumPy
+and encoded with ffmpeg. The plots below analyze the shipped files, decoded back through ffmpeg.</p>
 
 <h2>How the sounds are made</h2>
 <p>Each sound is built from basic building blocks:</p>
@@ -225,7 +415,7 @@ No external audio libraries required — just math and the standard library's <c
   <li><strong>Envelopes</strong> — attack-decay shapes that control volume over time</li>
   <li><strong>Frequency sweeps</strong> — changing pitch over time (bubbles, chirps)</li>
   <li><strong>Harmonics</strong> — multiple sine waves at integer multiples of base frequency</li>
-  <li><strong>Filtering</strong> — running averages to smooth noise into rumble/waves</li>
+  <li><strong>Filtering</strong> — low-pass, band-pass and shelf filters that shape noise into rumble and waves</li>
 </ul>
 
 <h2>Ambient Sounds</h2>
@@ -257,11 +447,13 @@ No external audio libraries required — just math and the standard library's <c
     html_parts.append('</body></html>')
     
     html_path = os.path.join(OUTPUT_DIR, "index.html")
-    with open(html_path, "w") as f:
-        f.write('\n'.join(html_parts))
+    write_text(html_path, '\n'.join(html_parts))
     
     print(f"\nVisualizations saved to {OUTPUT_DIR}/")
     print(f"Open {html_path} in a browser to view.")
+    if args.trace:
+        spans.print_summary()
+        print(f"\nTrace written to {spans.write_trace(args.trace)} (open in chrome://tracing or ui.perfetto.dev)")
 
 
 if __name__ == "__main__":
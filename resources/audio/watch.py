@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Watch mode: re-render only the sounds an edit touches.
+
+Polls sounds.json and the Python modules of the build. When sounds.json
+changes, every sound's cache key (its graph, the defs it uses, the
+library code and the encoder settings; see build_cache) is compared with
+the build manifest, and only the sounds whose key moved are rebuilt: their
+audio, then their peaks, waveform and spectrogram from the new file. The
+sprite is repacked when a one-shot changed, and assets.json is rewritten.
+Every output is written to a temporary file and renamed into place, so
+the electron-vite dev server reloads whole files only.
+
+Watch mode encodes with the fixed targets (no profile search, see
+profiles.py), which keeps an edit-to-file round trip to well under a
+second; sounds left untouched keep their release encodes, and
+generate_sounds.py re-optimizes the rest. A change to a Python module
+restarts the watcher, whose first pass then rebuilds whatever the change
+affected. A sounds.json that does not parse or compile is reported and
+the last good build is kept.
+
+Usage:
+    python3 watch.py
+    python3 watch.py --formats mp3 opus --interval 0.05
+"""
+
+import argparse
+import os
+import sys
+import time
+from functools import partial
+
+import build_cache
+import generate_sounds
+import graph
+import sprite
+import visualize_sounds
+from decoder import DecodeError
+from encoder import TARGETS, EncodeError
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+POLL_INTERVAL = 0.1
+CODE_MODULES = [
+    *build_cache.LIBRARY_MODULES, "generate_sounds.py", "assets.py", "profiles.py", "sprite.py",
+    "visualize_sounds.py", "peaks.py", "decoder.py", "build_cache.py", "spans.py", "watch.py",
+]
+
+
+def mtimes(paths: list[str]) -> dict:
+    stamps = {}
+    for path in paths:
+        try:
+            stamps[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            stamps[path] = None
+    return stamps
+
+
+def _layout(sounds: dict) -> tuple:
+    """The sound names and which of them loop: what generate_sounds sorts sounds by at import."""
+    return tuple(sounds), tuple(name for name, sound in sounds.items() if sound.get("loop"))
+
+
+class Watcher:
+    """Rebuilds stale sounds and their visualizations, recording them in the build manifest."""
+
+    def __init__(self, formats=("mp3",)):
+        self.formats = tuple(formats)
+        self.layout = _layout(generate_sounds.COMPILER.sounds)
+
+    def fresh(self, entry: dict | None, key) -> bool:
+        """Whether a manifest entry is current, as a release (optimized) or a watch build."""
+        return any(build_cache.is_fresh(entry, key(optimize), SCRIPT_DIR) for optimize in (False, True))
+
+    def reload(self) -> bool:
+        """Load sounds.json into the build's compiler. False if it is broken (reported)."""
+        try:
+            spec = graph.load_spec()
+        except (OSError, ValueError) as e:
+            print(f"sounds.json: {e} (keeping the last build)")
+            return False
+        if not isinstance(spec, dict) or not isinstance(spec.get("sounds"), dict):
+            print('sounds.json: no "sounds" object (keeping the last build)')
+            return False
+        if _layout(spec["sounds"]) != self.layout:
+            print("Sounds were added, removed or changed loop mode; restarting...")
+            restart()
+        generate_sounds.COMPILER.spec = spec
+        return True
+
+    def _visualize(self, name: str, entries: dict):
+        asset_path = os.path.join(SCRIPT_DIR, f"{name}.mp3")
+        samples, sample_rate, _ = visualize_sounds.read_asset(name)
+        duration, _, _, paths = visualize_sounds.visualize(name, samples, sample_rate)
+        entries[name] = build_cache.record(visualize_sounds.source_key(asset_path), paths, SCRIPT_DIR,
+                                           duration=duration)
+
+    def rebuild(self, force: bool = False) -> list[str]:
+        """Build every sound whose key changed since the last build. Returns the rebuilt names."""
+        start = time.perf_counter()
+        manifest = build_cache.load_manifest(SCRIPT_DIR)
+        entries = manifest.setdefault("sounds", {})
+        visuals = manifest.setdefault("visualizations", {})
+        stale = [name for name in generate_sounds.SOUNDS if force or not self.fresh(
+            entries.get(name), partial(generate_sounds.cache_key, name, None, self.formats))]
+        repack = any(name in generate_sounds.ONE_SHOTS for name in stale) or not self.fresh(
+            entries.get(sprite.SPRITE_NAME), partial(generate_sounds.sprite_key, self.formats))
+        if not stale and not repack:
+            return []
+
+        for name in stale:
+            paths, duration, seconds, _ = generate_sounds.encode_sound(name, None, self.formats, optimize=False)
+            key = generate_sounds.cache_key(name, None, self.formats, optimize=False)
+            entries[name] = build_cache.record(key, paths, SCRIPT_DIR, duration=duration)
+            if "mp3" in self.formats and name in visualize_sounds.SOUND_NAMES:
+                self._visualize(name, visuals)
+            print(f"  {name} ({seconds:.2f}s)")
+        if repack:
+            paths, duration, seconds, _ = generate_sounds.encode_sprite(self.formats, optimize=False)
+            key = generate_sounds.sprite_key(self.formats, optimize=False)
+            entries[sprite.SPRITE_NAME] = build_cache.record(key, paths, SCRIPT_DIR, duration=duration)
+            print(f"  {sprite.SPRITE_NAME} ({seconds:.2f}s)")
+        build_cache.save_manifest(manifest, SCRIPT_DIR)
+        if "mp3" in self.formats:
+            generate_sounds.write_asset_manifest()
+        print(f"Rebuilt {len(stale)} sound(s) in {time.perf_counter() - start:.2f}s")
+        return stale
+
+
+def restart():
+    """Re-exec the watcher, so edited modules are imported afresh."""
+    sys.stdout.flush()
+    os.execv(sys.executable, [sys.executable, os.path.abspath(__file__), *sys.argv[1:]])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--formats", nargs="+", choices=list(TARGETS), default=["mp3"], metavar="FORMAT",
+                        help=f"output formats ({', '.join(TARGETS)}; default: mp3)")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, metavar="S",
+                        help=f"seconds between checks for changes (default: {POLL_INTERVAL})")
+    parser.add_argument("--force", action="store_true", help="rebuild every sound once before watching")
+    args = parser.parse_args()
+
+    watcher = Watcher(args.formats)
+    code = [os.path.join(SCRIPT_DIR, module) for module in CODE_MODULES]
+    seen_spec = mtimes([graph.SPEC_PATH])
+    seen_code = mtimes(code)
+    try:
+        watcher.rebuild(args.force)
+    except (EncodeError, DecodeError) as e:
+        raise SystemExit(f"Error: {e}")
+    print(f"Watching {os.path.basename(graph.SPEC_PATH)} and the build modules (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(args.interval)
+            if mtimes(code) != seen_code:
+                print("Build code changed; restarting...")
+                restart()
+            stamps = mtimes([graph.SPEC_PATH])
+            if stamps == seen_spec:
+                continue
+            seen_spec = stamps
+            if watcher.reload():
+                try:
+                    watcher.rebuild()
+                except (EncodeError, DecodeError) as e:
+                    print(f"Error: {e}")
+                except (ValueError, KeyError, TypeError) as e:  # SpecError, or a malformed entry
+                    print(f"sounds.json: {type(e).__name__}: {e} (fix it and save again)")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
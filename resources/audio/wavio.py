@@ -0,0 +1,192 @@
+"""Bulk WAV encoding and decoding for the sound build scripts.
+
+Float buffers are converted to PCM with a handful of array operations and
+written in large chunks, instead of one struct.pack call per sample. WAV
+files are read through a memory map with NumPy views over the data chunk.
+"""
+
+import io
+import mmap
+import os
+import struct
+
+import numpy as np
+
+import spans
+
+# Sample formats: (bytes per sample, WAVE format tag, full-scale value)
+SAMPLE_FORMATS = {
+    "pcm16": (2, 1, 32767),
+    "pcm24": (3, 1, 8388607),
+    "float32": (4, 3, 1.0),
+}
+
+CHUNK_SAMPLES = 1 << 16
+
+
+def tpdf_dither(n: int, rng: np.random.Generator) -> np.ndarray:
+    """Triangular-PDF dither spanning +/-1 LSB (sum of two uniform variates)."""
+    return rng.random(n) - rng.random(n)
+
+
+def encode_pcm(samples, sample_format: str = "pcm16", dither: bool = False,
+               rng: np.random.Generator | None = None) -> bytes:
+    """Convert float samples in [-1, 1] to little-endian sample bytes.
+
+    Integer formats clip to full scale. Without dither they truncate toward
+    zero like int(s * 32767) did; with dither, TPDF noise is added before
+    rounding to the nearest step. float32 is written unclipped.
+    """
+    if sample_format not in SAMPLE_FORMATS:
+        raise ValueError(f"Unknown sample format: {sample_format}")
+    width, _, full_scale = SAMPLE_FORMATS[sample_format]
+    x = np.asarray(samples, dtype=np.float64)
+
+    if sample_format == "float32":
+        return x.astype("<f4").tobytes()
+
+    scaled = np.clip(x, -1.0, 1.0) * full_scale
+    if dither:
+        if rng is None:
+            rng = np.random.default_rng(0)
+        scaled = np.clip(np.rint(scaled + tpdf_dither(len(scaled), rng)), -full_scale - 1, full_scale)
+    ints = scaled.astype(np.int32)
+
+    if width == 2:
+        return ints.astype("<i2").tobytes()
+    # 24-bit: keep the low three bytes of each little-endian int32
+    return ints.astype("<i4").view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+
+
+class WavWriter:
+    """Incremental mono/multichannel WAV writer for PCM and IEEE float data.
+
+    The RIFF and data sizes are patched in on close(), so samples can be
+    appended block by block without knowing the total length up front.
+    `path` may also be a seekable binary file object, which is left open.
+    """
+
+    def __init__(self, path, sample_rate: int, channels: int = 1,
+                 sample_format: str = "pcm16", dither: bool = False, dither_seed: int = 0):
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Unknown sample format: {sample_format}")
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_format = sample_format
+        self.dither = dither
+        self._rng = np.random.default_rng(dither_seed) if dither else None
+        self._width, self._format_tag, _ = SAMPLE_FORMATS[sample_format]
+        self.frames_written = 0
+        self._owned = isinstance(path, (str, os.PathLike))
+        self._file = open(path, "wb") if self._owned else path
+        self._write_header(0)
+
+    def _write_header(self, data_bytes: int):
+        block_align = self.channels * self._width
+        fmt = struct.pack(
+            "<HHIIHH", self._format_tag, self.channels, self.sample_rate,
+            self.sample_rate * block_align, block_align, self._width * 8,
+        )
+        chunks = b"fmt " + struct.pack("<I", len(fmt)) + fmt
+        if self._format_tag != 1:
+            # Non-PCM formats carry a fact chunk with the frame count
+            chunks += b"fact" + struct.pack("<II", 4, data_bytes // block_align)
+        header = b"WAVE" + chunks + b"data" + struct.pack("<I", data_bytes)
+        riff_bytes = len(header) + data_bytes + data_bytes % 2
+        self._file.write(b"RIFF" + struct.pack("<I", riff_bytes) + header)
+
+    def write(self, samples):
+        """Append a block of float samples (interleaved when multichannel)."""
+        with spans.span("write_wav"):
+            data = encode_pcm(samples, self.sample_format, self.dither, self._rng)
+            self._file.write(data)
+            spans.add(bytes=len(data))
+        self.frames_written += len(samples) // self.channels
+
+    def close(self):
+        if self._file is None:
+            return
+        data_bytes = self.frames_written * self.channels * self._width
+        if data_bytes % 2:
+            self._file.write(b"\0")  # RIFF chunks are word aligned
+        self._file.seek(0)
+        self._write_header(data_bytes)
+        if self._owned:
+            self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_wav_file(path: str, samples, sample_rate: int, sample_format: str = "pcm16",
+                   dither: bool = False, chunk: int = CHUNK_SAMPLES) -> str:
+    """Write a whole float buffer to `path`, encoding it in large chunks."""
+    with WavWriter(path, sample_rate, sample_format=sample_format, dither=dither) as wf:
+        for start in range(0, len(samples), chunk):
+            wf.write(samples[start:start + chunk])
+    return path
+
+
+def wav_bytes(samples, sample_rate: int, sample_format: str = "pcm16") -> bytes:
+    """A whole float buffer as an in-memory WAV file."""
+    buffer = io.BytesIO()
+    with WavWriter(buffer, sample_rate, sample_format=sample_format) as wf:
+        wf.write(samples)
+    return buffer.getvalue()
+
+
+def read_wav(path: str, raw: bool = False):
+    """Read a PCM or IEEE-float WAV file via mmap. Returns (samples, sample_rate).
+
+    Samples are float32 in [-1, 1], shaped (frames,) for mono and
+    (frames, channels) otherwise. With raw=True, 16-bit and float files come
+    back as a zero-copy view of the mapped data in their stored dtype.
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    riff, _, wave_id = struct.unpack_from("<4sI4s", mm, 0)
+    if riff != b"RIFF" or wave_id != b"WAVE":
+        raise ValueError(f"Not a WAV file: {path}")
+
+    fmt = data = None
+    pos = 12
+    while pos + 8 <= len(mm):
+        chunk_id, size = struct.unpack_from("<4sI", mm, pos)
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack_from("<HHIIHH", mm, pos + 8)
+            if fmt[0] == 0xFFFE:  # WAVE_FORMAT_EXTENSIBLE: real tag opens the subformat GUID
+                fmt = (struct.unpack_from("<H", mm, pos + 32)[0],) + fmt[1:]
+        elif chunk_id == b"data":
+            data = (pos + 8, min(size, len(mm) - pos - 8))
+            break
+        pos += 8 + size + size % 2
+    if fmt is None or data is None:
+        raise ValueError(f"Missing fmt or data chunk: {path}")
+
+    format_tag, channels, sample_rate, _, _, bits = fmt
+    offset, size = data
+    width = bits // 8
+    count = size // width
+    if format_tag == 3 and bits == 32:
+        samples = np.frombuffer(mm, "<f4", count, offset)
+        scale = 1.0
+    elif format_tag == 1 and bits == 16:
+        samples = np.frombuffer(mm, "<i2", count, offset)
+        scale = 32767.0
+    elif format_tag == 1 and bits == 24:
+        b = np.frombuffer(mm, np.uint8, count * 3, offset).reshape(-1, 3).astype(np.int32)
+        samples = (b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)) << 8 >> 8  # sign-extend
+        scale = 8388607.0
+    else:
+        raise ValueError(f"Unsupported WAV format (tag {format_tag}, {bits} bit): {path}")
+
+    if not raw and scale != 1.0:
+        samples = samples.astype(np.float32) / np.float32(scale)
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels)
+    return samples, sample_rate
@@ -1,40 +1,60 @@
 import { Howl, Howler } from 'howler'
+import type { AppMode } from '@shared/events'
 
 // Import audio files as URLs via Vite's asset handling.
 // Vite resolves these to correct URLs in both dev and production.
+// One-shots are packed into a single sprite by resources/audio/generate_sounds.py;
+// sprite.json holds each sound's [offset, duration] in milliseconds; assets.json
+// lists every file's size, duration and suggested load priority.
 import ambientIslandSrc from '../../../resources/audio/ambient-island.mp3'
 import ambientOceanSrc from '../../../resources/audio/ambient-ocean.mp3'
-import monkeyCallSrc from '../../../resources/audio/monkey-call.mp3'
-import dolphinCallSrc from '../../../resources/audio/dolphin-call.mp3'
-import bubbleSrc from '../../../resources/audio/bubble.mp3'
-import chimeSrc from '../../../resources/audio/chime.mp3'
-import typewriterSrc from '../../../resources/audio/typewriter.mp3'
-import coconutCrackSrc from '../../../resources/audio/coconut-crack.mp3'
-import errorSrc from '../../../resources/audio/error.mp3'
-import successSrc from '../../../resources/audio/success.mp3'
-import goodbyeSrc from '../../../resources/audio/goodbye.mp3'
-
-/** Sound definition for registration */
+import spriteSrc from '../../../resources/audio/sprite.mp3'
+import spriteManifest from '../../../resources/audio/sprite.json'
+import assetManifest from '../../../resources/audio/assets.json'
+
+/** Files the manager loads, keyed like the assets in assets.json */
+const ASSET_SRCS: Record<string, string> = {
+  sprite: spriteSrc,
+  'ambient-island': ambientIslandSrc,
+  'ambient-ocean': ambientOceanSrc
+}
+
+const ASSETS = assetManifest.assets as Record<string, { priority: number; streamed: boolean }>
+
+/** Sound definition for registration: a slot in the sprite, or the asset with the sound's ID */
 interface SoundDef {
-  src: string
+  sprite?: string
   loop?: boolean
   volume?: number
 }
 
 /** Registry of all sound IDs to their definitions */
 const SOUND_DEFS: Record<string, SoundDef> = {
-  'ambient-island': { src: ambientIslandSrc, loop: true, volume: 0.3 },
-  'ambient-ocean': { src: ambientOceanSrc, loop: true, volume: 0.4 },
-  'welcome': { src: chimeSrc, volume: 0.3 },
-  'session-start': { src: monkeyCallSrc },
-  'dolphin-call': { src: dolphinCallSrc },
-  'bubble': { src: bubbleSrc },
-  'user-message': { src: chimeSrc },
-  'tool-edit': { src: typewriterSrc },
-  'tool-bash': { src: coconutCrackSrc },
-  'tool-success': { src: successSrc },
-  'tool-error': { src: errorSrc },
-  'session-end': { src: goodbyeSrc }
+  'ambient-island': { loop: true, volume: 0.3 },
+  'ambient-ocean': { loop: true, volume: 0.4 },
+  'welcome': { sprite: 'chime', volume: 0.3 },
+  'session-start': { sprite: 'monkey-call' },
+  'dolphin-call': { sprite: 'dolphin-call' },
+  'bubble': { sprite: 'bubble' },
+  'user-message': { sprite: 'chime' },
+  'tool-edit': { sprite: 'typewriter' },
+  'tool-bash': { sprite: 'coconut-crack' },
+  'tool-success': { sprite: 'success' },
+  'tool-error': { sprite: 'error' },
+  'session-end': { sprite: 'goodbye' }
+}
+
+function assetFor(soundId: string): string {
+  return SOUND_DEFS[soundId]?.sprite ? 'sprite' : soundId
+}
+
+/**
+ * Assets a mode needs once audio is on, in load order: the sprite (event
+ * sounds play in every mode), plus the scene's ambient loop.
+ */
+function assetsForMode(mode: AppMode): string[] {
+  const needed = ['sprite', `ambient-${mode}`].filter((id) => id in ASSET_SRCS)
+  return needed.sort((a, b) => (ASSETS[a]?.priority ?? Infinity) - (ASSETS[b]?.priority ?? Infinity))
 }
 
 /**
@@ -44,7 +64,10 @@ const SOUND_DEFS: Record<string, SoundDef> = {
 export class AudioManager {
   private static instance: AudioManager | null = null
 
-  private sounds = new Map<string, Howl>()
+  private howls = new Map<string, Howl>()
+  private queue: string[] = []
+  private loading: string | null = null
+  private mode: AppMode | null = null
   private activeAmbientId: string | null = null
   private enabled = false
   private volume = 0.5
@@ -59,38 +82,112 @@ export class AudioManager {
     return AudioManager.instance
   }
 
-  /** Load all sounds. Safe to call multiple times (no-ops after first). */
+  /**
+   * Register the sounds. Safe to call multiple times (no-ops after first).
+   * Nothing is fetched yet: files load lazily, once audio is enabled, for
+   * the current mode only (see setMode). One-shots share one sprite (one
+   * fetch, one decode); ambients stream through HTML5 audio.
+   */
   init(): void {
     if (this.initialized) return
     this.initialized = true
+    this.prepare()
+  }
+
+  /**
+   * Switch to a mode: unload ambient loops it does not need, then load the
+   * assets it does, one at a time in assets.json priority order.
+   */
+  setMode(mode: AppMode): void {
+    this.mode = mode
+    const needed = assetsForMode(mode)
+    for (const [id, howl] of this.howls) {
+      if (id === 'sprite' || needed.includes(id)) continue
+      if (this.activeAmbientId === id) this.stopAmbient()
+      if (this.loading === id) this.loading = null
+      howl.unload()
+      this.howls.delete(id)
+    }
+    this.queue = this.queue.filter((id) => needed.includes(id))
+    this.prepare()
+  }
 
-    for (const [id, def] of Object.entries(SOUND_DEFS)) {
-      const howl = new Howl({
-        src: [def.src],
-        loop: def.loop ?? false,
-        volume: (def.volume ?? 1) * this.volume,
+  /** Queue the current mode's missing assets, if audio is on. */
+  private prepare(): void {
+    if (!this.initialized || !this.enabled || !this.mode) return
+    for (const id of assetsForMode(this.mode)) {
+      if (!this.howls.has(id) && !this.queue.includes(id)) this.queue.push(id)
+    }
+    this.loadNext()
+  }
+
+  /** Start loading the next queued asset once the previous one has finished. */
+  private loadNext(): void {
+    if (this.loading) return
+    const id = this.queue.shift()
+    if (id === undefined) return
+    if (this.howls.has(id)) {
+      this.loadNext()
+      return
+    }
+    this.loading = id
+    const done = (): void => {
+      if (this.loading !== id) return
+      this.loading = null
+      this.loadNext()
+    }
+    const howl = this.load(id)
+    howl.once('load', done)
+    howl.once('loaderror', done)
+  }
+
+  /** The Howl of an asset, created (and fetching) on first use. */
+  private load(id: string): Howl {
+    const existing = this.howls.get(id)
+    if (existing) return existing
+    this.queue = this.queue.filter((queued) => queued !== id)
+    let howl: Howl
+    if (id === 'sprite') {
+      howl = new Howl({
+        src: [ASSET_SRCS.sprite],
+        sprite: spriteManifest.sprite as Record<string, [number, number]>,
+        volume: this.volume,
+        preload: true
+      })
+    } else {
+      const def = SOUND_DEFS[id]
+      howl = new Howl({
+        src: [ASSET_SRCS[id]],
+        loop: def?.loop ?? false,
+        volume: (def?.volume ?? 1) * this.volume,
+        html5: ASSETS[id]?.streamed ?? true,
         preload: true
       })
-
-      this.sounds.set(id, howl)
     }
+    this.howls.set(id, howl)
+    return howl
   }
 
   /** Play a one-shot sound by ID. No-op if disabled or unknown ID. */
   play(soundId: string): void {
-    if (!this.enabled) return
-    const howl = this.sounds.get(soundId)
-    if (howl && !soundId.startsWith('ambient-')) {
-      howl.play()
+    if (!this.enabled || !this.initialized) return
+    const def = SOUND_DEFS[soundId]
+    if (def?.sprite) {
+      // Howler queues the play until the sprite has loaded
+      const howl = this.load('sprite')
+      const playId = howl.play(def.sprite)
+      if (def.volume !== undefined) {
+        howl.volume(def.volume * this.volume, playId)
+      }
     }
   }
 
   /** Start the ambient loop for the given mode. Stops any other ambient first. */
   startAmbient(mode: 'island' | 'ocean' = 'island'): void {
-    if (!this.enabled) return
+    if (!this.enabled || !this.initialized) return
     const ambientId = `ambient-${mode}`
-    const howl = this.sounds.get(ambientId)
-    if (!howl) return
+    if (!(ambientId in ASSET_SRCS)) return
+    const howl = this.load(ambientId)
 
     // Already playing this ambient
     if (this.activeAmbientId === ambientId && howl.playing()) return
@@ -104,7 +201,7 @@ export class AudioManager {
   /** Stop the currently playing ambient loop. */
   stopAmbient(): void {
     if (this.activeAmbientId) {
-      const howl = this.sounds.get(this.activeAmbientId)
+      const howl = this.howls.get(this.activeAmbientId)
       if (howl?.playing()) {
         howl.stop()
       }
@@ -112,12 +209,13 @@ export class AudioManager {
     }
   }
 
-  /** Enable or disable all audio. Stops ambient when disabled. */
+  /** Enable or disable all audio. Stops ambient when disabled; enabling loads the mode's assets. */
   setEnabled(enabled: boolean): void {
     this.enabled = enabled
     if (!enabled) {
       this.stopAmbient()
     }
+    this.prepare()
   }
 
   /** Set master volume (0–1). Updates all loaded sounds. */
@@ -139,15 +237,17 @@ export class AudioManager {
   /** Unload all sounds and reset state. */
   dispose(): void {
     this.stopAmbient()
-    for (const howl of this.sounds.values()) {
+    for (const howl of this.howls.values()) {
       howl.unload()
     }
-    this.sounds.clear()
+    this.howls.clear()
+    this.queue = []
+    this.loading = null
     this.activeAmbientId = null
     this.initialized = false
   }
 
-  /** Whether sounds have been loaded. */
+  /** Whether sounds have been registered (see init). */
   isInitialized(): boolean {
     return this.initialized
   }
@@ -158,6 +258,9 @@ export class AudioManager {
     enabled: boolean
     volume: number
     soundCount: number
+    fileCount: number
+    loadedAssets: string[]
+    pendingAssets: string[]
     ambientPlaying: boolean
     activeAmbientId: string | null
   } {
@@ -165,8 +268,11 @@ export class AudioManager {
       initialized: this.initialized,
       enabled: this.enabled,
       volume: this.volume,
-      soundCount: this.sounds.size,
-      ambientPlaying: this.activeAmbientId !== null && (this.sounds.get(this.activeAmbientId)?.playing() ?? false),
+      soundCount: Object.keys(SOUND_DEFS).filter((id) => this.howls.has(assetFor(id))).length,
+      fileCount: this.howls.size,
+      loadedAssets: [...this.howls.keys()],
+      pendingAssets: this.queue.slice(),
+      ambientPlaying: this.activeAmbientId !== null && (this.howls.get(this.activeAmbientId)?.playing() ?? false),
       activeAmbientId: this.activeAmbientId
     }
   }
@@ -31,6 +31,11 @@ export function useAudio(): {
     mgr.setVolume(audioVolume)
   }, [audioEnabled, audioVolume])
 
+  // Load only what the current mode needs (and drop other scenes' ambients)
+  useEffect(() => {
+    managerRef.current!.setMode(mode)
+  }, [mode])
+
   // Auto-start/stop ambient based on mode
   useEffect(() => {
     const mgr = managerRef.current!
@@ -15,6 +15,7 @@ export interface RendererDebugState {
     enabled: boolean
     volume: number
     soundCount: number
+    loadedAssets: string[]
     ambientPlaying: boolean
     activeAmbientId: string | null
   }
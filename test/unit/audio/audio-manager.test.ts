@@ -5,6 +5,9 @@ const mockPlay = vi.fn()
 const mockStop = vi.fn()
 const mockPlaying = vi.fn(() => false)
 const mockUnload = vi.fn()
+const mockVolume = vi.fn()
+const howlOptions: Array<Record<string, unknown>> = []
+const loadListeners: Array<() => void> = []
 
 vi.mock('howler', () => ({
   Howl: class MockHowl {
@@ -12,7 +15,13 @@ vi.mock('howler', () => ({
     stop = mockStop
     playing = mockPlaying
     unload = mockUnload
-    constructor() {}
+    volume = mockVolume
+    once = (event: string, listener: () => void): void => {
+      if (event === 'load') loadListeners.push(listener)
+    }
+    constructor(options: Record<string, unknown>) {
+      howlOptions.push(options)
+    }
   },
   Howler: { volume: vi.fn() }
 }))
@@ -20,16 +29,10 @@ vi.mock('howler', () => ({
 // Mock all audio imports
 vi.mock('../../../resources/audio/ambient-island.mp3', () => ({ default: 'ambient-island.mp3' }))
 vi.mock('../../../resources/audio/ambient-ocean.mp3', () => ({ default: 'ambient-ocean.mp3' }))
-vi.mock('../../../resources/audio/monkey-call.mp3', () => ({ default: 'monkey-call.mp3' }))
-vi.mock('../../../resources/audio/dolphin-call.mp3', () => ({ default: 'dolphin-call.mp3' }))
-vi.mock('../../../resources/audio/bubble.mp3', () => ({ default: 'bubble.mp3' }))
-vi.mock('../../../resources/audio/chime.mp3', () => ({ default: 'chime.mp3' }))
-vi.mock('../../../resources/audio/typewriter.mp3', () => ({ default: 'typewriter.mp3' }))
-vi.mock('../../../resources/audio/coconut-crack.mp3', () => ({ default: 'coconut-crack.mp3' }))
-vi.mock('../../../resources/audio/error.mp3', () => ({ default: 'error.mp3' }))
-vi.mock('../../../resources/audio/success.mp3', () => ({ default: 'success.mp3' }))
-vi.mock('../../../resources/audio/goodbye.mp3', () => ({ default: 'goodbye.mp3' }))
+vi.mock('../../../resources/audio/sprite.mp3', () => ({ default: 'sprite.mp3' }))
 
+import spriteManifest from '../../../resources/audio/sprite.json'
+import assetManifest from '../../../resources/audio/assets.json'
 import { AudioManager } from '../../../src/renderer/audio/audio-manager'
 
 describe('AudioManager', () => {
@@ -38,6 +41,8 @@ describe('AudioManager', () => {
   beforeEach(() => {
     AudioManager.resetInstance()
     vi.clearAllMocks()
+    howlOptions.length = 0
+    loadListeners.length = 0
     mgr = AudioManager.getInstance()
     mgr.init()
   })
@@ -55,17 +60,54 @@ describe('AudioManager', () => {
   })
 
   describe('initialization', () => {
-    it('loads all sound definitions', () => {
+    it('registers sounds without loading any file', () => {
       const state = mgr.getState()
       expect(state.initialized).toBe(true)
-      expect(state.soundCount).toBeGreaterThanOrEqual(11)
+      expect(state.fileCount).toBe(0)
+      expect(howlOptions).toHaveLength(0)
+    })
+
+    it('loads nothing while audio is disabled', () => {
+      mgr.setMode('island')
+      expect(howlOptions).toHaveLength(0)
+    })
+
+    it('loads the sprite first, then the scene\'s ambient as a streamed file', () => {
+      expect(assetManifest.assets.sprite.priority).toBeLessThan(assetManifest.assets['ambient-island'].priority)
+      mgr.setMode('island')
+      mgr.setEnabled(true)
+      expect(howlOptions.map((options) => options.src)).toEqual([['sprite.mp3']])
+      expect(howlOptions[0].sprite).toBe(spriteManifest.sprite)
+
+      loadListeners.shift()!()
+      expect(howlOptions.map((options) => options.src)).toEqual([['sprite.mp3'], ['ambient-island.mp3']])
+      expect(howlOptions[1].html5 && howlOptions[1].loop).toBe(true)
+      expect(mgr.getState().soundCount).toBe(11)
+    })
+
+    it('loads only the sprite outside the island and ocean scenes', () => {
+      mgr.setMode('vanilla')
+      mgr.setEnabled(true)
+      loadListeners.shift()!()
+      expect(mgr.getState().loadedAssets).toEqual(['sprite'])
+      expect(mgr.getState().pendingAssets).toEqual([])
+    })
+
+    it('unloads the previous scene\'s ambient on a mode switch', () => {
+      mgr.setMode('island')
+      mgr.setEnabled(true)
+      loadListeners.shift()!()
+      mgr.setMode('ocean')
+      expect(mockUnload).toHaveBeenCalledTimes(1)
+      expect(mgr.getState().loadedAssets).toEqual(['sprite', 'ambient-ocean'])
     })
 
     it('is idempotent', () => {
+      mgr.setMode('vanilla')
+      mgr.setEnabled(true)
       // init() should not create more Howl instances on second call
       mgr.init()
-      // No error thrown, still same sound count
-      expect(mgr.getState().soundCount).toBeGreaterThanOrEqual(11)
+      expect(howlOptions).toHaveLength(1)
     })
   })
 
@@ -81,6 +123,21 @@ describe('AudioManager', () => {
       expect(mockPlay).toHaveBeenCalled()
     })
 
+    it('plays the sound\'s slot of the sprite', () => {
+      mgr.setEnabled(true)
+      mgr.play('tool-bash')
+      expect(mockPlay).toHaveBeenCalledWith('coconut-crack')
+      expect(spriteManifest.sprite).toHaveProperty('coconut-crack')
+    })
+
+    it('applies per-sound volume to the playing slot', () => {
+      mockPlay.mockReturnValueOnce(7)
+      mgr.setEnabled(true)
+      mgr.play('welcome')
+      expect(mockPlay).toHaveBeenCalledWith('chime')
+      expect(mockVolume).toHaveBeenCalledWith(0.3 * mgr.getVolume(), 7)
+    })
+
     it('does not play ambient sounds via play()', () => {
       mgr.setEnabled(true)
       mgr.play('ambient-island')
@@ -165,6 +222,7 @@ describe('AudioManager', () => {
       expect(state).toHaveProperty('enabled')
       expect(state).toHaveProperty('volume')
       expect(state).toHaveProperty('soundCount')
+      expect(state).toHaveProperty('fileCount')
       expect(state).toHaveProperty('ambientPlaying')
       expect(state).toHaveProperty('activeAmbientId')
     })
@@ -176,6 +234,7 @@ describe('AudioManager', () => {
       mgr.startAmbient('island')
 
       mgr.dispose()
+      expect(mockUnload).toHaveBeenCalledTimes(1)
       expect(mgr.getState().initialized).toBe(false)
       expect(mgr.getState().soundCount).toBe(0)
       expect(mgr.getState().activeAmbientId).toBeNull()